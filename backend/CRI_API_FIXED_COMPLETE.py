@@ -1,14 +1,99 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
-
-from fastapi import FastAPI
-from fastapi.responses import Response
+from enum import Enum
+from itertools import islice
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+import numpy as np
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 
 VERSION = "0.1.0"
 SERVICE_NAME = "cri_api"
+logger = logging.getLogger(SERVICE_NAME)
 GENESIS_SCORE = 1.0
+HISTORY_HOT_ENTRIES = max(1, int(os.getenv("CRI_HISTORY_HOT_ENTRIES", "64")))
+SKILL_MAX_IDS = int(os.getenv("CRI_SKILL_MAX_IDS", "4096"))
+HISTORY_DB_PATH = os.getenv("CRI_HISTORY_DB_PATH", "")
+HISTORY_COMMIT_ROWS = max(1, int(os.getenv("CRI_HISTORY_COMMIT_ROWS", "256")))
+CALIBRATION_INDEX_ENTRIES = max(1, int(os.getenv("CRI_CALIBRATION_INDEX_ENTRIES", "100000")))
+BATCH_MAX_EVENTS = int(os.getenv("CRI_BATCH_MAX_EVENTS", "5000"))
+DEDUP_WINDOW = int(os.getenv("CRI_DEDUP_WINDOW", "200000"))
+REGISTRY_SHARDS = max(1, int(os.getenv("CRI_REGISTRY_SHARDS", "16")))
+SHARD_INDEX = int(os.getenv("CRI_SHARD_INDEX", "0"))
+SHARD_COUNT = max(1, int(os.getenv("CRI_SHARD_COUNT", "1")))
+SHARD_URLS = [url.strip().rstrip("/") for url in os.getenv("CRI_SHARD_URLS", "").split(",") if url.strip()]
+ROUTER_TIMEOUT_SECONDS = float(os.getenv("CRI_ROUTER_TIMEOUT_SECONDS", "5"))
+EVENT_LOG_DIR = os.getenv("CRI_EVENT_LOG_DIR", "")
+EVENT_SEGMENT_EVENTS = max(1, int(os.getenv("CRI_EVENT_SEGMENT_EVENTS", "100000")))
+SNAPSHOT_EVERY = max(1, int(os.getenv("CRI_SNAPSHOT_EVERY", "50000")))
+LOOKUP_MAX_IDS = int(os.getenv("CRI_LOOKUP_MAX_IDS", "5000"))
+BADGE_MAX_AGE = int(os.getenv("CRI_BADGE_MAX_AGE", "300"))
+EXPORT_CHUNK_RECORDS = 500
+REPLICA_ID = os.getenv("CRI_REPLICA_ID", "")
+REPLICA_PEERS = [url.strip().rstrip("/") for url in os.getenv("CRI_REPLICA_PEERS", "").split(",") if url.strip()]
+REPLICATION_INTERVAL_SECONDS = float(os.getenv("CRI_REPLICATION_INTERVAL_SECONDS", "2"))
+REPLICA_DECAY_ANCHOR = 1_700_000_000
+ROLLUP_MAX_BYTES = int(float(os.getenv("CRI_ROLLUP_MAX_MB", "512")) * 1024 * 1024)
+CERT_PRIVATE_KEY_PATH = os.getenv("CRI_CERT_PRIVATE_KEY_PATH", "")
+CERT_ISSUER = os.getenv("CRI_CERT_ISSUER", "botnode-cri")
+CERT_TTL_SECONDS = int(os.getenv("CRI_CERT_TTL_SECONDS", "3600"))
+CERT_REFRESH_SECONDS = int(os.getenv("CRI_CERT_REFRESH_SECONDS", "300"))
+CERT_CACHE_ENTRIES = int(os.getenv("CRI_CERT_CACHE_ENTRIES", "100000"))
+CERT_SIGNING_WORKERS = max(1, int(os.getenv("CRI_CERT_SIGNING_WORKERS", str(os.cpu_count() or 1))))
+RANK_RESOLUTION = 10000
+RANK_BUCKETS = 5 * RANK_RESOLUTION + 1
+RANK_MAX_SKILL_INDEXES = int(os.getenv("CRI_RANK_MAX_SKILL_INDEXES", "512"))
+DECAY_HALF_LIFE_DAYS = float(os.getenv("CRI_DECAY_HALF_LIFE_DAYS", "90"))
+DECAY_RATE = math.log(2) / (DECAY_HALF_LIFE_DAYS * 86400) if DECAY_HALF_LIFE_DAYS > 0 else 0.0
+DECAY_FLOOR = 0.5 / RANK_RESOLUTION
+TRUST_ALPHA = float(os.getenv("CRI_TRUST_ALPHA", "0.15"))
+TRUST_TOLERANCE = float(os.getenv("CRI_TRUST_TOLERANCE", "1e-9"))
+TRUST_MAX_ITERATIONS = int(os.getenv("CRI_TRUST_MAX_ITERATIONS", "100"))
+TRUST_INTERVAL_SECONDS = float(os.getenv("CRI_TRUST_INTERVAL_SECONDS", "60"))
+TRUST_PRETRUSTED = [node_id.strip() for node_id in os.getenv("CRI_TRUST_PRETRUSTED", "").split(",") if node_id.strip()]
+
+
+HISTORY_RECORD = struct.Struct("<IdddbbId")
+NO_SKILL_CODE = 0xFFFFFFFF
+ROLLUP_RECORD = struct.Struct("<IfffI")
+# old_score, new_score, change, total_transactions, success_rate: one 40-byte record per remembered update.
+DEDUP_RECORD = struct.Struct("<dddQd")
+# Rollups cost a node ~580 B once its first event lands (the dict, three ScoreRollup objects and their
+# bytearrays), then 20 B per non-empty bucket: up to 4,695 buckets, ~94 KB, at full retention.
+# ROLLUP_BUDGET bounds the total across nodes.
+ROLLUP_RESOLUTIONS = {"minute": (60, 1440), "hour": (3600, 24 * 90), "day": (86400, 365 * 3)}
+ROLLUP_NODE_OVERHEAD = 580
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+class EventKind(str, Enum):
+    TRANSACTION = "transaction"
+    TIMEOUT = "timeout"
+    CALIBRATION = "calibration"
+
+
+EVENT_KINDS = list(EventKind)
+EVENT_KIND_CODES = {kind: code for code, kind in enumerate(EVENT_KINDS)}
 
 
 @dataclass
@@ -19,21 +104,659 @@ class CRIHistoryEntry:
     change: float
     reason: str
     transaction_id: Optional[str] = None
+    seq: int = 0
+    kind: EventKind = EventKind.TRANSACTION
+    skill_id: Optional[str] = None
+
+
+SKILL_IDS: List[str] = []
+SKILL_CODES: Dict[str, int] = {}
+_skill_lock = threading.Lock()
+
+
+def skill_code(skill_id: str) -> int:
+    code = SKILL_CODES.get(skill_id)
+    if code is None:
+        with _skill_lock:
+            code = SKILL_CODES.get(skill_id)
+            if code is None:
+                # Codes are capability-mask bits, so the table is bounded rather than growing per client skill_id.
+                if len(SKILL_IDS) >= SKILL_MAX_IDS:
+                    raise HTTPException(status_code=422, detail=f"Skill table is full ({SKILL_MAX_IDS} skill ids)")
+                code = len(SKILL_IDS)
+                SKILL_IDS.append(skill_id)
+                SKILL_CODES[SKILL_IDS[code]] = code
+    return code
+
+
+def skills_from_mask(mask: int) -> List[str]:
+    skills: List[str] = []
+    code = 0
+    while mask:
+        if mask & 1:
+            skills.append(SKILL_IDS[code])
+        mask >>= 1
+        code += 1
+    return skills
+
+
+def epoch_now() -> int:
+    return int(time.time())
+
+
+DECAY_ANCHOR = epoch_now()
+
+
+def decayed_score(score: float, since: int, now: Optional[int] = None) -> float:
+    # Reputation above genesis fades back toward it; penalties below genesis do not wear off.
+    if DECAY_RATE <= 0 or score <= GENESIS_SCORE:
+        return score
+    elapsed = max(0, (now or epoch_now()) - since)
+    return GENESIS_SCORE + (score - GENESIS_SCORE) * math.exp(-DECAY_RATE * elapsed)
+
+
+def iso_from_epoch(epoch: int) -> str:
+    return (UNIX_EPOCH + timedelta(seconds=epoch)).isoformat() + "Z"
+
+
+def epoch_from_datetime(moment: datetime) -> int:
+    return int((moment - UNIX_EPOCH).total_seconds())
+
+
+def render_reason(kind: EventKind, skill_id: Optional[str], success: bool, test_score: Optional[float]) -> str:
+    if kind == EventKind.CALIBRATION:
+        if test_score is None:
+            return f"Calibration test for {skill_id}"
+        return f"Calibration test for {skill_id} (score={test_score:.2f})"
+    if kind == EventKind.TIMEOUT:
+        return f"Timeout during {skill_id} transaction"
+    if success:
+        return f"Successful {skill_id} transaction"
+    return f"Failed {skill_id} transaction (validation failed)"
+
+
+def history_entry(
+    seq: int,
+    timestamp: int,
+    old_score: float,
+    new_score: float,
+    change: float,
+    kind: EventKind,
+    success: bool,
+    skill_id: Optional[str],
+    test_score: Optional[float],
+    transaction_id: Optional[str],
+) -> CRIHistoryEntry:
+    return CRIHistoryEntry(
+        timestamp=iso_from_epoch(timestamp),
+        old_score=old_score,
+        new_score=new_score,
+        change=change,
+        reason=render_reason(kind, skill_id, success, test_score),
+        transaction_id=transaction_id,
+        seq=seq,
+        kind=kind,
+        skill_id=skill_id,
+    )
+
+
+def storage_directory() -> str:
+    # Each shard worker keeps its own event log, snapshots and cold history, so sequence numbers never interleave.
+    if SHARD_COUNT > 1:
+        return os.path.join(EVENT_LOG_DIR, f"shard-{SHARD_INDEX}-of-{SHARD_COUNT}")
+    return EVENT_LOG_DIR
+
+
+def history_db_path() -> str:
+    # Snapshots only carry the hot window, so with an event log the cold segment must survive a restart too.
+    # Without one nothing outlives the process, so an empty path opens SQLite's private temporary database:
+    # a file under SQLITE_TMPDIR/TMPDIR that is deleted on close, with only its page cache in memory.
+    # CRI_HISTORY_DB_PATH=:memory: keeps every spilled entry in process memory, so memory grows per event.
+    if HISTORY_DB_PATH:
+        return HISTORY_DB_PATH
+    if not EVENT_LOG_DIR:
+        return ""
+    directory = storage_directory()
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, "history.sqlite")
+
+
+class HistorySegmentStore:
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self._db_path = history_db_path() if db_path is None else db_path
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+        self._ensure_schema()
+
+    def _ensure_schema(self) -> None:
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cri_history_segment (
+                node_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL,
+                old_score REAL NOT NULL,
+                new_score REAL NOT NULL,
+                change REAL NOT NULL,
+                kind TEXT NOT NULL,
+                success INTEGER NOT NULL,
+                skill_id TEXT,
+                test_score REAL,
+                transaction_id TEXT,
+                PRIMARY KEY (node_id, seq)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.commit()
+
+    def append(self, node_id: str, seq: int, record: Tuple[Any, ...], transaction_id: Optional[str]) -> None:
+        timestamp, old_score, new_score, change, kind, success, skill, test_score = record
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR IGNORE INTO cri_history_segment(
+                    node_id, seq, timestamp, old_score, new_score, change,
+                    kind, success, skill_id, test_score, transaction_id
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    node_id,
+                    seq,
+                    timestamp,
+                    old_score,
+                    new_score,
+                    change,
+                    EVENT_KINDS[kind].value,
+                    success,
+                    SKILL_IDS[skill] if skill != NO_SKILL_CODE else None,
+                    None if math.isnan(test_score) else test_score,
+                    transaction_id,
+                ),
+            )
+            # Spills sit on the update path, so commit in groups; reads share the connection and see them already.
+            self._uncommitted += 1
+            if self._uncommitted >= HISTORY_COMMIT_ROWS:
+                self._conn.commit()
+                self._uncommitted = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._uncommitted:
+                self._conn.commit()
+                self._uncommitted = 0
+
+    def since(self, node_id: str, since: int, before: int, limit: int = EXPORT_CHUNK_RECORDS) -> Iterator[CRIHistoryEntry]:
+        # Spilled entries with timestamp >= since and seq < before, oldest first, fetched a page at a time.
+        after = -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    """
+                    SELECT seq, timestamp, old_score, new_score, change, kind, success, skill_id, test_score, transaction_id
+                    FROM cri_history_segment
+                    WHERE node_id = ? AND seq > ? AND seq < ? AND timestamp >= ?
+                    ORDER BY seq
+                    LIMIT ?
+                    """,
+                    (node_id, after, before, since, limit),
+                ).fetchall()
+            for seq, timestamp, old_score, new_score, change, kind, success, skill_id, test_score, transaction_id in rows:
+                yield history_entry(
+                    seq,
+                    timestamp,
+                    old_score,
+                    new_score,
+                    change,
+                    EventKind(kind),
+                    bool(success),
+                    skill_id,
+                    test_score,
+                    transaction_id,
+                )
+            if len(rows) < limit:
+                return
+            after = rows[-1][0]
+
+    def page(self, node_id: str, before: int, limit: int) -> List[CRIHistoryEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT seq, timestamp, old_score, new_score, change, kind, success, skill_id, test_score, transaction_id
+                FROM cri_history_segment
+                WHERE node_id = ? AND seq < ?
+                ORDER BY seq DESC
+                LIMIT ?
+                """,
+                (node_id, before, limit),
+            ).fetchall()
+        return [
+            history_entry(
+                seq,
+                timestamp,
+                old_score,
+                new_score,
+                change,
+                EventKind(kind),
+                bool(success),
+                skill_id,
+                test_score,
+                transaction_id,
+            )
+            for seq, timestamp, old_score, new_score, change, kind, success, skill_id, test_score, transaction_id in rows
+        ]
+
+
+HISTORY_STORE = HistorySegmentStore()
+
+
+class NodeHistory:
+    # The hot window is a ring of packed HISTORY_RECORDs; slot = seq % capacity.
+    __slots__ = ("node_id", "next_seq", "capacity", "_records", "_transaction_ids")
+
+    def __init__(self, node_id: str) -> None:
+        self.node_id = node_id
+        self.next_seq = 0
+        self.capacity = HISTORY_HOT_ENTRIES
+        self._records = bytearray()
+        self._transaction_ids: List[Optional[str]] = []
+
+    def __len__(self) -> int:
+        return self.next_seq
+
+    def __iter__(self) -> Iterator[CRIHistoryEntry]:
+        first_hot = self.first_hot_seq
+        if first_hot > 0:
+            yield from HISTORY_STORE.since(self.node_id, 0, first_hot)
+        for seq in range(first_hot, self.next_seq):
+            yield self.entry(seq)
+
+    @property
+    def first_hot_seq(self) -> int:
+        return self.next_seq - len(self._transaction_ids)
+
+    def append(
+        self,
+        timestamp: int,
+        old_score: float,
+        new_score: float,
+        change: float,
+        kind: EventKind,
+        success: bool,
+        skill_id: Optional[str],
+        test_score: Optional[float],
+        transaction_id: Optional[str],
+    ) -> int:
+        seq = self.next_seq
+        slot = seq % self.capacity
+        record = (
+            timestamp,
+            old_score,
+            new_score,
+            change,
+            EVENT_KIND_CODES[kind],
+            1 if success else 0,
+            skill_code(skill_id) if skill_id else NO_SKILL_CODE,
+            math.nan if test_score is None else test_score,
+        )
+        if len(self._transaction_ids) < self.capacity:
+            self._records.extend(HISTORY_RECORD.pack(*record))
+            self._transaction_ids.append(transaction_id)
+        else:
+            HISTORY_STORE.append(
+                self.node_id,
+                seq - self.capacity,
+                HISTORY_RECORD.unpack_from(self._records, slot * HISTORY_RECORD.size),
+                self._transaction_ids[slot],
+            )
+            HISTORY_RECORD.pack_into(self._records, slot * HISTORY_RECORD.size, *record)
+            self._transaction_ids[slot] = transaction_id
+        self.next_seq += 1
+        return seq
+
+    def entry(self, seq: int) -> CRIHistoryEntry:
+        slot = seq % self.capacity
+        timestamp, old_score, new_score, change, kind, success, skill, test_score = HISTORY_RECORD.unpack_from(
+            self._records, slot * HISTORY_RECORD.size
+        )
+        return history_entry(
+            seq,
+            timestamp,
+            old_score,
+            new_score,
+            change,
+            EVENT_KINDS[kind],
+            bool(success),
+            SKILL_IDS[skill] if skill != NO_SKILL_CODE else None,
+            None if math.isnan(test_score) else test_score,
+            self._transaction_ids[slot],
+        )
+
+    def state(self) -> List[Any]:
+        return [
+            self.next_seq,
+            self.capacity,
+            base64.b64encode(bytes(self._records)).decode("ascii"),
+            list(self._transaction_ids),
+        ]
+
+    @classmethod
+    def from_state(cls, node_id: str, state: List[Any]) -> "NodeHistory":
+        history = cls(node_id)
+        history.next_seq, history.capacity, records, history._transaction_ids = state
+        history._records = bytearray(base64.b64decode(records))
+        return history
+
+    def page(self, before: Optional[int], limit: int) -> List[CRIHistoryEntry]:
+        if before is None or before > self.next_seq:
+            before = self.next_seq
+        if before <= 0 or limit <= 0:
+            return []
+
+        first_hot = self.first_hot_seq
+        entries = [self.entry(seq) for seq in range(before - 1, max(first_hot, before - limit) - 1, -1)]
+        remaining = limit - len(entries)
+        if remaining > 0 and first_hot > 0:
+            entries.extend(HISTORY_STORE.page(self.node_id, min(before, first_hot), remaining))
+        return entries
+
+
+class ScoreRollup:
+    # Time-ordered (start, min, max, last, count) buckets; only the newest one is ever updated.
+    __slots__ = ("seconds", "retention", "_records")
+
+    def __init__(self, seconds: int, retention: int) -> None:
+        self.seconds = seconds
+        self.retention = retention
+        self._records = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._records) // ROLLUP_RECORD.size
+
+    def record(self, timestamp: int, score: float) -> int:
+        # Returns the bytes this call added.
+        start = timestamp - timestamp % self.seconds
+        if self._records:
+            offset = len(self._records) - ROLLUP_RECORD.size
+            newest, low, high, _, count = ROLLUP_RECORD.unpack_from(self._records, offset)
+            if newest >= start:
+                ROLLUP_RECORD.pack_into(
+                    self._records, offset, newest, min(low, score), max(high, score), score, count + 1
+                )
+                return 0
+        self._records.extend(ROLLUP_RECORD.pack(start, score, score, score, 1))
+        if len(self) > self.retention:
+            del self._records[:ROLLUP_RECORD.size]
+            return 0
+        return ROLLUP_RECORD.size
+
+    def points(self, limit: int) -> List[Dict[str, Any]]:
+        first = max(0, len(self) - limit)
+        return [
+            {
+                "timestamp": iso_from_epoch(start),
+                "min": round(low, 4),
+                "max": round(high, 4),
+                "last": round(last, 4),
+                "count": count,
+            }
+            for start, low, high, last, count in ROLLUP_RECORD.iter_unpack(
+                memoryview(self._records)[first * ROLLUP_RECORD.size:]
+            )
+        ]
+
+    def state(self) -> List[Any]:
+        return [self.seconds, self.retention, base64.b64encode(bytes(self._records)).decode("ascii")]
+
+    @classmethod
+    def from_state(cls, state: List[Any]) -> "ScoreRollup":
+        seconds, retention, records = state
+        rollup = cls(seconds, retention)
+        rollup._records = bytearray(base64.b64decode(records))
+        return rollup
+
+
+class RollupBudget:
+    # Approximate rollup bytes across all nodes. Updates only pay a locked add when a bucket is opened;
+    # maybe_trim_rollups() drops the rollups of the least recently active nodes once the total is over.
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = ROLLUP_MAX_BYTES if max_bytes is None else max_bytes
+        self.bytes = 0
+        self.evicted = 0
+        self.trimming = threading.Lock()
+        self._lock = threading.Lock()
+
+    def add(self, delta: int) -> None:
+        with self._lock:
+            self.bytes += delta
+
+    @property
+    def over(self) -> bool:
+        return self.bytes > self.max_bytes
+
+
+ROLLUP_BUDGET = RollupBudget()
+
+
+class ReplicaCounters:
+    # Per-replica G-counters: a replica only ever raises its own entries, so merging is an entrywise max.
+    # Gains are stored as delta * exp(rate * (t - anchor)) so one factor decays their sum at read time;
+    # penalties do not decay. Calibration scores are LWW registers of [timestamp, replica_id, score].
+    __slots__ = ("total", "successful", "failed", "gains", "penalties", "calibration")
+    COUNTERS = ("total", "successful", "failed", "gains", "penalties")
+
+    def __init__(self) -> None:
+        self.total: Dict[str, int] = {}
+        self.successful: Dict[str, int] = {}
+        self.failed: Dict[str, int] = {}
+        self.gains: Dict[str, float] = {}
+        self.penalties: Dict[str, float] = {}
+        self.calibration: Dict[str, List[Any]] = {}
+
+    @classmethod
+    def seeded(cls, node: "NodeCRI") -> "ReplicaCounters":
+        # State that predates replication goes in a "seed" lane; replicas seeded from the same data agree on it.
+        counters = cls()
+        lane = "seed"
+        if node.total_transactions:
+            counters.total[lane] = node.total_transactions
+            counters.successful[lane] = node.successful_transactions
+            counters.failed[lane] = node.failed_transactions
+        counters.add_delta(lane, node.current_score - GENESIS_SCORE, node.last_active)
+        for skill_id, score in (node.calibration_scores or {}).items():
+            counters.calibration[skill_id] = [node.last_active, lane, score]
+        return counters
+
+    def add_delta(self, lane: str, delta: float, timestamp: int) -> None:
+        if delta > 0:
+            self.gains[lane] = self.gains.get(lane, 0.0) + delta * math.exp(DECAY_RATE * (timestamp - REPLICA_DECAY_ANCHOR))
+        elif delta < 0:
+            self.penalties[lane] = self.penalties.get(lane, 0.0) - delta
+
+    def unclamped(self, at: int) -> float:
+        gains = sum(self.gains.values()) * math.exp(-DECAY_RATE * (at - REPLICA_DECAY_ANCHOR))
+        return GENESIS_SCORE + gains - sum(self.penalties.values())
+
+    def score(self, at: int) -> float:
+        return round(clamp_score(self.unclamped(at)), 4)
+
+    def merge(self, state: Dict[str, Any]) -> bool:
+        changed = False
+        for name in self.COUNTERS:
+            mine = getattr(self, name)
+            for lane, value in state.get(name, {}).items():
+                if value > mine.get(lane, 0):
+                    mine[lane] = value
+                    changed = True
+        for skill_id, register in state.get("calibration", {}).items():
+            current = self.calibration.get(skill_id)
+            if current is None or (register[0], register[1]) > (current[0], current[1]):
+                self.calibration[skill_id] = list(register)
+                changed = True
+        return changed
+
+    def state(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = {name: dict(getattr(self, name)) for name in self.COUNTERS}
+        state["calibration"] = {skill_id: list(register) for skill_id, register in self.calibration.items()}
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ReplicaCounters":
+        counters = cls()
+        counters.merge(state)
+        return counters
 
 
-@dataclass
 class NodeCRI:
-    node_id: str
-    current_score: float
-    total_transactions: int
-    successful_transactions: int
-    failed_transactions: int
-    success_rate: float
-    last_active: str
-    capabilities: List[str]
-    calibration_scores: Dict[str, float]
-    history: List[CRIHistoryEntry]
-    created_at: str
+    __slots__ = (
+        "node_id",
+        "current_score",
+        "total_transactions",
+        "successful_transactions",
+        "failed_transactions",
+        "last_active",
+        "created_at",
+        "capability_mask",
+        "calibration_scores",
+        "history",
+        "rollups",
+        "replica",
+    )
+
+    def __init__(
+        self,
+        node_id: str,
+        current_score: float = GENESIS_SCORE,
+        total_transactions: int = 0,
+        successful_transactions: int = 0,
+        failed_transactions: int = 0,
+        last_active: int = 0,
+        created_at: int = 0,
+        capabilities: Optional[List[str]] = None,
+        calibration_scores: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.node_id = node_id
+        self.current_score = current_score
+        self.total_transactions = total_transactions
+        self.successful_transactions = successful_transactions
+        self.failed_transactions = failed_transactions
+        self.last_active = last_active
+        self.created_at = created_at
+        self.capability_mask = 0
+        for skill_id in capabilities or ():
+            self.add_capability(skill_id)
+        self.calibration_scores: Optional[Dict[str, float]] = None
+        for skill_id, score in (calibration_scores or {}).items():
+            self.set_calibration_score(skill_id, score)
+        self.history: Optional[NodeHistory] = None
+        self.rollups: Optional[Dict[str, ScoreRollup]] = None
+        self.replica: Optional[ReplicaCounters] = None
+
+    @property
+    def success_rate(self) -> float:
+        if self.total_transactions > 0:
+            return self.successful_transactions / self.total_transactions
+        return 0.0
+
+    @property
+    def capabilities(self) -> List[str]:
+        return skills_from_mask(self.capability_mask)
+
+    def score_at(self, now: Optional[int] = None) -> float:
+        # current_score is stored as of last_active and decayed on read. Replicated nodes read their
+        # counters instead: only the gains decay there, while decaying current_score would fade penalties too.
+        if self.replica is not None:
+            return self.replica.score(now or epoch_now())
+        return decayed_score(self.current_score, self.last_active, now)
+
+    def has_capability(self, skill_id: str) -> bool:
+        code = SKILL_CODES.get(skill_id)
+        return code is not None and bool(self.capability_mask >> code & 1)
+
+    def add_capability(self, skill_id: str) -> None:
+        self.capability_mask |= 1 << skill_code(skill_id)
+
+    def set_calibration_score(self, skill_id: str, score: float) -> None:
+        if self.calibration_scores is None:
+            self.calibration_scores = {}
+        self.calibration_scores[SKILL_IDS[skill_code(skill_id)]] = score
+
+    def ensure_history(self) -> NodeHistory:
+        if self.history is None:
+            self.history = NodeHistory(self.node_id)
+        return self.history
+
+    def record_rollups(self, timestamp: int, score: float) -> None:
+        added = 0
+        if self.rollups is None:
+            self.rollups = {
+                resolution: ScoreRollup(seconds, retention)
+                for resolution, (seconds, retention) in ROLLUP_RESOLUTIONS.items()
+            }
+            added = ROLLUP_NODE_OVERHEAD
+        for rollup in self.rollups.values():
+            added += rollup.record(timestamp, score)
+        if added:
+            ROLLUP_BUDGET.add(added)
+
+    def rollup_bytes(self) -> int:
+        if self.rollups is None:
+            return 0
+        return ROLLUP_NODE_OVERHEAD + sum(len(rollup._records) for rollup in self.rollups.values())
+
+    def state(self) -> List[Any]:
+        return [
+            self.node_id,
+            self.current_score,
+            self.total_transactions,
+            self.successful_transactions,
+            self.failed_transactions,
+            self.last_active,
+            self.created_at,
+            self.capabilities,
+            None if self.calibration_scores is None else dict(self.calibration_scores),
+            None if self.history is None else self.history.state(),
+            None if self.rollups is None else {resolution: rollup.state() for resolution, rollup in self.rollups.items()},
+            None if self.replica is None else self.replica.state(),
+        ]
+
+    @classmethod
+    def from_state(cls, state: List[Any]) -> "NodeCRI":
+        node_id, score, total, successful, failed, last_active, created_at, capabilities, calibration, history = state[:10]
+        rollups = state[10] if len(state) > 10 else None
+        replica = state[11] if len(state) > 11 else None
+        node = cls(
+            node_id=node_id,
+            current_score=score,
+            total_transactions=total,
+            successful_transactions=successful,
+            failed_transactions=failed,
+            last_active=last_active,
+            created_at=created_at,
+            capabilities=capabilities,
+            calibration_scores=calibration,
+        )
+        if history is not None:
+            node.history = NodeHistory.from_state(node_id, history)
+        if rollups is not None:
+            node.rollups = {resolution: ScoreRollup.from_state(rollup) for resolution, rollup in rollups.items()}
+        if replica is not None:
+            node.replica = ReplicaCounters.from_state(replica)
+        return node
+
+
+LOOKUP_FIELDS = {
+    "cri_score": lambda node: round(node.score_at(), 4),
+    "total_transactions": lambda node: node.total_transactions,
+    "success_rate": lambda node: round(node.success_rate, 4),
+    "last_active": lambda node: iso_from_epoch(node.last_active),
+    "capabilities": lambda node: node.capabilities,
+    "calibration_scores": lambda node: node.calibration_scores or {},
+    "trust_score": lambda node: TRUST_ENGINE.trust_of(node.node_id),
+}
+DEFAULT_LOOKUP_FIELDS = ("cri_score", "total_transactions", "success_rate")
 
 
 class CRIResponse(BaseModel):
@@ -44,6 +767,9 @@ class CRIResponse(BaseModel):
     last_active: str
     capabilities: List[str] = Field(default_factory=list)
     calibration_scores: Dict[str, float] = Field(default_factory=dict)
+    trust_score: Optional[float] = Field(
+        None, ge=0.0, description="Global EigenTrust score, 1.0 = uniform share; null when running with --shards"
+    )
 
 
 class TransactionEvent(BaseModel):
@@ -54,12 +780,27 @@ class TransactionEvent(BaseModel):
     validation_passed: Optional[bool] = True
     calibration_test: Optional[bool] = False
     test_score: Optional[float] = Field(None, ge=0.0, le=1.0)
+    buyer_node_id: Optional[str] = None
+
+
+class TransactionBatch(BaseModel):
+    events: List[TransactionEvent] = Field(..., min_length=1, max_length=BATCH_MAX_EVENTS)
+
+
+class CRILookupRequest(BaseModel):
+    node_ids: List[str] = Field(..., min_length=1, max_length=LOOKUP_MAX_IDS)
+    fields: List[str] = Field(default_factory=lambda: list(DEFAULT_LOOKUP_FIELDS))
+
+
+class CRICertificateRequest(BaseModel):
+    node_ids: List[str] = Field(..., min_length=1, max_length=LOOKUP_MAX_IDS)
 
 
 class CRIHistoryResponse(BaseModel):
     node_id: str
     history: List[Dict[str, Any]]
     total_entries: int
+    next_before: Optional[int] = None
 
 
 app = FastAPI(
@@ -70,7 +811,1126 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
-NODE_REGISTRY: Dict[str, NodeCRI] = {}
+
+class ProcessedTransactions:
+    # Deltas are kept packed and rebuilt on a duplicate; a dict per entry cost several hundred bytes.
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._deltas: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+
+    def get(self, node_id: str, transaction_id: str) -> Optional[Dict[str, Any]]:
+        record = self._deltas.get((node_id, transaction_id))
+        if record is None:
+            return None
+        old_score, new_score, change, total, success_rate = DEDUP_RECORD.unpack(record)
+        return {
+            "node_id": node_id,
+            "old_score": old_score,
+            "new_score": new_score,
+            "change": change,
+            "total_transactions": total,
+            "success_rate": success_rate,
+        }
+
+    def remember(self, node_id: str, transaction_id: str, delta: Dict[str, Any]) -> None:
+        self._deltas[(node_id, transaction_id)] = DEDUP_RECORD.pack(
+            delta["old_score"], delta["new_score"], delta["change"], delta["total_transactions"], delta["success_rate"]
+        )
+        if len(self._deltas) > self.max_entries:
+            self._deltas.popitem(last=False)
+
+
+def shard_index(node_id: str, shard_count: int) -> int:
+    return zlib.crc32(node_id.encode("utf-8")) % shard_count
+
+
+def owns_node(node_id: str) -> bool:
+    return SHARD_COUNT == 1 or shard_index(node_id, SHARD_COUNT) == SHARD_INDEX
+
+
+def trust_enabled() -> bool:
+    # EigenTrust needs the whole buyer -> seller graph. A shard only sees edges into the sellers it owns,
+    # and a vector computed over that would be served as global trust, so sharded workers turn it off.
+    return SHARD_COUNT == 1
+
+
+TRUST_DISABLED_DETAIL = "EigenTrust needs the whole transaction graph and is disabled with --shards"
+
+
+class RegistryShard:
+    __slots__ = ("nodes", "lock", "processed")
+
+    def __init__(self, dedup_window: int) -> None:
+        self.nodes: Dict[str, NodeCRI] = {}
+        self.lock = threading.Lock()
+        self.processed = ProcessedTransactions(dedup_window)
+
+
+class ShardedRegistry:
+    def __init__(self, shard_count: Optional[int] = None) -> None:
+        self.shard_count = shard_count or REGISTRY_SHARDS
+        window = max(1, DEDUP_WINDOW // self.shard_count)
+        self.shards = [RegistryShard(window) for _ in range(self.shard_count)]
+
+    def shard_for(self, node_id: str) -> RegistryShard:
+        return self.shards[shard_index(node_id, self.shard_count)]
+
+    def get(self, node_id: str) -> Optional[NodeCRI]:
+        return self.shard_for(node_id).nodes.get(node_id)
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self.shard_for(node_id).nodes
+
+    def __getitem__(self, node_id: str) -> NodeCRI:
+        return self.shard_for(node_id).nodes[node_id]
+
+    def __setitem__(self, node_id: str, node: NodeCRI) -> None:
+        self.shard_for(node_id).nodes[node_id] = node
+
+    def __len__(self) -> int:
+        return sum(len(shard.nodes) for shard in self.shards)
+
+    def __bool__(self) -> bool:
+        return any(shard.nodes for shard in self.shards)
+
+    def values(self) -> Iterator[NodeCRI]:
+        for shard in self.shards:
+            yield from list(shard.nodes.values())
+
+    def clear(self) -> None:
+        for shard in self.shards:
+            with shard.lock:
+                shard.nodes.clear()
+                shard.processed = ProcessedTransactions(shard.processed.max_entries)
+
+
+NODE_REGISTRY = ShardedRegistry()
+
+SCORE_BUCKETS = ("excellent_4+", "good_3-4", "fair_2-3", "poor_1-2", "critical_0-1")
+SCORE_BUCKET_RANGES = {
+    "excellent_4+": (4.0, 5.0),
+    "good_3-4": (3.0, 4.0 - 1 / RANK_RESOLUTION),
+    "fair_2-3": (2.0, 3.0 - 1 / RANK_RESOLUTION),
+    "poor_1-2": (1.0, 2.0 - 1 / RANK_RESOLUTION),
+    "critical_0-1": (0.0, 1.0 - 1 / RANK_RESOLUTION),
+}
+
+
+def score_bucket(score: float) -> str:
+    if score >= 4:
+        return "excellent_4+"
+    if score >= 3:
+        return "good_3-4"
+    if score >= 2:
+        return "fair_2-3"
+    if score >= 1:
+        return "poor_1-2"
+    return "critical_0-1"
+
+
+class RegistryStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.total_nodes = 0
+        self.score_sum = 0.0
+        self.decaying_nodes = 0
+        self.decaying_excess = 0.0
+        self.total_transactions = 0
+        self.active_day = -1
+        self.active_nodes: Set[str] = set()
+        self.calibration_tests = 0
+
+    def _add_score(self, score: float, epoch: int, sign: int) -> None:
+        # Decaying excess is summed as (s - genesis) * exp(rate * (t - anchor)) so one factor decays it all.
+        if DECAY_RATE > 0 and score > GENESIS_SCORE:
+            self.decaying_nodes += sign
+            self.decaying_excess += sign * (score - GENESIS_SCORE) * math.exp(DECAY_RATE * (epoch - DECAY_ANCHOR))
+            if not self.decaying_nodes:
+                self.decaying_excess = 0.0
+        else:
+            self.score_sum += sign * score
+
+    def add_transactions(self, count: int) -> None:
+        with self._lock:
+            self.total_transactions += count
+
+    def add_node(self, node: NodeCRI) -> None:
+        with self._lock:
+            self.total_nodes += 1
+            self._add_score(node.current_score, node.last_active, 1)
+            self.total_transactions += node.total_transactions
+            self._mark_active(node.node_id, node.last_active)
+
+    def record_update(
+        self,
+        node_id: str,
+        old_score: float,
+        old_epoch: int,
+        new_score: float,
+        last_active: int,
+        transaction: bool,
+        calibration: bool,
+    ) -> None:
+        with self._lock:
+            self._add_score(old_score, old_epoch, -1)
+            self._add_score(new_score, last_active, 1)
+            if transaction:
+                self.total_transactions += 1
+            if calibration:
+                self.calibration_tests += 1
+            self._mark_active(node_id, last_active)
+
+    def _mark_active(self, node_id: str, last_active: int) -> None:
+        day = last_active // 86400
+        if day > self.active_day:
+            self.active_day = day
+            self.active_nodes = set()
+        if day == self.active_day:
+            self.active_nodes.add(node_id)
+
+    def active_today(self) -> int:
+        return len(self.active_nodes) if self.active_day == epoch_now() // 86400 else 0
+
+    def average_score(self, now: Optional[int] = None) -> float:
+        if not self.total_nodes:
+            return 0.0
+        total = self.score_sum + self.decaying_nodes * GENESIS_SCORE
+        if self.decaying_nodes:
+            total += self.decaying_excess * math.exp(-DECAY_RATE * ((now or epoch_now()) - DECAY_ANCHOR))
+        return total / self.total_nodes
+
+
+REGISTRY_STATS = RegistryStats()
+
+
+CalibrationRef = Tuple[str, int, int]
+
+
+class CalibrationIndex:
+    # (node_id, seq, skill code) references into node history for the newest CALIBRATION_INDEX_ENTRIES
+    # calibrations; the entries themselves are read back from the hot ring or the cold segment.
+    # Every list is in arrival order, so the oldest reference is at the front of all three.
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        self.max_entries = CALIBRATION_INDEX_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        self.entries: Deque[CalibrationRef] = deque()
+        self.by_skill: Dict[int, Deque[CalibrationRef]] = {}
+        self.by_node: Dict[str, Deque[CalibrationRef]] = {}
+        self.added = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, node_id: str, seq: int, skill_id: Optional[str]) -> None:
+        record = (node_id, seq, skill_code(skill_id) if skill_id else NO_SKILL_CODE)
+        with self._lock:
+            self.entries.append(record)
+            self.by_skill.setdefault(record[2], deque()).append(record)
+            self.by_node.setdefault(node_id, deque()).append(record)
+            self.added += 1
+            if len(self.entries) > self.max_entries:
+                oldest = self.entries.popleft()
+                self._drop_oldest(self.by_skill, oldest[2])
+                self._drop_oldest(self.by_node, oldest[0])
+
+    @staticmethod
+    def _drop_oldest(index: Dict[Any, Deque[CalibrationRef]], key: Any) -> None:
+        records = index[key]
+        records.popleft()
+        if not records:
+            del index[key]
+
+    def latest(
+        self,
+        limit: int,
+        skill_id: Optional[str] = None,
+        node_id: Optional[str] = None,
+    ) -> Tuple[List[CalibrationRef], int]:
+        # Totals count the references still indexed.
+        code = SKILL_CODES.get(skill_id) if skill_id else NO_SKILL_CODE
+        with self._lock:
+            candidates: Deque[CalibrationRef] = self.entries
+            if skill_id is not None:
+                candidates = self.by_skill.get(code, deque())
+            if node_id is not None:
+                node_records = self.by_node.get(node_id, deque())
+                if skill_id is None or len(node_records) < len(candidates):
+                    candidates = node_records
+
+            if skill_id is not None and node_id is not None:
+                matches = [record for record in reversed(candidates) if record[0] == node_id and record[2] == code]
+                return matches[:limit], len(matches)
+            return list(islice(reversed(candidates), limit)), len(candidates)
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total": self.added,
+                "records": [
+                    [node_id, seq, SKILL_IDS[code] if code != NO_SKILL_CODE else None]
+                    for node_id, seq, code in self.entries
+                ],
+            }
+
+
+CALIBRATION_INDEX = CalibrationIndex()
+
+
+def rank_bucket(score: float) -> int:
+    return max(0, min(int(round(score * RANK_RESOLUTION)), RANK_BUCKETS - 1))
+
+
+class SparseTree(dict):
+    # Fenwick positions never written read as zero, without being stored.
+    def __missing__(self, position: int) -> int:
+        return 0
+
+
+class BucketCounts:
+    # Fenwick tree of node counts per bucket plus the members of each bucket; callers hold the lock.
+    # The tree starts as a dict of touched positions and becomes a flat array once that stops being smaller,
+    # so an index that only ever holds a few nodes costs a few KB instead of a full ring.
+    def __init__(self, buckets: int) -> None:
+        self.buckets = buckets
+        self.size = 0
+        self.members: Dict[int, Set[str]] = {}
+        self._tree: Any = SparseTree()
+        self._top_bit = 1 << (buckets.bit_length() - 1)
+
+    def _add(self, bucket: int, delta: int) -> None:
+        tree = self._tree
+        position = bucket + 1
+        while position <= self.buckets:
+            tree[position] += delta
+            position += position & -position
+        if type(tree) is SparseTree and len(tree) > self.buckets // 16:
+            self._tree = array("i", [0]) * (self.buckets + 1)
+            for position, count in tree.items():
+                self._tree[position] = count
+
+    def prefix(self, bucket: int) -> int:
+        # Number of nodes in buckets [0, bucket].
+        total = 0
+        position = min(bucket + 1, self.buckets)
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def count(self, low: int, high: int) -> int:
+        if high < low:
+            return 0
+        return self.prefix(high) - self.prefix(low - 1)
+
+    def _find(self, order: int) -> int:
+        # Bucket holding the order-th lowest node (1-based).
+        position = 0
+        step = self._top_bit
+        while step:
+            following = position + step
+            if following <= self.buckets and self._tree[following] < order:
+                position = following
+                order -= self._tree[following]
+            step >>= 1
+        return position
+
+    def insert(self, bucket: int, node_id: str) -> None:
+        self.members.setdefault(bucket, set()).add(node_id)
+        self._add(bucket, 1)
+        self.size += 1
+
+    def remove(self, bucket: int, node_id: str) -> bool:
+        members = self.members.get(bucket)
+        if members is None or node_id not in members:
+            return False
+        members.discard(node_id)
+        if not members:
+            del self.members[bucket]
+        self._add(bucket, -1)
+        self.size -= 1
+        return True
+
+    def take(self, bucket: int) -> Set[str]:
+        members = self.members.pop(bucket, set())
+        if members:
+            self._add(bucket, -len(members))
+            self.size -= len(members)
+        return members
+
+    def descending(self, high: int, low: int) -> Iterator[Tuple[int, Set[str]]]:
+        # Non-empty buckets from high down to low, skipping empty runs via the tree.
+        remaining = self.prefix(high)
+        stop = self.prefix(low - 1)
+        while remaining > stop:
+            bucket = self._find(remaining)
+            members = self.members[bucket]
+            yield bucket, members
+            remaining -= len(members)
+
+
+class ScoreRankIndex:
+    # Scores at or below genesis never decay and sit in fixed score buckets. A score s set at time t above
+    # genesis reads b + (s - b) * exp(-rate * (now - t)), so the order between two of them never changes:
+    # they are keyed once by t + ln(s - b) / rate in a ring of key buckets that slides with the clock.
+    # Keys that fall behind the ring have decayed below rank resolution and drop into the genesis bucket,
+    # so the passage of time never rescans the index.
+    def __init__(self, rate: Optional[float] = None) -> None:
+        self.rate = DECAY_RATE if rate is None else rate
+        self._lock = threading.Lock()
+        self._scores = BucketCounts(RANK_BUCKETS)
+        self._keys: Optional[BucketCounts] = None
+        if self.rate > 0:
+            self._key_width = 1.0 / ((5.0 - GENESIS_SCORE) * RANK_RESOLUTION * self.rate)
+            span = math.log((5.0 - GENESIS_SCORE) / DECAY_FLOOR) / self.rate / self._key_width
+            self._keys = BucketCounts(int(span) + 2)
+            self._floor = self._key(GENESIS_SCORE + DECAY_FLOOR, epoch_now())
+
+    @property
+    def size(self) -> int:
+        return self._scores.size + (self._keys.size if self._keys is not None else 0)
+
+    def _key(self, score: float, epoch: int) -> int:
+        return math.floor((epoch + math.log(score - GENESIS_SCORE) / self.rate) / self._key_width)
+
+    def _expire(self, now: int) -> None:
+        floor = self._key(GENESIS_SCORE + DECAY_FLOOR, now)
+        if floor <= self._floor:
+            return
+        genesis = rank_bucket(GENESIS_SCORE)
+        for key in range(max(self._floor, floor - self._keys.buckets), floor):
+            for node_id in self._keys.take(key % self._keys.buckets):
+                self._scores.insert(genesis, node_id)
+        self._floor = floor
+
+    def _locate(self, score: float, epoch: int) -> Tuple[BucketCounts, int]:
+        if self._keys is not None and score > GENESIS_SCORE:
+            key = min(self._key(score, epoch), self._floor + self._keys.buckets - 1)
+            if key >= self._floor:
+                return self._keys, key % self._keys.buckets
+            score = GENESIS_SCORE
+        return self._scores, rank_bucket(score)
+
+    def _key_range(self, min_score: float, max_score: float, now: int) -> Tuple[int, int]:
+        low = self._floor
+        if min_score > GENESIS_SCORE:
+            low = max(low, self._key(min_score, now))
+        high = min(self._key(min(max_score, 5.0), now), self._floor + self._keys.buckets - 1)
+        return low, high
+
+    def _key_segments(self, low: int, high: int) -> List[Tuple[int, int, int]]:
+        # Ring positions for keys [low, high] as (top, bottom, key offset), highest first.
+        if high < low:
+            return []
+        buckets = self._keys.buckets
+        top, bottom = high % buckets, low % buckets
+        offset = high - top
+        if bottom <= top:
+            return [(top, bottom, offset)]
+        return [(top, 0, offset), (buckets - 1, bottom, offset - buckets)]
+
+    def _static_max(self, max_score: float) -> float:
+        return max_score if self._keys is None else min(max_score, GENESIS_SCORE)
+
+    def add(self, node_id: str, score: float, epoch: int) -> None:
+        with self._lock:
+            if self._keys is not None:
+                self._expire(epoch_now())
+            counts, bucket = self._locate(score, epoch)
+            counts.insert(bucket, node_id)
+
+    def move(self, node_id: str, old_score: float, old_epoch: int, new_score: float, new_epoch: int) -> None:
+        with self._lock:
+            if self._keys is not None:
+                self._expire(epoch_now())
+            old_counts, old_bucket = self._locate(old_score, old_epoch)
+            new_counts, new_bucket = self._locate(new_score, new_epoch)
+            if old_counts is new_counts and old_bucket == new_bucket:
+                return
+            if old_counts.remove(old_bucket, node_id):
+                new_counts.insert(new_bucket, node_id)
+
+    def count_between(self, min_score: float, max_score: float) -> int:
+        now = epoch_now()
+        with self._lock:
+            if self._keys is not None:
+                self._expire(now)
+            total = 0
+            if min_score <= GENESIS_SCORE or self._keys is None:
+                total += self._scores.count(rank_bucket(min_score), rank_bucket(self._static_max(max_score)))
+            if self._keys is not None and max_score > GENESIS_SCORE:
+                for top, bottom, _ in self._key_segments(*self._key_range(min_score, max_score, now)):
+                    total += self._keys.count(bottom, top)
+            return total
+
+    def counts(self, score: float) -> Tuple[int, int]:
+        now = epoch_now()
+        with self._lock:
+            if self._keys is not None:
+                self._expire(now)
+            if self._keys is None or score <= GENESIS_SCORE:
+                bucket = rank_bucket(score)
+                return self._scores.prefix(bucket - 1), self._scores.count(bucket, bucket)
+            key = self._key(min(score, 5.0), now)
+            below = self._scores.size
+            for top, bottom, _ in self._key_segments(self._floor, key - 1):
+                below += self._keys.count(bottom, top)
+            equal = 0
+            for top, bottom, _ in self._key_segments(max(key, self._floor), key):
+                equal += self._keys.count(bottom, top)
+            return below, equal
+
+    def descending(self, limit: int, max_score: float = 5.0, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        now = epoch_now()
+        results: List[Tuple[str, float]] = []
+        with self._lock:
+            if self._keys is not None:
+                self._expire(now)
+            if self._keys is not None and max_score > GENESIS_SCORE:
+                for top, bottom, offset in self._key_segments(*self._key_range(min_score, max_score, now)):
+                    for position, members in self._keys.descending(top, bottom):
+                        if len(results) >= limit:
+                            return results
+                        midpoint = (offset + position + 0.5) * self._key_width
+                        score = round(GENESIS_SCORE + math.exp(self.rate * (midpoint - now)), 4)
+                        results.extend((node_id, score) for node_id in islice(members, limit - len(results)))
+            if min_score <= GENESIS_SCORE or self._keys is None:
+                for bucket, members in self._scores.descending(
+                    rank_bucket(self._static_max(max_score)), rank_bucket(min_score)
+                ):
+                    if len(results) >= limit:
+                        break
+                    score = bucket / RANK_RESOLUTION
+                    results.extend((node_id, score) for node_id in islice(members, limit - len(results)))
+        return results
+
+
+class RankIndexes:
+    # Skills past RANK_MAX_SKILL_INDEXES are not ranked; asking for them is a 422 rather than an empty ranking.
+    def __init__(self, max_skill_indexes: Optional[int] = None) -> None:
+        self._lock = threading.Lock()
+        self.global_index = ScoreRankIndex()
+        self.by_skill: Dict[str, ScoreRankIndex] = {}
+        self.max_skill_indexes = RANK_MAX_SKILL_INDEXES if max_skill_indexes is None else max_skill_indexes
+        self.unranked: Set[str] = set()
+
+    def index(self, skill_id: Optional[str] = None) -> Optional[ScoreRankIndex]:
+        if skill_id is None:
+            return self.global_index
+        if skill_id in self.unranked:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Skill {skill_id} is not ranked (limit of {self.max_skill_indexes} skill indexes reached)",
+            )
+        return self.by_skill.get(skill_id)
+
+    def _skill_index(self, skill_id: str) -> Optional[ScoreRankIndex]:
+        index = self.by_skill.get(skill_id)
+        if index is None and skill_id not in self.unranked:
+            with self._lock:
+                index = self.by_skill.get(skill_id)
+                if index is None:
+                    if len(self.by_skill) < self.max_skill_indexes:
+                        index = self.by_skill[skill_id] = ScoreRankIndex()
+                    else:
+                        self.unranked.add(skill_id)
+        return index
+
+    def _indexes(self, node: NodeCRI) -> List[ScoreRankIndex]:
+        indexes = [self.global_index]
+        for skill_id in node.capabilities:
+            index = self._skill_index(skill_id)
+            if index is not None:
+                indexes.append(index)
+        return indexes
+
+    def add_node(self, node: NodeCRI) -> None:
+        for index in self._indexes(node):
+            index.add(node.node_id, node.current_score, node.last_active)
+
+    def add_capability(self, node: NodeCRI, skill_id: str) -> None:
+        index = self._skill_index(skill_id)
+        if index is not None:
+            index.add(node.node_id, node.current_score, node.last_active)
+
+    def move(self, node: NodeCRI, old_score: float, old_epoch: int) -> None:
+        for index in self._indexes(node):
+            index.move(node.node_id, old_score, old_epoch, node.current_score, node.last_active)
+
+
+RANK_INDEXES = RankIndexes()
+
+
+class TrustEngine:
+    # EigenTrust over the buyer -> seller graph: t = (1 - alpha) * C^T t + alpha * p, where C holds the
+    # row-normalised positive local trust (satisfied minus unsatisfied transactions) and p the pre-trust.
+    def __init__(
+        self,
+        alpha: Optional[float] = None,
+        tolerance: Optional[float] = None,
+        max_iterations: Optional[int] = None,
+        pretrusted: Optional[List[str]] = None,
+    ) -> None:
+        self.alpha = TRUST_ALPHA if alpha is None else alpha
+        self.tolerance = TRUST_TOLERANCE if tolerance is None else tolerance
+        self.max_iterations = max_iterations or TRUST_MAX_ITERATIONS
+        self.pretrusted = list(TRUST_PRETRUSTED if pretrusted is None else pretrusted)
+        self._lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._edges: Dict[Tuple[int, int], int] = {}
+        self._sources = array("i")
+        self._targets = array("i")
+        self._weights = array("d")
+        self.vector = np.zeros(0)
+        self.version = 0
+        self.computed_version = 0
+        self.last_run: Dict[str, Any] = {}
+
+    def _node(self, node_id: str) -> int:
+        index = self._index.get(node_id)
+        if index is None:
+            index = self._index[node_id] = len(self._names)
+            self._names.append(node_id)
+        return index
+
+    def record(self, buyer_id: str, seller_id: str, satisfied: bool) -> None:
+        if buyer_id == seller_id:
+            return
+        with self._lock:
+            edge = (self._node(buyer_id), self._node(seller_id))
+            position = self._edges.get(edge)
+            if position is None:
+                position = self._edges[edge] = len(self._weights)
+                self._sources.append(edge[0])
+                self._targets.append(edge[1])
+                self._weights.append(0.0)
+            self._weights[position] += 1.0 if satisfied else -1.0
+            self.version += 1
+
+    def trust_of(self, node_id: str) -> Optional[float]:
+        index = self._index.get(node_id)
+        vector = self.vector
+        if index is None or index >= len(vector):
+            return None
+        return round(float(vector[index]) * len(vector), 4)
+
+    def _pretrust(self, size: int) -> np.ndarray:
+        pretrust = np.zeros(size)
+        members = [self._index[node_id] for node_id in self.pretrusted if node_id in self._index]
+        if members:
+            pretrust[members] = 1.0 / len(members)
+        elif size:
+            pretrust[:] = 1.0 / size
+        return pretrust
+
+    def compute(self, warm_start: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            if warm_start and self.version == self.computed_version and self.last_run:
+                return self.last_run
+            version = self.version
+            size = len(self._names)
+            sources = np.array(self._sources, dtype=np.int64)
+            targets = np.array(self._targets, dtype=np.int64)
+            weights = np.array(self._weights)
+            pretrust = self._pretrust(size)
+            previous = self.vector
+
+        started = time.perf_counter()
+        live = weights > 0
+        sources, targets, weights = sources[live], targets[live], weights[live]
+        out_weight = np.bincount(sources, weights=weights, minlength=size)
+        values = weights / out_weight[sources]
+        dangling = out_weight == 0
+
+        if warm_start and len(previous):
+            trust = np.concatenate([previous, pretrust[len(previous):]])
+            trust /= trust.sum()
+        else:
+            trust = pretrust.copy()
+
+        residual = 0.0
+        iterations = 0
+        for iterations in range(1, self.max_iterations + 1 if size else 1):
+            # Sparse C^T t as a weighted bincount; dangling rows fall back to the pre-trust vector.
+            spread = np.bincount(targets, weights=values * trust[sources], minlength=size)
+            spread += trust[dangling].sum() * pretrust
+            updated = (1.0 - self.alpha) * spread + self.alpha * pretrust
+            residual = float(np.abs(updated - trust).sum())
+            trust = updated
+            if residual < self.tolerance:
+                break
+
+        run = {
+            "nodes": size,
+            "edges": int(live.sum()),
+            "iterations": iterations,
+            "residual": residual,
+            "warm_start": bool(warm_start and len(previous)),
+            "seconds": round(time.perf_counter() - started, 4),
+            "computed_at": iso_from_epoch(epoch_now()),
+        }
+        with self._lock:
+            self.vector = trust
+            self.computed_version = version
+            self.last_run = run
+        return run
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "nodes": list(self._names),
+                "sources": self._sources.tolist(),
+                "targets": self._targets.tolist(),
+                "weights": self._weights.tolist(),
+            }
+
+    def load_state(self, state: Dict[str, Any]) -> None:
+        with self._lock:
+            self._names = list(state["nodes"])
+            self._index = {node_id: index for index, node_id in enumerate(self._names)}
+            self._sources = array("i", state["sources"])
+            self._targets = array("i", state["targets"])
+            self._weights = array("d", state["weights"])
+            self._edges = {edge: position for position, edge in enumerate(zip(self._sources, self._targets))}
+            self.version += 1
+
+
+TRUST_ENGINE = TrustEngine()
+
+
+class EventLog:
+    # Append-only NDJSON segments named after the first sequence number they hold.
+    def __init__(self, directory: str, segment_events: Optional[int] = None) -> None:
+        self.directory = directory
+        self.segment_events = segment_events or EVENT_SEGMENT_EVENTS
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file: Optional[Any] = None
+        self._segment_size = 0
+        self.last_seq = self._scan_last_seq()
+
+    def segments(self) -> List[Tuple[int, str]]:
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith("events-") and name.endswith(".ndjson"):
+                found.append((int(name[7:-7]), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def _scan_last_seq(self) -> int:
+        segments = self.segments()
+        if not segments:
+            return 0
+        first_seq, path = segments[-1]
+        with open(path, "rb") as segment:
+            segment.seek(0, os.SEEK_END)
+            segment.seek(max(0, segment.tell() - 65536))
+            tail = segment.read().splitlines()
+        for line in reversed(tail):
+            try:
+                return int(json.loads(line)[0])
+            except (ValueError, IndexError, TypeError):
+                continue
+        return first_seq - 1
+
+    def _read_segment(self, path: str) -> Iterator[Tuple[int, int, TransactionEvent]]:
+        with open(path, "r", encoding="utf-8") as segment:
+            for line in segment:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write.
+                    break
+                seq, timestamp, node_id, transaction_id, success, skill_id, validation, calibration, score = record[:9]
+                yield seq, timestamp, TransactionEvent.model_construct(
+                    node_id=node_id,
+                    transaction_id=transaction_id,
+                    success=success,
+                    skill_id=skill_id,
+                    validation_passed=validation,
+                    calibration_test=calibration,
+                    test_score=score,
+                    buyer_node_id=record[9] if len(record) > 9 else None,
+                )
+
+    def append(self, event: TransactionEvent, timestamp: int) -> int:
+        with self._lock:
+            seq = self.last_seq + 1
+            if self._file is None or self._segment_size >= self.segment_events:
+                self._roll(seq)
+            record = [
+                seq,
+                timestamp,
+                event.node_id,
+                event.transaction_id,
+                event.success,
+                event.skill_id,
+                event.validation_passed,
+                event.calibration_test,
+                event.test_score,
+                event.buyer_node_id,
+            ]
+            self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+            self._file.flush()
+            self._segment_size += 1
+            self.last_seq = seq
+            return seq
+
+    def _roll(self, first_seq: int) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"events-{first_seq:012d}.ndjson")
+        self._file = open(path, "a", encoding="utf-8")
+        self._segment_size = 0
+
+    def read(self, after_seq: int = 0) -> Iterator[Tuple[int, int, TransactionEvent]]:
+        segments = self.segments()
+        for position, (first_seq, path) in enumerate(segments):
+            if position + 1 < len(segments) and segments[position + 1][0] <= after_seq + 1:
+                continue
+            for seq, timestamp, event in self._read_segment(path):
+                if seq > after_seq:
+                    yield seq, timestamp, event
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SnapshotStore:
+    def __init__(self, directory: str, keep: int = 2) -> None:
+        self.directory = directory
+        self.keep = keep
+        self.last_seq = 0
+        self.writing = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def snapshots(self) -> List[Tuple[int, str]]:
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith("snapshot-") and name.endswith(".json"):
+                found.append((int(name[9:-5]), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        snapshots = self.snapshots()
+        if not snapshots:
+            return None
+        with open(snapshots[-1][1], "r", encoding="utf-8") as snapshot:
+            return json.load(snapshot)
+
+    def write(self, payload: Dict[str, Any]) -> None:
+        path = os.path.join(self.directory, f"snapshot-{payload['seq']:012d}.json")
+        with open(path + ".tmp", "w", encoding="utf-8") as snapshot:
+            json.dump(payload, snapshot, separators=(",", ":"))
+        os.replace(path + ".tmp", path)
+        for _, old_path in self.snapshots()[:-self.keep]:
+            os.remove(old_path)
+
+
+EVENT_LOG: Optional[EventLog] = EventLog(storage_directory()) if EVENT_LOG_DIR else None
+SNAPSHOTS: Optional[SnapshotStore] = SnapshotStore(storage_directory()) if EVENT_LOG_DIR else None
+
+
+def open_storage() -> None:
+    # Shard workers learn their index after import, so they reopen storage under their own directory.
+    global HISTORY_STORE, EVENT_LOG, SNAPSHOTS
+    HISTORY_STORE = HistorySegmentStore()
+    if EVENT_LOG_DIR:
+        EVENT_LOG = EventLog(storage_directory())
+        SNAPSHOTS = SnapshotStore(storage_directory())
+
+
+class Replicator:
+    # Active-active replication: local writes raise this replica's lanes and mark the node dirty for every
+    # peer; a background loop POSTs the dirty nodes' counters to each peer, which merges them.
+    def __init__(self, replica_id: str, peers: List[str]) -> None:
+        self.replica_id = replica_id
+        self.peers = list(peers)
+        self._lock = threading.Lock()
+        self._dirty: Dict[str, Set[str]] = {peer: set() for peer in self.peers}
+        self._client: Optional[httpx.AsyncClient] = None
+        self.merged = 0
+
+    def counters(self, node: NodeCRI) -> ReplicaCounters:
+        if node.replica is None:
+            node.replica = ReplicaCounters.seeded(node)
+        return node.replica
+
+    def mark(self, node_id: str) -> None:
+        with self._lock:
+            for dirty in self._dirty.values():
+                dirty.add(node_id)
+
+    def pending(self) -> Dict[str, int]:
+        with self._lock:
+            return {peer: len(dirty) for peer, dirty in self._dirty.items()}
+
+    def record_local(
+        self,
+        node: NodeCRI,
+        event: TransactionEvent,
+        event_type: EventKind,
+        new_score: float,
+        now: int,
+    ) -> float:
+        # Callers hold the shard lock and call this before the node's own counters change. The lanes take
+        # the step to the per-event clamped score, not the raw score_delta, so a node pinned at a bound
+        # moves exactly as it would without replication.
+        counters = self.counters(node)
+        lane = self.replica_id
+        if event.calibration_test and event.test_score is not None:
+            counters.calibration[event.skill_id] = [now, lane, event.test_score]
+        else:
+            counters.total[lane] = counters.total.get(lane, 0) + 1
+            outcome = counters.successful if event_type == EventKind.TRANSACTION and event.success else counters.failed
+            outcome[lane] = outcome.get(lane, 0) + 1
+        counters.add_delta(lane, new_score - counters.unclamped(now), now)
+        self.mark(node.node_id)
+        return counters.score(now)
+
+    def delta(self, node_ids: Set[str]) -> Dict[str, Any]:
+        nodes: Dict[str, Any] = {}
+        for node_id in node_ids:
+            shard = NODE_REGISTRY.shard_for(node_id)
+            with shard.lock:
+                node = shard.nodes.get(node_id)
+                if node is not None:
+                    nodes[node_id] = {
+                        **self.counters(node).state(),
+                        "capabilities": node.capabilities,
+                        "last_active": node.last_active,
+                        "created_at": node.created_at,
+                    }
+        return {"replica_id": self.replica_id, "nodes": nodes}
+
+    def merge_node(self, node_id: str, state: Dict[str, Any]) -> bool:
+        shard = NODE_REGISTRY.shard_for(node_id)
+        with shard.lock:
+            node = NODE_REGISTRY.get(node_id)
+            if node is None:
+                # Stamp a node first seen here with the sender's times, not the moment it arrived.
+                node = register_node(create_genesis_node(node_id, now=state["created_at"]))
+            counters = self.counters(node)
+            if not counters.merge(state) and state["last_active"] <= node.last_active:
+                return False
+
+            stored_score, stored_epoch = node.current_score, node.last_active
+            node.last_active = max(node.last_active, state["last_active"])
+            node.created_at = min(node.created_at, state["created_at"])
+            added = sum(counters.total.values()) - node.total_transactions
+            node.total_transactions = sum(counters.total.values())
+            node.successful_transactions = sum(counters.successful.values())
+            node.failed_transactions = sum(counters.failed.values())
+            for skill_id, (_, _, score) in counters.calibration.items():
+                node.set_calibration_score(skill_id, score)
+            node.current_score = counters.score(node.last_active)
+            RANK_INDEXES.move(node, stored_score, stored_epoch)
+            for skill_id in state["capabilities"]:
+                if not node.has_capability(skill_id):
+                    node.add_capability(skill_id)
+                    RANK_INDEXES.add_capability(node, skill_id)
+            node.record_rollups(node.last_active, node.current_score)
+            REGISTRY_STATS.record_update(
+                node_id=node_id,
+                old_score=stored_score,
+                old_epoch=stored_epoch,
+                new_score=node.current_score,
+                last_active=node.last_active,
+                transaction=False,
+                calibration=False,
+            )
+            REGISTRY_STATS.add_transactions(added)
+        self.mark(node_id)
+        return True
+
+    def receive(self, payload: Dict[str, Any]) -> int:
+        merged = sum(1 for node_id, state in payload["nodes"].items() if self.merge_node(node_id, state))
+        self.merged += merged
+        maybe_trim_rollups()
+        return merged
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=ROUTER_TIMEOUT_SECONDS)
+        return self._client
+
+    async def push(self) -> Dict[str, int]:
+        sent: Dict[str, int] = {}
+        for peer in self.peers:
+            with self._lock:
+                node_ids, self._dirty[peer] = self._dirty[peer], set()
+            if not node_ids:
+                continue
+            try:
+                response = await self.client().post(f"{peer}/v1/replication/delta", json=self.delta(node_ids))
+                response.raise_for_status()
+                sent[peer] = len(node_ids)
+            except httpx.HTTPError:
+                with self._lock:
+                    self._dirty[peer] |= node_ids
+        return sent
+
+    async def bootstrap(self) -> int:
+        # Pull every peer's full state before serving, so this replica's own lanes resume where they were.
+        merged = 0
+        for peer in self.peers:
+            try:
+                response = await self.client().get(f"{peer}/v1/replication/state")
+                response.raise_for_status()
+            except httpx.HTTPError:
+                continue
+            merged += self.receive(response.json())
+        return merged
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(REPLICATION_INTERVAL_SECONDS)
+            await self.push()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+
+REPLICATOR: Optional[Replicator] = Replicator(REPLICA_ID, REPLICA_PEERS) if REPLICA_ID else None
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class CertificateAuthority:
+    # RS256 JWTs cached per node and score version; a certificate is re-signed only when the score changed
+    # or its expiry is within CERT_REFRESH_SECONDS.
+    def __init__(self, key_path: Optional[str] = None, max_entries: Optional[int] = None) -> None:
+        self.key_path = CERT_PRIVATE_KEY_PATH if key_path is None else key_path
+        self.max_entries = max_entries or CERT_CACHE_ENTRIES
+        self._lock = threading.Lock()
+        self._key: Optional[rsa.RSAPrivateKey] = None
+        self._key_id = ""
+        self._cache: "OrderedDict[str, Tuple[Any, int, Dict[str, Any]]]" = OrderedDict()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self.signed = 0
+
+    def key(self) -> rsa.RSAPrivateKey:
+        if self._key is None:
+            with self._lock:
+                if self._key is None:
+                    if self.key_path:
+                        with open(self.key_path, "rb") as pem:
+                            key = serialization.load_pem_private_key(pem.read(), password=None)
+                    else:
+                        # Ephemeral key: certificates only verify against this process's JWKS.
+                        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+                    public_der = key.public_key().public_bytes(
+                        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+                    )
+                    self._key_id = hashlib.sha256(public_der).hexdigest()[:16]
+                    self._key = key
+        return self._key
+
+    def jwks(self) -> Dict[str, Any]:
+        numbers = self.key().public_key().public_numbers()
+        return {
+            "keys": [
+                {
+                    "kty": "RSA",
+                    "use": "sig",
+                    "alg": "RS256",
+                    "kid": self._key_id,
+                    "n": b64url(numbers.n.to_bytes((numbers.n.bit_length() + 7) // 8, "big")),
+                    "e": b64url(numbers.e.to_bytes((numbers.e.bit_length() + 7) // 8, "big")),
+                }
+            ]
+        }
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        key = self.key()
+        header = {"alg": "RS256", "typ": "JWT", "kid": self._key_id}
+        signing_input = ".".join(
+            b64url(json.dumps(part, separators=(",", ":")).encode("utf-8")) for part in (header, claims)
+        )
+        signature = key.sign(signing_input.encode("ascii"), padding.PKCS1v15(), hashes.SHA256())
+        return f"{signing_input}.{b64url(signature)}"
+
+    def _version(self, node_id: str) -> Any:
+        node = NODE_REGISTRY.get(node_id)
+        return None if node is None else (node.current_score, node.last_active)
+
+    def _cached(self, node_id: str, version: Any, now: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(node_id)
+            if entry is None or entry[0] != version or entry[1] - now <= CERT_REFRESH_SECONDS:
+                return None
+            self._cache.move_to_end(node_id)
+            return entry[2]
+
+    def _issue(self, node_id: str, version: Any, now: int) -> Dict[str, Any]:
+        expires_at = now + CERT_TTL_SECONDS
+        claims = {
+            "iss": CERT_ISSUER,
+            "sub": node_id,
+            "iat": now,
+            "exp": expires_at,
+            "ver": None if version is None else f"{version[1]}:{version[0]}",
+            "cri": get_cri(node_id).model_dump(exclude={"node_id"}),
+        }
+        certificate = {"node_id": node_id, "certificate": self.sign(claims), "expires_at": iso_from_epoch(expires_at)}
+        with self._lock:
+            self.signed += 1
+            self._cache[node_id] = (version, expires_at, certificate)
+            self._cache.move_to_end(node_id)
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return certificate
+
+    def certificate(self, node_id: str) -> Dict[str, Any]:
+        now = epoch_now()
+        version = self._version(node_id)
+        return self._cached(node_id, version, now) or self._issue(node_id, version, now)
+
+    def certificates(self, node_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        now = epoch_now()
+        issued: Dict[str, Dict[str, Any]] = {}
+        stale: List[Tuple[str, Any]] = []
+        for node_id in dict.fromkeys(node_ids):
+            version = self._version(node_id)
+            cached = self._cached(node_id, version, now)
+            if cached is not None:
+                issued[node_id] = cached
+            else:
+                stale.append((node_id, version))
+        if stale:
+            self.key()
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=CERT_SIGNING_WORKERS, thread_name_prefix="cri-sign")
+            signed = self._pool.map(lambda item: self._issue(item[0], item[1], now), stale)
+            issued.update(zip((node_id for node_id, _ in stale), signed))
+        return {node_id: issued[node_id] for node_id in node_ids}
+
+
+CERTIFICATES = CertificateAuthority()
+
+
+def register_node(node: NodeCRI) -> NodeCRI:
+    NODE_REGISTRY[node.node_id] = node
+    REGISTRY_STATS.add_node(node)
+    ROLLUP_BUDGET.add(node.rollup_bytes())
+    RANK_INDEXES.add_node(node)
+    return node
+
+
+def get_or_register_node(node_id: str) -> NodeCRI:
+    # Callers hold the shard lock for node_id.
+    node = NODE_REGISTRY.get(node_id)
+    if node is None:
+        node = register_node(create_genesis_node(node_id))
+    return node
 
 
 def utc_now() -> str:
@@ -81,81 +1941,46 @@ def clamp_score(score: float) -> float:
     return max(0.0, min(score, 5.0))
 
 
-def create_genesis_node(node_id: str, now: Optional[str] = None) -> NodeCRI:
-    timestamp = now or utc_now()
-    return NodeCRI(
-        node_id=node_id,
-        current_score=GENESIS_SCORE,
-        total_transactions=0,
-        successful_transactions=0,
-        failed_transactions=0,
-        success_rate=0.0,
-        last_active=timestamp,
-        capabilities=[],
-        calibration_scores={},
-        history=[],
-        created_at=timestamp,
-    )
+def create_genesis_node(node_id: str, now: Optional[int] = None) -> NodeCRI:
+    timestamp = now or epoch_now()
+    return NodeCRI(node_id=node_id, current_score=GENESIS_SCORE, last_active=timestamp, created_at=timestamp)
+
+
+GENESIS_TEMPLATE = NodeCRI(node_id="", current_score=GENESIS_SCORE)
+
+
+def score_delta(event_type: EventKind, success: bool = True, test_score: Optional[float] = None) -> float:
+    if event_type == EventKind.TRANSACTION:
+        return 0.05 if success else -0.20
+    if event_type == EventKind.TIMEOUT:
+        return -0.30
+    if event_type == EventKind.CALIBRATION and test_score is not None:
+        return min(0.05 + (test_score * 0.10), 0.15)
+    return 0.0
 
 
 def calculate_cri_update(
     old_score: float,
-    event_type: str,
+    event_type: EventKind,
     success: bool = True,
     test_score: Optional[float] = None,
 ) -> Tuple[float, float]:
-    if event_type == "transaction":
-        delta = 0.05 if success else -0.20
-    elif event_type == "timeout":
-        delta = -0.30
-    elif event_type == "calibration":
-        if test_score is None:
-            delta = 0.0
-        else:
-            delta = min(0.05 + (test_score * 0.10), 0.15)
-    else:
-        delta = 0.0
-
-    new_score = clamp_score(old_score + delta)
+    new_score = clamp_score(old_score + score_delta(event_type, success, test_score))
     return round(new_score, 4), round(new_score - old_score, 4)
 
 
-def event_type_for(event: TransactionEvent) -> str:
+def event_type_for(event: TransactionEvent) -> EventKind:
     if event.calibration_test:
-        return "calibration"
+        return EventKind.CALIBRATION
     if event.success:
-        return "transaction"
+        return EventKind.TRANSACTION
     if event.validation_passed is False:
-        return "transaction"
-    return "timeout"
-
-
-def update_success_rate(node: NodeCRI) -> None:
-    if node.total_transactions > 0:
-        node.success_rate = node.successful_transactions / node.total_transactions
-    else:
-        node.success_rate = 0.0
-
-
-def history_reason(event: TransactionEvent, event_type: str) -> str:
-    if event_type == "calibration":
-        if event.test_score is None:
-            return f"Calibration test for {event.skill_id}"
-        return f"Calibration test for {event.skill_id} (score={event.test_score:.2f})"
-    if event_type == "timeout":
-        return f"Timeout during {event.skill_id} transaction"
-    if event.success:
-        return f"Successful {event.skill_id} transaction"
-    return f"Failed {event.skill_id} transaction (validation failed)"
+        return EventKind.TRANSACTION
+    return EventKind.TIMEOUT
 
 
 def calibration_tests_count() -> int:
-    total = 0
-    for node in NODE_REGISTRY.values():
-        for entry in node.history:
-            if entry.reason.startswith("Calibration test"):
-                total += 1
-    return total
+    return REGISTRY_STATS.calibration_tests
 
 
 def initialize_test_data() -> None:
@@ -170,25 +1995,25 @@ def initialize_test_data() -> None:
         total_transactions=150,
         successful_transactions=142,
         failed_transactions=8,
-        success_rate=142 / 150,
-        last_active=(now - timedelta(minutes=30)).replace(microsecond=0).isoformat() + "Z",
+        last_active=epoch_from_datetime(now - timedelta(minutes=30)),
         capabilities=["csv_parser", "pdf_reader", "sentiment_analyzer"],
         calibration_scores={
             "csv_parser": 0.95,
             "pdf_reader": 0.88,
             "sentiment_analyzer": 0.92,
         },
-        history=[
-            CRIHistoryEntry(
-                timestamp=(now - timedelta(days=1)).replace(microsecond=0).isoformat() + "Z",
-                old_score=4.1,
-                new_score=4.2,
-                change=0.1,
-                reason="Successful csv_parser transaction",
-                transaction_id="tx_001",
-            )
-        ],
-        created_at=(now - timedelta(days=30)).replace(microsecond=0).isoformat() + "Z",
+        created_at=epoch_from_datetime(now - timedelta(days=30)),
+    )
+    node_alpha.ensure_history().append(
+        timestamp=epoch_from_datetime(now - timedelta(days=1)),
+        old_score=4.1,
+        new_score=4.2,
+        change=0.1,
+        kind=EventKind.TRANSACTION,
+        success=True,
+        skill_id="csv_parser",
+        test_score=None,
+        transaction_id="tx_001",
     )
 
     node_beta = NodeCRI(
@@ -197,36 +2022,45 @@ def initialize_test_data() -> None:
         total_transactions=45,
         successful_transactions=38,
         failed_transactions=7,
-        success_rate=38 / 45,
-        last_active=(now - timedelta(hours=2)).replace(microsecond=0).isoformat() + "Z",
+        last_active=epoch_from_datetime(now - timedelta(hours=2)),
         capabilities=["google_search", "code_reviewer"],
         calibration_scores={"google_search": 0.75, "code_reviewer": 0.82},
-        history=[],
-        created_at=(now - timedelta(days=15)).replace(microsecond=0).isoformat() + "Z",
+        created_at=epoch_from_datetime(now - timedelta(days=15)),
     )
 
-    node_gamma = NodeCRI(
-        node_id="node_gamma_789",
-        current_score=1.0,
-        total_transactions=0,
-        successful_transactions=0,
-        failed_transactions=0,
-        success_rate=0.0,
-        last_active=now.replace(microsecond=0).isoformat() + "Z",
-        capabilities=[],
-        calibration_scores={},
-        history=[],
-        created_at=now.replace(microsecond=0).isoformat() + "Z",
-    )
+    node_gamma = create_genesis_node("node_gamma_789", now=epoch_from_datetime(now))
 
-    NODE_REGISTRY[node_alpha.node_id] = node_alpha
-    NODE_REGISTRY[node_beta.node_id] = node_beta
-    NODE_REGISTRY[node_gamma.node_id] = node_gamma
+    for node in (node_alpha, node_beta, node_gamma):
+        if owns_node(node.node_id):
+            register_node(node)
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    initialize_test_data()
+    if EVENT_LOG is not None:
+        restore_state()
+    else:
+        initialize_test_data()
+    if trust_enabled():
+        asyncio.get_running_loop().create_task(refresh_trust())
+    if REPLICATOR is not None:
+        await REPLICATOR.bootstrap()
+        asyncio.get_running_loop().create_task(REPLICATOR.run())
+
+
+async def refresh_trust() -> None:
+    while True:
+        await asyncio.sleep(TRUST_INTERVAL_SECONDS)
+        await asyncio.to_thread(TRUST_ENGINE.compute)
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    HISTORY_STORE.flush()
+    if EVENT_LOG is not None:
+        EVENT_LOG.close()
+    if REPLICATOR is not None:
+        await REPLICATOR.close()
 
 
 @app.get("/health")
@@ -245,40 +2079,183 @@ def health() -> Dict[str, Any]:
 def get_cri(node_id: str) -> CRIResponse:
     node = NODE_REGISTRY.get(node_id)
     if node is None:
-        node = create_genesis_node(node_id)
+        return CRIResponse(
+            node_id=node_id,
+            cri_score=GENESIS_SCORE,
+            total_transactions=0,
+            success_rate=0.0,
+            last_active=utc_now(),
+        )
     return CRIResponse(
         node_id=node.node_id,
-        cri_score=round(node.current_score, 4),
+        cri_score=round(node.score_at(), 4),
         total_transactions=node.total_transactions,
         success_rate=round(node.success_rate, 4),
-        last_active=node.last_active,
+        last_active=iso_from_epoch(node.last_active),
         capabilities=node.capabilities,
-        calibration_scores=node.calibration_scores,
+        calibration_scores=node.calibration_scores or {},
+        trust_score=TRUST_ENGINE.trust_of(node.node_id),
     )
 
 
+def lookup_records(node_ids: List[str], fields: List[str]) -> Dict[str, Any]:
+    unknown_fields = [field for field in fields if field not in LOOKUP_FIELDS]
+    if unknown_fields:
+        raise HTTPException(status_code=422, detail=f"Unknown fields: {', '.join(unknown_fields)}")
+
+    getters = [LOOKUP_FIELDS[field] for field in fields]
+    genesis_row: Optional[List[Any]] = None
+    records: Dict[str, List[Any]] = {}
+    unknown = 0
+    for node_id in node_ids:
+        node = NODE_REGISTRY.get(node_id)
+        if node is not None:
+            records[node_id] = [getter(node) for getter in getters]
+            continue
+        if genesis_row is None:
+            genesis_row = [getter(GENESIS_TEMPLATE) for getter in getters]
+            if "last_active" in fields:
+                genesis_row[fields.index("last_active")] = utc_now()
+        records[node_id] = genesis_row
+        unknown += 1
+    return {"fields": fields, "records": records, "unknown": unknown}
+
+
+@app.post("/v1/cri/lookup")
+def lookup_cri(request: CRILookupRequest) -> JSONResponse:
+    return JSONResponse(lookup_records(request.node_ids, request.fields))
+
+
+@app.get("/v1/cri")
+def lookup_cri_by_ids(ids: str, fields: Optional[str] = None) -> JSONResponse:
+    node_ids = [node_id for node_id in ids.split(",") if node_id]
+    if not node_ids or len(node_ids) > LOOKUP_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"Provide between 1 and {LOOKUP_MAX_IDS} ids")
+    selected = fields.split(",") if fields else list(DEFAULT_LOOKUP_FIELDS)
+    return JSONResponse(lookup_records(node_ids, selected))
+
+
+@app.get("/v1/cri/{node_id}/certificate")
+def get_cri_certificate(node_id: str) -> Dict[str, Any]:
+    return CERTIFICATES.certificate(node_id)
+
+
+@app.post("/v1/cri/certificates")
+def issue_cri_certificates(request: CRICertificateRequest) -> Dict[str, Any]:
+    return {"certificates": CERTIFICATES.certificates(request.node_ids)}
+
+
+@app.get("/.well-known/jwks.json")
+def certificate_jwks() -> Dict[str, Any]:
+    return CERTIFICATES.jwks()
+
+
 @app.get("/v1/cri/{node_id}/history", response_model=CRIHistoryResponse)
-def get_cri_history(node_id: str, limit: int = 10) -> CRIHistoryResponse:
+def get_cri_history(node_id: str, limit: int = 10, before: Optional[int] = None) -> CRIHistoryResponse:
     if limit <= 0:
         limit = 10
     if limit > 100:
         limit = 100
 
     node = NODE_REGISTRY.get(node_id)
-    if node is None:
+    if node is None or node.history is None:
         return CRIHistoryResponse(node_id=node_id, history=[], total_entries=0)
 
-    history = [asdict(entry) for entry in reversed(node.history[:])]
-    return CRIHistoryResponse(node_id=node_id, history=history[:limit], total_entries=len(node.history))
+    entries = node.history.page(before, limit)
+    next_before = entries[-1].seq if entries and entries[-1].seq > 0 else None
+    return CRIHistoryResponse(
+        node_id=node_id,
+        history=[asdict(entry) for entry in entries],
+        total_entries=len(node.history),
+        next_before=next_before,
+    )
 
 
-@app.post("/v1/cri/update")
-def update_cri(event: TransactionEvent) -> Dict[str, Any]:
-    if event.node_id not in NODE_REGISTRY:
-        NODE_REGISTRY[event.node_id] = create_genesis_node(event.node_id)
+def export_node_record(node: NodeCRI) -> Dict[str, Any]:
+    return {
+        "node_id": node.node_id,
+        "cri_score": round(node.score_at(), 4),
+        "trust_score": TRUST_ENGINE.trust_of(node.node_id),
+        "total_transactions": node.total_transactions,
+        "successful_transactions": node.successful_transactions,
+        "failed_transactions": node.failed_transactions,
+        "success_rate": round(node.success_rate, 4),
+        "last_active": iso_from_epoch(node.last_active),
+        "created_at": iso_from_epoch(node.created_at),
+        "capabilities": node.capabilities,
+        "calibration_scores": node.calibration_scores or {},
+    }
+
+
+def export_history_records(node: NodeCRI, since: int) -> Iterator[Dict[str, Any]]:
+    if node.history is None or node.last_active < since:
+        return
+    with NODE_REGISTRY.shard_for(node.node_id).lock:
+        # The hot window is copied under the lock; anything older is immutable once spilled.
+        first_hot = node.history.first_hot_seq
+        hot = [node.history.entry(seq) for seq in range(first_hot, node.history.next_seq)]
+    if first_hot > 0:
+        for entry in HISTORY_STORE.since(node.node_id, since, first_hot):
+            yield {"node_id": node.node_id, **asdict(entry)}
+    for entry in hot:
+        if node.last_active >= since and entry.timestamp >= iso_from_epoch(since):
+            yield {"node_id": node.node_id, **asdict(entry)}
+
+
+def ndjson_chunks(records: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    chunk: List[str] = []
+    for record in records:
+        chunk.append(json.dumps(record, separators=(",", ":")))
+        if len(chunk) >= EXPORT_CHUNK_RECORDS:
+            yield ("\n".join(chunk) + "\n").encode("utf-8")
+            chunk = []
+    if chunk:
+        yield ("\n".join(chunk) + "\n").encode("utf-8")
+
+
+def export_response(records: Iterator[Dict[str, Any]], next_since: int) -> StreamingResponse:
+    return StreamingResponse(
+        ndjson_chunks(records),
+        media_type="application/x-ndjson",
+        headers={"X-Next-Since": str(next_since)},
+    )
+
+
+@app.get("/v1/export/nodes")
+def export_nodes(since: int = 0) -> StreamingResponse:
+    # Nodes active at or after `since` (epoch seconds); X-Next-Since is the cursor for the next export.
+    next_since = epoch_now()
+    return export_response(
+        (export_node_record(node) for node in NODE_REGISTRY.values() if node.last_active >= since),
+        next_since,
+    )
 
-    node = NODE_REGISTRY[event.node_id]
-    old_score = node.current_score
+
+@app.get("/v1/export/history")
+def export_history(since: int = 0) -> StreamingResponse:
+    next_since = epoch_now()
+    return export_response(
+        (record for node in NODE_REGISTRY.values() for record in export_history_records(node, since)),
+        next_since,
+    )
+
+
+@app.get("/v1/cri/{node_id}/series")
+def get_cri_series(node_id: str, resolution: str = "hour", limit: Optional[int] = None) -> Dict[str, Any]:
+    if resolution not in ROLLUP_RESOLUTIONS:
+        raise HTTPException(status_code=422, detail=f"resolution must be one of: {', '.join(ROLLUP_RESOLUTIONS)}")
+    seconds, retention = ROLLUP_RESOLUTIONS[resolution]
+    limit = retention if limit is None else max(1, min(limit, retention))
+
+    node = NODE_REGISTRY.get(node_id)
+    points = node.rollups[resolution].points(limit) if node is not None and node.rollups is not None else []
+    return {"node_id": node_id, "resolution": resolution, "bucket_seconds": seconds, "points": points}
+
+
+def apply_event(node: NodeCRI, event: TransactionEvent, now: Optional[int] = None) -> Dict[str, Any]:
+    now = now or epoch_now()
+    stored_score, stored_epoch = node.current_score, node.last_active
+    old_score = node.score_at(now)
     event_type = event_type_for(event)
     new_score, change = calculate_cri_update(
         old_score=old_score,
@@ -286,32 +2263,51 @@ def update_cri(event: TransactionEvent) -> Dict[str, Any]:
         success=event.success,
         test_score=event.test_score,
     )
+    if REPLICATOR is not None:
+        new_score = REPLICATOR.record_local(node, event, event_type, new_score, now)
 
     node.current_score = new_score
-    node.last_active = utc_now()
+    node.last_active = now
+    RANK_INDEXES.move(node, stored_score, stored_epoch)
 
-    if event.skill_id and event.skill_id not in node.capabilities:
-        node.capabilities.append(event.skill_id)
+    if event.skill_id and not node.has_capability(event.skill_id):
+        node.add_capability(event.skill_id)
+        RANK_INDEXES.add_capability(node, event.skill_id)
+
+    if event.buyer_node_id and event_type != EventKind.CALIBRATION and trust_enabled():
+        TRUST_ENGINE.record(event.buyer_node_id, node.node_id, event_type == EventKind.TRANSACTION and event.success)
 
     if event.calibration_test and event.test_score is not None:
-        node.calibration_scores[event.skill_id] = event.test_score
+        node.set_calibration_score(event.skill_id, event.test_score)
     else:
         node.total_transactions += 1
-        if event_type == "transaction" and event.success:
+        if event_type == EventKind.TRANSACTION and event.success:
             node.successful_transactions += 1
         else:
             node.failed_transactions += 1
-        update_success_rate(node)
-
-    node.history.append(
-        CRIHistoryEntry(
-            timestamp=utc_now(),
-            old_score=round(old_score, 4),
-            new_score=new_score,
-            change=change,
-            reason=history_reason(event, event_type),
-            transaction_id=event.transaction_id,
-        )
+
+    seq = node.ensure_history().append(
+        timestamp=node.last_active,
+        old_score=round(old_score, 4),
+        new_score=new_score,
+        change=change,
+        kind=event_type,
+        success=event.success,
+        skill_id=event.skill_id,
+        test_score=event.test_score,
+        transaction_id=event.transaction_id,
+    )
+    node.record_rollups(node.last_active, new_score)
+    if event_type == EventKind.CALIBRATION:
+        CALIBRATION_INDEX.add(node.node_id, seq, event.skill_id)
+    REGISTRY_STATS.record_update(
+        node_id=node.node_id,
+        old_score=stored_score,
+        old_epoch=stored_epoch,
+        new_score=new_score,
+        last_active=node.last_active,
+        transaction=not (event.calibration_test and event.test_score is not None),
+        calibration=event_type == EventKind.CALIBRATION,
     )
 
     return {
@@ -324,95 +2320,726 @@ def update_cri(event: TransactionEvent) -> Dict[str, Any]:
     }
 
 
-@app.get("/v1/node/{node_id}/badge.svg", response_class=Response)
-def badge_svg(node_id: str) -> Response:
-    score = NODE_REGISTRY.get(node_id).current_score if node_id in NODE_REGISTRY else GENESIS_SCORE
+def intern_event_skills(events: List[TransactionEvent]) -> None:
+    # Runs before any lock, log append or state change, so a full skill table rejects the request cleanly.
+    for skill_id in {event.skill_id for event in events if event.skill_id}:
+        skill_code(skill_id)
+
+
+def record_event(shard: RegistryShard, node: NodeCRI, event: TransactionEvent) -> Dict[str, Any]:
+    # Callers hold shard.lock, so log order matches the order events are applied per node.
+    now = epoch_now()
+    if EVENT_LOG is not None:
+        EVENT_LOG.append(event, now)
+    delta = apply_event(node, event, now)
+    shard.processed.remember(node.node_id, event.transaction_id, delta)
+    return delta
+
+
+def capture_snapshot() -> Dict[str, Any]:
+    for shard in NODE_REGISTRY.shards:
+        shard.lock.acquire()
+    try:
+        # Spills older than the snapshot are not in the log tail any more, so they must be durable first.
+        HISTORY_STORE.flush()
+        return {
+            "seq": EVENT_LOG.last_seq if EVENT_LOG is not None else 0,
+            "taken_at": epoch_now(),
+            "nodes": [node.state() for shard in NODE_REGISTRY.shards for node in shard.nodes.values()],
+            "calibration": CALIBRATION_INDEX.state(),
+            "trust": TRUST_ENGINE.state(),
+        }
+    finally:
+        for shard in reversed(NODE_REGISTRY.shards):
+            shard.lock.release()
+
+
+def maybe_snapshot() -> None:
+    if EVENT_LOG is None or SNAPSHOTS is None or EVENT_LOG.last_seq - SNAPSHOTS.last_seq < SNAPSHOT_EVERY:
+        return
+    if not SNAPSHOTS.writing.acquire(blocking=False):
+        return
+
+    payload = capture_snapshot()
+
+    def write() -> None:
+        # last_seq only moves once the file is down, so a failed write is retried on the next update.
+        try:
+            SNAPSHOTS.write(payload)
+            SNAPSHOTS.last_seq = payload["seq"]
+        except Exception:
+            logger.exception("snapshot at seq %s failed", payload["seq"])
+        finally:
+            SNAPSHOTS.writing.release()
+
+    threading.Thread(target=write, name="cri-snapshot", daemon=True).start()
+
+
+def maybe_trim_rollups() -> None:
+    # Called without shard locks held, like maybe_snapshot; evicts oldest-active first down to 90% of budget.
+    if not ROLLUP_BUDGET.over or not ROLLUP_BUDGET.trimming.acquire(blocking=False):
+        return
+    try:
+        target = ROLLUP_BUDGET.max_bytes * 0.9
+        for _, node_id in sorted((node.last_active, node.node_id) for node in NODE_REGISTRY.values() if node.rollups):
+            if ROLLUP_BUDGET.bytes <= target:
+                break
+            shard = NODE_REGISTRY.shard_for(node_id)
+            with shard.lock:
+                node = shard.nodes.get(node_id)
+                if node is None or node.rollups is None:
+                    continue
+                ROLLUP_BUDGET.add(-node.rollup_bytes())
+                node.rollups = None
+                ROLLUP_BUDGET.evicted += 1
+    finally:
+        ROLLUP_BUDGET.trimming.release()
+
+
+def replay_events(log: EventLog, after_seq: int = 0) -> int:
+    replayed = 0
+    for _, timestamp, event in log.read(after_seq):
+        if not owns_node(event.node_id):
+            continue
+        shard = NODE_REGISTRY.shard_for(event.node_id)
+        with shard.lock:
+            node = get_or_register_node(event.node_id)
+            shard.processed.remember(node.node_id, event.transaction_id, apply_event(node, event, timestamp))
+        replayed += 1
+    return replayed
+
+
+def restore_state() -> Dict[str, int]:
+    if EVENT_LOG is None or SNAPSHOTS is None:
+        return {"snapshot_seq": 0, "replayed": 0}
+
+    snapshot = SNAPSHOTS.latest()
+    snapshot_seq = 0
+    if snapshot is not None:
+        snapshot_seq = snapshot["seq"]
+        for state in snapshot["nodes"]:
+            if owns_node(state[0]):
+                register_node(NodeCRI.from_state(state))
+        calibration = snapshot["calibration"]
+        if isinstance(calibration, list):
+            # Older snapshots carried every calibration entry in full.
+            calibration = {
+                "total": len(calibration),
+                "records": [[node_id, fields["seq"], fields["skill_id"]] for node_id, fields in calibration],
+            }
+        skipped = 0
+        for node_id, seq, skill_id in calibration["records"]:
+            if owns_node(node_id):
+                CALIBRATION_INDEX.add(node_id, seq, skill_id)
+            else:
+                skipped += 1
+        CALIBRATION_INDEX.added = calibration["total"] - skipped
+        REGISTRY_STATS.calibration_tests = CALIBRATION_INDEX.added
+        if "trust" in snapshot and trust_enabled():
+            TRUST_ENGINE.load_state(snapshot["trust"])
+    SNAPSHOTS.last_seq = snapshot_seq
+    replayed = replay_events(EVENT_LOG, snapshot_seq)
+    maybe_trim_rollups()
+    TRUST_ENGINE.compute()
+    return {"snapshot_seq": snapshot_seq, "replayed": replayed}
+
+
+@app.post("/v1/cri/update")
+def update_cri(event: TransactionEvent) -> Dict[str, Any]:
+    intern_event_skills([event])
+    shard = NODE_REGISTRY.shard_for(event.node_id)
+    with shard.lock:
+        delta = record_event(shard, get_or_register_node(event.node_id), event)
+    maybe_snapshot()
+    maybe_trim_rollups()
+    return delta
+
+
+@app.post("/v1/cri/update/batch")
+def update_cri_batch(batch: TransactionBatch) -> Dict[str, Any]:
+    intern_event_skills(batch.events)
+    events_by_node: Dict[str, List[Tuple[int, TransactionEvent]]] = {}
+    for index, event in enumerate(batch.events):
+        events_by_node.setdefault(event.node_id, []).append((index, event))
+
+    results: List[Dict[str, Any]] = [{} for _ in batch.events]
+    applied = 0
+    for node_id, node_events in events_by_node.items():
+        shard = NODE_REGISTRY.shard_for(node_id)
+        with shard.lock:
+            node = get_or_register_node(node_id)
+            for index, event in node_events:
+                delta = shard.processed.get(node_id, event.transaction_id)
+                duplicate = delta is not None
+                if delta is None:
+                    delta = record_event(shard, node, event)
+                    applied += 1
+                results[index] = {**delta, "transaction_id": event.transaction_id, "duplicate": duplicate}
+
+    maybe_snapshot()
+    maybe_trim_rollups()
+    return {
+        "results": results,
+        "applied": applied,
+        "duplicates": len(results) - applied,
+    }
+
+
+def badge_color(score: float) -> str:
     if score >= 4:
-        color = "#2da44e"
-    elif score >= 3:
-        color = "#1f6feb"
-    elif score >= 2:
-        color = "#d29922"
-    else:
-        color = "#cf222e"
+        return "#2da44e"
+    if score >= 3:
+        return "#1f6feb"
+    if score >= 2:
+        return "#d29922"
+    return "#cf222e"
+
+
+# At most 501 rendered scores x 4 colours, so the cache needs no eviction.
+BADGE_CACHE: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
 
-    score_value = f"{score:.2f}"
-    svg = f"""<svg xmlns="http://www.w3.org/2000/svg" width="180" height="20" role="img" aria-label="BotNode CRI: {score_value}">
+
+def render_badge(score_value: str, color: str) -> Tuple[bytes, str]:
+    cached = BADGE_CACHE.get((score_value, color))
+    if cached is None:
+        svg = f"""<svg xmlns="http://www.w3.org/2000/svg" width="180" height="20" role="img" aria-label="BotNode CRI: {score_value}">
 <rect width="95" height="20" fill="#555"/>
 <rect x="95" width="85" height="20" fill="{color}"/>
 <text x="48" y="14" fill="#fff" font-family="Verdana,Geneva,sans-serif" font-size="11" text-anchor="middle">BotNode CRI</text>
 <text x="137" y="14" fill="#fff" font-family="Verdana,Geneva,sans-serif" font-size="11" text-anchor="middle">{score_value}</text>
 </svg>"""
-    return Response(content=svg, media_type="image/svg+xml")
+        cached = BADGE_CACHE[(score_value, color)] = (svg.encode("utf-8"), f'"cri-{score_value}-{color[1:]}"')
+    return cached
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+@app.get("/v1/node/{node_id}/badge.svg", response_class=Response)
+def badge_svg(node_id: str, if_none_match: Optional[str] = Header(None)) -> Response:
+    node = NODE_REGISTRY.get(node_id)
+    score = node.score_at() if node is not None else GENESIS_SCORE
+    content, etag = render_badge(f"{score:.2f}", badge_color(score))
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={BADGE_MAX_AGE}, stale-while-revalidate={BADGE_MAX_AGE}"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="image/svg+xml", headers=headers)
 
 
 @app.get("/v1/calibration/tests")
-def list_calibration_tests(limit: int = 20) -> Dict[str, Any]:
+def list_calibration_tests(
+    limit: int = 20,
+    skill_id: Optional[str] = None,
+    node_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    records, total = CALIBRATION_INDEX.latest(max(1, min(limit, 100)), skill_id=skill_id, node_id=node_id)
     tests: List[Dict[str, Any]] = []
-    for node in NODE_REGISTRY.values():
-        for entry in reversed(node.history[:]):
-            if entry.reason.startswith("Calibration test"):
-                test_record = asdict(entry)
-                test_record["node_id"] = node.node_id
-                tests.append(test_record)
-    return {"tests": tests[:max(1, min(limit, 100))], "total": len(tests)}
+    for record_node_id, seq, _ in records:
+        entry = calibration_entry(record_node_id, seq)
+        if entry is not None:
+            tests.append({**asdict(entry), "node_id": record_node_id})
+    return {"tests": tests, "total": total}
+
+
+def calibration_entry(node_id: str, seq: int) -> Optional[CRIHistoryEntry]:
+    # The shard lock keeps the ring slot from being overwritten between the hot check and the read;
+    # an entry that has left the ring is already in the cold segment.
+    shard = NODE_REGISTRY.shard_for(node_id)
+    with shard.lock:
+        node = shard.nodes.get(node_id)
+        if node is None or node.history is None:
+            return None
+        if seq >= node.history.first_hot_seq:
+            return node.history.entry(seq)
+    cold = HISTORY_STORE.page(node_id, seq + 1, 1)
+    return cold[0] if cold and cold[0].seq == seq else None
+
+
+@app.get("/v1/rank/top")
+def rank_top(k: int = 10, skill_id: Optional[str] = None) -> Dict[str, Any]:
+    index = RANK_INDEXES.index(skill_id)
+    ranked = index.descending(max(1, min(k, 1000))) if index is not None else []
+    return {
+        "skill_id": skill_id,
+        "total_nodes": index.size if index is not None else 0,
+        "nodes": [
+            {"rank": position, "node_id": node_id, "cri_score": score}
+            for position, (node_id, score) in enumerate(ranked, start=1)
+        ],
+    }
+
+
+@app.get("/v1/rank/range")
+def rank_range(
+    min_score: float = 0.0,
+    max_score: float = 5.0,
+    skill_id: Optional[str] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    index = RANK_INDEXES.index(skill_id)
+    if index is None:
+        return {"skill_id": skill_id, "min_score": min_score, "max_score": max_score, "count": 0, "nodes": []}
+    ranked = index.descending(max(0, min(limit, 1000)), max_score=max_score, min_score=min_score)
+    return {
+        "skill_id": skill_id,
+        "min_score": min_score,
+        "max_score": max_score,
+        "count": index.count_between(min_score, max_score),
+        "nodes": [{"node_id": node_id, "cri_score": score} for node_id, score in ranked],
+    }
+
+
+@app.get("/v1/rank/counts")
+def rank_counts(score: float, skill_id: Optional[str] = None) -> Dict[str, Any]:
+    index = RANK_INDEXES.index(skill_id)
+    if index is None:
+        return {"below": 0, "equal": 0, "total": 0}
+    below, equal = index.counts(score)
+    return {"below": below, "equal": equal, "total": index.size}
+
+
+def percentile_rank(node_id: str, score: float, below: int, equal: int, total: int) -> Dict[str, Any]:
+    return {
+        "node_id": node_id,
+        "cri_score": round(score, 4),
+        "rank": total - below - equal + 1,
+        "total_nodes": total,
+        "percentile": round((below + 0.5 * equal) / total * 100, 2) if total else 0.0,
+    }
+
+
+@app.get("/v1/cri/{node_id}/percentile")
+def get_cri_percentile(node_id: str, skill_id: Optional[str] = None) -> Dict[str, Any]:
+    node = NODE_REGISTRY.get(node_id)
+    score = node.score_at() if node is not None else GENESIS_SCORE
+    counts = rank_counts(score, skill_id)
+    return {"skill_id": skill_id, **percentile_rank(node_id, score, counts["below"], counts["equal"], counts["total"])}
+
+
+def require_replicator() -> Replicator:
+    if REPLICATOR is None:
+        raise HTTPException(status_code=404, detail="Replication is not enabled (set CRI_REPLICA_ID)")
+    return REPLICATOR
+
+
+@app.post("/v1/replication/delta")
+def receive_replication_delta(payload: Dict[str, Any]) -> Dict[str, Any]:
+    replicator = require_replicator()
+    return {"replica_id": replicator.replica_id, "merged": replicator.receive(payload)}
+
+
+@app.get("/v1/replication/state")
+def replication_state() -> Dict[str, Any]:
+    replicator = require_replicator()
+    return replicator.delta({node.node_id for node in NODE_REGISTRY.values()})
+
+
+@app.post("/v1/replication/sync")
+async def replication_sync() -> Dict[str, Any]:
+    return {"sent": await require_replicator().push()}
+
+
+@app.get("/v1/replication/status")
+def replication_status() -> Dict[str, Any]:
+    replicator = require_replicator()
+    return {
+        "replica_id": replicator.replica_id,
+        "peers": replicator.peers,
+        "pending": replicator.pending(),
+        "merged": replicator.merged,
+    }
+
+
+@app.post("/v1/trust/recompute")
+def recompute_trust(cold: bool = False) -> Dict[str, Any]:
+    if not trust_enabled():
+        raise HTTPException(status_code=409, detail=TRUST_DISABLED_DETAIL)
+    return TRUST_ENGINE.compute(warm_start=not cold)
+
+
+@app.get("/v1/trust/status")
+def trust_status() -> Dict[str, Any]:
+    return {
+        "enabled": trust_enabled(),
+        "pending_updates": TRUST_ENGINE.version - TRUST_ENGINE.computed_version,
+        "last_run": TRUST_ENGINE.last_run or None,
+    }
 
 
 @app.get("/stats")
 def stats() -> Dict[str, Any]:
-    total_nodes = len(NODE_REGISTRY)
-    if total_nodes == 0:
-        return {
-            "total_nodes": 0,
-            "average_cri": 0.0,
-            "total_transactions": 0,
-            "active_today": 0,
-            "nodes_by_score": {
-                "excellent_4+": 0,
-                "good_3-4": 0,
-                "fair_2-3": 0,
-                "poor_1-2": 0,
-                "critical_0-1": 0,
-            },
-        }
+    return {
+        "total_nodes": REGISTRY_STATS.total_nodes,
+        "average_cri": round(REGISTRY_STATS.average_score(), 2),
+        "total_transactions": REGISTRY_STATS.total_transactions,
+        "active_today": REGISTRY_STATS.active_today(),
+        "nodes_by_score": {
+            bucket: RANK_INDEXES.global_index.count_between(*SCORE_BUCKET_RANGES[bucket]) for bucket in SCORE_BUCKETS
+        },
+    }
 
-    average_cri = sum(node.current_score for node in NODE_REGISTRY.values()) / total_nodes
-    total_transactions = sum(node.total_transactions for node in NODE_REGISTRY.values())
-    today = datetime.utcnow().date()
-    active_today = sum(
-        1 for node in NODE_REGISTRY.values() if datetime.fromisoformat(node.last_active.replace("Z", "")).date() == today
+
+router_app = FastAPI(
+    title="CRI Router",
+    description="Routes CRI requests to shard worker processes by node_id",
+    version=VERSION,
+)
+_router_client: Optional[httpx.AsyncClient] = None
+
+
+def router_client() -> httpx.AsyncClient:
+    global _router_client
+    if _router_client is None:
+        _router_client = httpx.AsyncClient(timeout=ROUTER_TIMEOUT_SECONDS)
+    return _router_client
+
+
+def shard_url(node_id: str) -> str:
+    return SHARD_URLS[shard_index(node_id, len(SHARD_URLS))]
+
+
+PROXIED_HEADERS = ("etag", "cache-control")
+
+
+def proxy_response(response: httpx.Response) -> Response:
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        media_type=response.headers.get("content-type"),
+        headers={name: response.headers[name] for name in PROXIED_HEADERS if name in response.headers},
     )
 
-    nodes_by_score = {
-        "excellent_4+": 0,
-        "good_3-4": 0,
-        "fair_2-3": 0,
-        "poor_1-2": 0,
-        "critical_0-1": 0,
+
+async def fan_out(path: str, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    responses = await asyncio.gather(*(router_client().get(f"{url}{path}", params=params) for url in SHARD_URLS))
+    return [response.json() for response in responses]
+
+
+@router_app.on_event("shutdown")
+async def router_shutdown() -> None:
+    if _router_client is not None:
+        await _router_client.aclose()
+
+
+@router_app.get("/health")
+async def router_health() -> Dict[str, Any]:
+    shards = await fan_out("/health")
+    return {
+        "status": "healthy" if all(shard.get("status") == "healthy" for shard in shards) else "degraded",
+        "service": SERVICE_NAME,
+        "version": VERSION,
+        "shards": len(shards),
+        "nodes_registered": sum(shard["nodes_registered"] for shard in shards),
+        "calibration_tests": sum(shard["calibration_tests"] for shard in shards),
+        "timestamp": utc_now(),
     }
-    for node in NODE_REGISTRY.values():
-        score = node.current_score
-        if score >= 4:
-            nodes_by_score["excellent_4+"] += 1
-        elif score >= 3:
-            nodes_by_score["good_3-4"] += 1
-        elif score >= 2:
-            nodes_by_score["fair_2-3"] += 1
-        elif score >= 1:
-            nodes_by_score["poor_1-2"] += 1
-        else:
-            nodes_by_score["critical_0-1"] += 1
 
+
+@router_app.get("/v1/cri/{node_id}")
+async def router_get_cri(node_id: str) -> Response:
+    return proxy_response(await router_client().get(f"{shard_url(node_id)}/v1/cri/{node_id}"))
+
+
+async def router_lookup(node_ids: List[str], fields: List[str]) -> Dict[str, Any]:
+    ids_by_url: Dict[str, List[str]] = {}
+    for node_id in node_ids:
+        ids_by_url.setdefault(shard_url(node_id), []).append(node_id)
+
+    responses = await asyncio.gather(
+        *(
+            router_client().post(f"{url}/v1/cri/lookup", json={"node_ids": ids, "fields": fields})
+            for url, ids in ids_by_url.items()
+        )
+    )
+    records: Dict[str, List[Any]] = {}
+    unknown = 0
+    for response in responses:
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.json().get("detail"))
+        body = response.json()
+        records.update(body["records"])
+        unknown += body["unknown"]
+    return {"fields": fields, "records": {node_id: records[node_id] for node_id in node_ids}, "unknown": unknown}
+
+
+@router_app.post("/v1/cri/lookup")
+async def router_lookup_cri(request: CRILookupRequest) -> JSONResponse:
+    return JSONResponse(await router_lookup(request.node_ids, request.fields))
+
+
+@router_app.get("/v1/cri")
+async def router_lookup_cri_by_ids(ids: str, fields: Optional[str] = None) -> JSONResponse:
+    node_ids = [node_id for node_id in ids.split(",") if node_id]
+    if not node_ids or len(node_ids) > LOOKUP_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"Provide between 1 and {LOOKUP_MAX_IDS} ids")
+    selected = fields.split(",") if fields else list(DEFAULT_LOOKUP_FIELDS)
+    return JSONResponse(await router_lookup(node_ids, selected))
+
+
+@router_app.get("/v1/cri/{node_id}/certificate")
+async def router_get_cri_certificate(node_id: str) -> Response:
+    return proxy_response(await router_client().get(f"{shard_url(node_id)}/v1/cri/{node_id}/certificate"))
+
+
+@router_app.post("/v1/cri/certificates")
+async def router_issue_cri_certificates(request: CRICertificateRequest) -> Dict[str, Any]:
+    ids_by_url: Dict[str, List[str]] = {}
+    for node_id in request.node_ids:
+        ids_by_url.setdefault(shard_url(node_id), []).append(node_id)
+    responses = await asyncio.gather(
+        *(router_client().post(f"{url}/v1/cri/certificates", json={"node_ids": ids}) for url, ids in ids_by_url.items())
+    )
+    certificates: Dict[str, Any] = {}
+    for response in responses:
+        response.raise_for_status()
+        certificates.update(response.json()["certificates"])
+    return {"certificates": {node_id: certificates[node_id] for node_id in request.node_ids}}
+
+
+@router_app.get("/.well-known/jwks.json")
+async def router_certificate_jwks() -> Response:
+    # Shards must share CRI_CERT_PRIVATE_KEY_PATH for this key set to verify every shard's certificates.
+    return proxy_response(await router_client().get(f"{SHARD_URLS[0]}/.well-known/jwks.json"))
+
+
+@router_app.get("/v1/cri/{node_id}/history")
+async def router_get_cri_history(node_id: str, request: Request) -> Response:
+    url = f"{shard_url(node_id)}/v1/cri/{node_id}/history"
+    return proxy_response(await router_client().get(url, params=request.query_params))
+
+
+@router_app.get("/v1/cri/{node_id}/series")
+async def router_get_cri_series(node_id: str, request: Request) -> Response:
+    url = f"{shard_url(node_id)}/v1/cri/{node_id}/series"
+    return proxy_response(await router_client().get(url, params=request.query_params))
+
+
+@router_app.post("/v1/cri/update")
+async def router_update_cri(event: TransactionEvent) -> Response:
+    url = f"{shard_url(event.node_id)}/v1/cri/update"
+    return proxy_response(await router_client().post(url, json=event.model_dump()))
+
+
+@router_app.post("/v1/cri/update/batch")
+async def router_update_cri_batch(batch: TransactionBatch) -> Dict[str, Any]:
+    positions_by_url: Dict[str, List[int]] = {}
+    for index, event in enumerate(batch.events):
+        positions_by_url.setdefault(shard_url(event.node_id), []).append(index)
+
+    urls = list(positions_by_url)
+    responses = await asyncio.gather(
+        *(
+            router_client().post(
+                f"{url}/v1/cri/update/batch",
+                json={"events": [batch.events[index].model_dump() for index in positions_by_url[url]]},
+            )
+            for url in urls
+        )
+    )
+
+    results: List[Dict[str, Any]] = [{} for _ in batch.events]
+    applied = 0
+    for url, response in zip(urls, responses):
+        response.raise_for_status()
+        body = response.json()
+        applied += body["applied"]
+        for index, result in zip(positions_by_url[url], body["results"]):
+            results[index] = result
+    return {"results": results, "applied": applied, "duplicates": len(results) - applied}
+
+
+@router_app.get("/v1/node/{node_id}/badge.svg")
+async def router_badge_svg(node_id: str, if_none_match: Optional[str] = Header(None)) -> Response:
+    headers = {"If-None-Match": if_none_match} if if_none_match else None
+    url = f"{shard_url(node_id)}/v1/node/{node_id}/badge.svg"
+    return proxy_response(await router_client().get(url, headers=headers))
+
+
+@router_app.get("/v1/calibration/tests")
+async def router_list_calibration_tests(
+    limit: int = 20,
+    skill_id: Optional[str] = None,
+    node_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"limit": limit}
+    if skill_id is not None:
+        params["skill_id"] = skill_id
+    if node_id is not None:
+        params["node_id"] = node_id
+        return (await router_client().get(f"{shard_url(node_id)}/v1/calibration/tests", params=params)).json()
+
+    shards = await fan_out("/v1/calibration/tests", params=params)
+    tests = sorted(
+        (test for shard in shards for test in shard["tests"]),
+        key=lambda test: test["timestamp"],
+        reverse=True,
+    )
+    return {"tests": tests[:max(1, min(limit, 100))], "total": sum(shard["total"] for shard in shards)}
+
+
+@router_app.get("/v1/rank/top")
+async def router_rank_top(k: int = 10, skill_id: Optional[str] = None) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"k": k}
+    if skill_id is not None:
+        params["skill_id"] = skill_id
+    shards = await fan_out("/v1/rank/top", params=params)
+    ranked = sorted(
+        (node for shard in shards for node in shard["nodes"]),
+        key=lambda node: node["cri_score"],
+        reverse=True,
+    )[:max(1, min(k, 1000))]
+    return {
+        "skill_id": skill_id,
+        "total_nodes": sum(shard["total_nodes"] for shard in shards),
+        "nodes": [{**node, "rank": position} for position, node in enumerate(ranked, start=1)],
+    }
+
+
+@router_app.get("/v1/rank/range")
+async def router_rank_range(
+    min_score: float = 0.0,
+    max_score: float = 5.0,
+    skill_id: Optional[str] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"min_score": min_score, "max_score": max_score, "limit": limit}
+    if skill_id is not None:
+        params["skill_id"] = skill_id
+    shards = await fan_out("/v1/rank/range", params=params)
+    nodes = sorted(
+        (node for shard in shards for node in shard["nodes"]),
+        key=lambda node: node["cri_score"],
+        reverse=True,
+    )
+    return {
+        "skill_id": skill_id,
+        "min_score": min_score,
+        "max_score": max_score,
+        "count": sum(shard["count"] for shard in shards),
+        "nodes": nodes[:max(0, min(limit, 1000))],
+    }
+
+
+@router_app.get("/v1/cri/{node_id}/percentile")
+async def router_get_cri_percentile(node_id: str, skill_id: Optional[str] = None) -> Dict[str, Any]:
+    score = (await router_client().get(f"{shard_url(node_id)}/v1/cri/{node_id}")).json()["cri_score"]
+    params: Dict[str, Any] = {"score": score}
+    if skill_id is not None:
+        params["skill_id"] = skill_id
+    shards = await fan_out("/v1/rank/counts", params=params)
+    return {
+        "skill_id": skill_id,
+        **percentile_rank(
+            node_id,
+            score,
+            sum(shard["below"] for shard in shards),
+            sum(shard["equal"] for shard in shards),
+            sum(shard["total"] for shard in shards),
+        ),
+    }
+
+
+@router_app.post("/v1/trust/recompute")
+async def router_recompute_trust() -> Dict[str, Any]:
+    # Each shard holds only part of the graph, so there is no global vector to recompute.
+    raise HTTPException(status_code=409, detail=TRUST_DISABLED_DETAIL)
+
+
+async def stream_shards(path: str, params: Dict[str, Any]) -> AsyncIterator[bytes]:
+    for url in SHARD_URLS:
+        async with router_client().stream("GET", f"{url}{path}", params=params) as response:
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
+
+@router_app.get("/v1/export/nodes")
+async def router_export_nodes(since: int = 0) -> StreamingResponse:
+    return StreamingResponse(
+        stream_shards("/v1/export/nodes", {"since": since}),
+        media_type="application/x-ndjson",
+        headers={"X-Next-Since": str(epoch_now())},
+    )
+
+
+@router_app.get("/v1/export/history")
+async def router_export_history(since: int = 0) -> StreamingResponse:
+    return StreamingResponse(
+        stream_shards("/v1/export/history", {"since": since}),
+        media_type="application/x-ndjson",
+        headers={"X-Next-Since": str(epoch_now())},
+    )
+
+
+@router_app.get("/stats")
+async def router_stats() -> Dict[str, Any]:
+    shards = await fan_out("/stats")
+    total_nodes = sum(shard["total_nodes"] for shard in shards)
+    weighted_cri = sum(shard["average_cri"] * shard["total_nodes"] for shard in shards)
     return {
         "total_nodes": total_nodes,
-        "average_cri": round(average_cri, 2),
-        "total_transactions": total_transactions,
-        "active_today": active_today,
-        "nodes_by_score": nodes_by_score,
+        "average_cri": round(weighted_cri / total_nodes, 2) if total_nodes else 0.0,
+        "total_transactions": sum(shard["total_transactions"] for shard in shards),
+        "active_today": sum(shard["active_today"] for shard in shards),
+        "nodes_by_score": {
+            bucket: sum(shard["nodes_by_score"][bucket] for shard in shards) for bucket in SCORE_BUCKETS
+        },
     }
 
 
+def serve_shard(index: int, count: int, host: str, port: int) -> None:
+    import uvicorn
+
+    global SHARD_INDEX, SHARD_COUNT
+    SHARD_INDEX, SHARD_COUNT = index, count
+    open_storage()
+    uvicorn.run(app, host=host, port=port, log_level="warning")
+
+
+def serve_sharded(shards: int, host: str, port: int) -> None:
+    import multiprocessing
+
+    import uvicorn
+
+    workers = []
+    for index in range(shards):
+        worker_port = port + 1 + index
+        worker = multiprocessing.Process(
+            target=serve_shard,
+            args=(index, shards, host, worker_port),
+            daemon=True,
+        )
+        worker.start()
+        workers.append(worker)
+        SHARD_URLS.append(f"http://127.0.0.1:{worker_port}")
+
+    try:
+        uvicorn.run(router_app, host=host, port=port)
+    finally:
+        for worker in workers:
+            worker.terminate()
+
+
 if __name__ == "__main__":
+    import argparse
+
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8111)
+    parser = argparse.ArgumentParser(description="CRI API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8111)
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="run this many shard worker processes on port+1.. behind a router on port",
+    )
+    args = parser.parse_args()
+
+    if args.shards > 1:
+        serve_sharded(args.shards, args.host, args.port)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
@@ -4,85 +4,752 @@ Extensiones para el backend principal de BotNode
 Agrega soporte para 38 skills dinámicos
 """
 
+import asyncio
+import bisect
 import json
+import math
 import os
+import random
+import re
+import time
+import unicodedata
+from collections import deque
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional
 import httpx
 from datetime import datetime, timedelta
 
+# Monitor de salud: cada ciclo sondea todos los skills; el estado solo cambia tras
+# varios resultados consecutivos en el mismo sentido (histéresis).
+HEALTH_CHECK_INTERVAL = float(os.getenv("SKILL_HEALTH_CHECK_INTERVAL", "15"))
+HEALTH_CHECK_JITTER = 0.2
+HEALTH_CHECK_TIMEOUT = 2.0
+HEALTH_FAILURES_TO_DOWN = 2
+HEALTH_SUCCESSES_TO_UP = 2
+
+# Recarga en caliente: se sondea el mtime del archivo de registro
+REGISTRY_POLL_INTERVAL = float(os.getenv("SKILL_REGISTRY_POLL_INTERVAL", "2"))
+
+# Precios: la tabla skill x complejidad se recalcula solo cuando cambia el registro
+COMPLEXITY_MULTIPLIERS = {
+    "simple": 0.7,
+    "medium": 1.0,
+    "complex": 1.5,
+    "very_complex": 2.0
+}
+MAX_QUOTE_ITEMS = 10000
+
+# Búsqueda: peso de cada campo en el ranking; los prefijos puntúan a la mitad
+SEARCH_FIELD_WEIGHTS = {
+    "name": 3.0,
+    "id": 3.0,
+    "category": 2.0,
+    "description": 1.0
+}
+SEARCH_PREFIX_WEIGHT = 0.5
+SEARCH_MAX_LIMIT = 100
+
+# Batch: límites de concurrencia global y por skill, plazo por item y por batch
+BATCH_MAX_CONCURRENCY = int(os.getenv("SKILL_BATCH_CONCURRENCY", "16"))
+BATCH_PER_SKILL_CONCURRENCY = int(os.getenv("SKILL_BATCH_PER_SKILL_CONCURRENCY", "4"))
+BATCH_ITEM_TIMEOUT = float(os.getenv("SKILL_BATCH_ITEM_TIMEOUT", "30"))
+BATCH_DEADLINE = float(os.getenv("SKILL_BATCH_DEADLINE", "120"))
+MAX_BATCH_ITEMS = 1000
+
+# Clave interna que los skills exigen en /run y /run-batch (cabecera X-INTERNAL-API-KEY)
+INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "botnode-internal-key")
+
+# Selección de vendedor: coste = p95 (s) + errores + en vuelo - CRI normalizado; menor es mejor
+CRI_API_URL = os.getenv("CRI_API_URL", "http://localhost:8111").rstrip("/")
+SELLER_CRI_TTL = float(os.getenv("SKILL_SELLER_CRI_TTL", "60"))
+SELLER_STATS_WINDOW = 100
+SELLER_NEUTRAL_CRI = 1.0
+SELLER_MAX_CRI = 5.0
+SELLER_WEIGHTS = {
+    "p95": 1.0,
+    "errors": 2.0,
+    "in_flight": 0.25,
+    "cri": 1.0
+}
+
+# Micro-batching (opt-in por skill con "batching" en el registro): se agrupan
+# hasta max_items peticiones o max_wait_ms milisegundos, lo que llegue antes
+MICRO_BATCH_MAX_ITEMS = 32
+MICRO_BATCH_ITEMS_LIMIT = 64  # máximo que aceptan los /run-batch de los skills
+MICRO_BATCH_MAX_WAIT_MS = 5.0
+MICRO_BATCH_PATH = "/run-batch"  # los skills exigen X-INTERNAL-API-KEY en este endpoint
+MICRO_BATCH_METRICS_WINDOW = 1000
+
+def validate_registry(data: Any):
+    """Validar el contenido del registro; lanza ValueError si no es usable"""
+    if not isinstance(data, dict):
+        raise ValueError("el registro debe ser un objeto JSON")
+    skills = data.get('skills', {})
+    if not isinstance(skills, dict):
+        raise ValueError("'skills' debe ser un objeto")
+    for skill_id, skill in skills.items():
+        if not isinstance(skill, dict):
+            raise ValueError(f"skill '{skill_id}' debe ser un objeto")
+        if skill.get('id', skill_id) != skill_id:
+            raise ValueError(f"skill '{skill_id}' declara id '{skill['id']}'")
+        batching = skill.get('batching', {})
+        if not isinstance(batching, dict):
+            raise ValueError(f"skill '{skill_id}' tiene batching inválido")
+        for key in ('max_items', 'max_wait_ms'):
+            value = batching.get(key, 1)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+                raise ValueError(f"skill '{skill_id}' tiene batching.{key} inválido")
+        if batching.get('max_items', 1) > MICRO_BATCH_ITEMS_LIMIT:
+            raise ValueError(f"skill '{skill_id}' tiene batching.max_items > {MICRO_BATCH_ITEMS_LIMIT}")
+        sellers = skill.get('sellers', [])
+        if not isinstance(sellers, list) or not all(
+            isinstance(seller, dict) and isinstance(seller.get('endpoint'), str) for seller in sellers
+        ):
+            raise ValueError(f"skill '{skill_id}' tiene sellers inválidos")
+        price = skill.get('price_tck', 0)
+        if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+            raise ValueError(f"skill '{skill_id}' tiene price_tck inválido")
+    categories = data.get('categories', {})
+    if not isinstance(categories, dict) or not all(isinstance(ids, list) for ids in categories.values()):
+        raise ValueError("'categories' debe mapear nombres a listas de ids")
+
+
+def tokenize(text: Any) -> List[str]:
+    """Normalizar texto (minúsculas, sin acentos) y partir en palabras"""
+    if not isinstance(text, str):
+        return []
+    folded = unicodedata.normalize('NFKD', text.lower())
+    return re.findall(r'[^\W_]+', ''.join(c for c in folded if not unicodedata.combining(c)))
+
+
+class SkillSearchIndex:
+    """Índice invertido de texto completo sobre id, nombre, categoría y descripción"""
+    
+    __slots__ = ('postings', 'tokens')
+    
+    def __init__(self, skills):
+        weights: Dict[str, Dict[str, float]] = {}
+        for skill_id, skill in skills.items():
+            for field, field_weight in SEARCH_FIELD_WEIGHTS.items():
+                for token in tokenize(skill_id if field == 'id' else skill.get(field)):
+                    docs = weights.setdefault(token, {})
+                    docs[skill_id] = docs.get(skill_id, 0.0) + field_weight
+        
+        # La puntuación final (peso x idf) queda precalculada en cada posting
+        total = len(skills)
+        self.postings = {
+            token: {skill_id: weight * math.log(1 + total / len(docs)) for skill_id, weight in docs.items()}
+            for token, docs in weights.items()
+        }
+        self.tokens = sorted(self.postings)
+    
+    def match(self, token: str) -> Dict[str, float]:
+        """Skills que contienen el token, o una palabra que empieza por él"""
+        scores = dict(self.postings.get(token, {}))
+        position = bisect.bisect_right(self.tokens, token)
+        while position < len(self.tokens) and self.tokens[position].startswith(token):
+            for skill_id, score in self.postings[self.tokens[position]].items():
+                scores[skill_id] = max(scores.get(skill_id, 0.0), score * SEARCH_PREFIX_WEIGHT)
+            position += 1
+        return scores
+    
+    def search(self, query: str) -> Optional[Dict[str, float]]:
+        """Puntuación por skill; todos los términos deben aparecer. None si la consulta está vacía"""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        
+        scores: Dict[str, float] = {}
+        for position, term in enumerate(terms):
+            matches = self.match(term)
+            if position == 0:
+                scores = matches
+            else:
+                scores = {skill_id: score + matches[skill_id] for skill_id, score in scores.items() if skill_id in matches}
+            if not scores:
+                break
+        return scores
+
+
+class RegistrySnapshot:
+    """Vista inmutable del registro con índices precalculados"""
+    
+    __slots__ = ('skills', 'categories', 'by_category', 'search_index', 'mtime')
+    
+    def __init__(self, data: Dict = None, mtime: Optional[float] = None):
+        data = data or {}
+        skills = {skill_id: dict(skill) for skill_id, skill in data.get('skills', {}).items()}
+        
+        # Sin 'categories' explícitas se derivan del campo category de cada skill
+        if 'categories' in data:
+            categories = {name: tuple(sid for sid in ids if sid in skills) for name, ids in data['categories'].items()}
+        else:
+            grouped: Dict[str, List[str]] = {}
+            for skill_id, skill in skills.items():
+                if skill.get('category'):
+                    grouped.setdefault(skill['category'], []).append(skill_id)
+            categories = {name: tuple(ids) for name, ids in grouped.items()}
+        
+        self.skills = MappingProxyType(skills)
+        self.categories = MappingProxyType(categories)
+        self.by_category = MappingProxyType(
+            {name: tuple(skills[sid] for sid in ids) for name, ids in categories.items()}
+        )
+        self.search_index = SkillSearchIndex(skills)
+        self.mtime = mtime
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'RegistrySnapshot':
+        """Leer, validar e indexar el archivo (bloqueante; usar fuera del event loop)"""
+        mtime = os.stat(path).st_mtime
+        with open(path, 'r') as f:
+            data = json.load(f)
+        validate_registry(data)
+        return cls(data, mtime)
+
+
+def apply_probe(state: Dict[str, Any], healthy: bool, latency_ms: float):
+    """Aplicar un sondeo a un estado de salud con histéresis up/down"""
+    if healthy:
+        state["successes"] += 1
+        state["failures"] = 0
+    else:
+        state["failures"] += 1
+        state["successes"] = 0
+    
+    if state["available"] is None:
+        state["available"] = healthy
+    elif state["available"] and state["failures"] >= HEALTH_FAILURES_TO_DOWN:
+        state["available"] = False
+    elif not state["available"] and state["successes"] >= HEALTH_SUCCESSES_TO_UP:
+        state["available"] = True
+    
+    state["latency_ms"] = round(latency_ms, 1)
+    state["last_checked"] = datetime.utcnow().isoformat()
+
+
 class SkillRegistry:
     """Registro dinámico de skills"""
     
     def __init__(self, registry_file: str = None):
         self.registry_file = registry_file or "/app/skill-registry.json"
-        self.skills: Dict[str, Dict] = {}
-        self.categories: Dict[str, List[str]] = {}
+        self.snapshot = RegistrySnapshot()
+        self.health: Dict[str, Dict[str, Any]] = {}
+        self.endpoint_health: Dict[str, Dict[str, Any]] = {}
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._watcher_task: Optional[asyncio.Task] = None
+        self._rejected_mtime: Optional[float] = None
         self.load_registry()
     
+    @property
+    def skills(self):
+        return self.snapshot.skills
+    
+    @property
+    def categories(self):
+        return self.snapshot.categories
+    
+    @property
+    def mtime(self) -> Optional[float]:
+        return self.snapshot.mtime
+    
     def load_registry(self):
         """Cargar registro desde archivo JSON"""
+        if not os.path.exists(self.registry_file):
+            print("⚠️  Archivo de registro no encontrado, usando registro vacío")
+            return
         try:
-            if os.path.exists(self.registry_file):
-                with open(self.registry_file, 'r') as f:
-                    data = json.load(f)
-                    self.skills = data.get('skills', {})
-                    self.categories = data.get('categories', {})
-                print(f"✅ Registro cargado: {len(self.skills)} skills")
-            else:
-                print("⚠️  Archivo de registro no encontrado, usando registro vacío")
+            self.swap(RegistrySnapshot.from_file(self.registry_file))
+            print(f"✅ Registro cargado: {len(self.skills)} skills")
         except Exception as e:
+            # Se conserva el snapshot anterior (vacío en el arranque)
             print(f"❌ Error cargando registro: {e}")
-            self.skills = {}
-            self.categories = {}
+    
+    def swap(self, snapshot: RegistrySnapshot):
+        """Publicar un snapshot nuevo con una sola asignación"""
+        self.snapshot = snapshot
+        for skill_id in [sid for sid in self.health if sid not in snapshot.skills]:
+            self.health.pop(skill_id, None)
+        endpoints = {endpoint for skill_id in snapshot.skills for endpoint in self.probe_endpoints(skill_id)}
+        for endpoint in [ep for ep in self.endpoint_health if ep not in endpoints]:
+            self.endpoint_health.pop(endpoint, None)
+    
+    def read_if_changed(self) -> Optional[RegistrySnapshot]:
+        """Parsear el archivo solo si su mtime cambió (bloqueante)"""
+        try:
+            mtime = os.stat(self.registry_file).st_mtime
+        except OSError:
+            return None
+        if mtime == self.snapshot.mtime or mtime == self._rejected_mtime:
+            return None
+        try:
+            return RegistrySnapshot.from_file(self.registry_file)
+        except Exception as e:
+            # Escritura a medias o contenido inválido: se reintenta cuando cambie el mtime
+            self._rejected_mtime = mtime
+            print(f"❌ Registro rechazado, se mantiene el anterior: {e}")
+            return None
+    
+    async def reload_if_changed(self) -> bool:
+        """Recargar el registro sin bloquear el event loop"""
+        snapshot = await asyncio.to_thread(self.read_if_changed)
+        if snapshot is None:
+            return False
+        self.swap(snapshot)
+        print(f"🔄 Registro recargado: {len(snapshot.skills)} skills")
+        return True
+    
+    async def run_registry_watcher(self, interval: float = None):
+        """Bucle de sondeo del mtime del registro"""
+        interval = interval or REGISTRY_POLL_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            await self.reload_if_changed()
+    
+    def start_registry_watcher(self, interval: float = None):
+        """Arrancar el watcher en el event loop actual"""
+        if self._watcher_task is None or self._watcher_task.done():
+            self._watcher_task = asyncio.get_running_loop().create_task(self.run_registry_watcher(interval))
+    
+    async def stop_registry_watcher(self):
+        """Detener el watcher"""
+        if self._watcher_task is not None:
+            self._watcher_task.cancel()
+            try:
+                await self._watcher_task
+            except asyncio.CancelledError:
+                pass
+            self._watcher_task = None
     
     def get_skill(self, skill_id: str) -> Optional[Dict]:
         """Obtener información de un skill"""
-        return self.skills.get(skill_id)
+        return self.snapshot.skills.get(skill_id)
     
     def list_skills(self, category: str = None) -> List[Dict]:
         """Listar skills, opcionalmente filtrados por categoría"""
+        snapshot = self.snapshot
         if category:
-            skill_ids = self.categories.get(category, [])
-            return [self.skills.get(sid) for sid in skill_ids if sid in self.skills]
-        return list(self.skills.values())
+            return list(snapshot.by_category.get(category, ()))
+        return list(snapshot.skills.values())
     
     def get_categories(self) -> List[str]:
         """Obtener lista de categorías"""
-        return list(self.categories.keys())
+        return list(self.snapshot.categories.keys())
+    
+    def search_skills(self, query: str = "", category: str = None, min_price: float = None,
+                      max_price: float = None, available_only: bool = False,
+                      limit: int = 20, offset: int = 0) -> Dict:
+        """Búsqueda por texto con filtros (facetas), ranking y paginación"""
+        snapshot = self.snapshot
+        scores = snapshot.search_index.search(query)
+        candidates = snapshot.skills if scores is None else scores
+        
+        matched = []
+        category_counts: Dict[str, int] = {}
+        for skill_id in candidates:
+            skill = snapshot.skills[skill_id]
+            price = skill.get('price_tck')
+            if min_price is not None and (price is None or price < min_price):
+                continue
+            if max_price is not None and (price is None or price > max_price):
+                continue
+            if available_only and not self.skill_health_check(skill_id):
+                continue
+            # Conteo por categoría antes de aplicar el filtro de categoría
+            skill_category = skill.get('category', 'other')
+            category_counts[skill_category] = category_counts.get(skill_category, 0) + 1
+            if category and skill_category != category:
+                continue
+            matched.append(skill_id)
+        
+        if scores is None:
+            matched.sort()
+        else:
+            matched.sort(key=lambda skill_id: (-scores[skill_id], skill_id))
+        
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+        offset = max(0, offset)
+        results = []
+        for skill_id in matched[offset:offset + limit]:
+            skill_copy = dict(snapshot.skills[skill_id])
+            skill_copy['available'] = self.skill_health_check(skill_id)
+            if scores is not None:
+                skill_copy['score'] = round(scores[skill_id], 4)
+            results.append(skill_copy)
+        
+        return {
+            "query": query,
+            "results": results,
+            "total": len(matched),
+            "limit": limit,
+            "offset": offset,
+            "facets": {"category": category_counts}
+        }
+    
+    def skill_endpoint(self, skill_id: str) -> str:
+        """URL base de un skill"""
+        skill = self.get_skill(skill_id) or {}
+        return skill.get('endpoint', f'http://skill-{skill_id}:8000')
+    
+    def probe_endpoints(self, skill_id: str) -> List[str]:
+        """Endpoints que sirven el skill: los de sus vendedores o el endpoint único"""
+        sellers = (self.get_skill(skill_id) or {}).get('sellers')
+        if sellers:
+            return [seller['endpoint'] for seller in sellers]
+        return [self.skill_endpoint(skill_id)]
+    
+    def endpoint_health_check(self, endpoint: str) -> bool:
+        """Estado cacheado de un endpoint concreto; desconocido cuenta como disponible"""
+        available = self.endpoint_health.get(endpoint, {}).get('available')
+        return True if available is None else available
     
     def skill_health_check(self, skill_id: str) -> bool:
-        """Verificar salud de un skill"""
-        skill = self.get_skill(skill_id)
-        if not skill:
+        """Estado de salud cacheado por el monitor (no hace I/O)"""
+        if not self.get_skill(skill_id):
             return False
         
+        # Mientras no haya sondeo se asume disponible para no bloquear el arranque
+        available = self.health.get(skill_id, {}).get('available')
+        return True if available is None else available
+    
+    def record_probe(self, skill_id: str, healthy: bool, latency_ms: float):
+        """Registrar un sondeo del skill y aplicar histéresis al estado up/down"""
+        state = self.health.setdefault(skill_id, {"available": None, "failures": 0, "successes": 0})
+        apply_probe(state, healthy, latency_ms)
+    
+    def record_endpoint_probe(self, endpoint: str, healthy: bool, latency_ms: float):
+        """Registrar un sondeo de un endpoint (vendedor) con la misma histéresis"""
+        state = self.endpoint_health.setdefault(endpoint, {"available": None, "failures": 0, "successes": 0})
+        apply_probe(state, healthy, latency_ms)
+    
+    async def probe_endpoint(self, client: httpx.AsyncClient, endpoint: str) -> bool:
+        """Sondear /health de un endpoint"""
         try:
-            endpoint = skill.get('endpoint', f'http://skill-{skill_id}:8000')
-            health_url = f"{endpoint}/health"
-            
-            # Timeout corto para health check
-            response = httpx.get(health_url, timeout=2.0)
+            response = await client.get(f"{endpoint}/health", timeout=HEALTH_CHECK_TIMEOUT)
             return response.status_code == 200
         except Exception:
             return False
     
+    async def probe_all(self, client: httpx.AsyncClient, spread: float = 0.0):
+        """Sondear cada endpoint una vez en paralelo, repartidos en `spread` segundos.
+        
+        Un skill está disponible en la ronda si responde alguno de sus endpoints, así que
+        un skill servido solo por vendedores no depende de un endpoint por defecto.
+        """
+        skill_endpoints = {skill_id: self.probe_endpoints(skill_id) for skill_id in list(self.skills)}
+        outcomes: Dict[str, tuple] = {}
+        
+        async def probe(endpoint: str):
+            if spread:
+                await asyncio.sleep(random.uniform(0, spread))
+            started = time.perf_counter()
+            healthy = await self.probe_endpoint(client, endpoint)
+            outcomes[endpoint] = (healthy, (time.perf_counter() - started) * 1000)
+            self.record_endpoint_probe(endpoint, *outcomes[endpoint])
+        
+        await asyncio.gather(*(probe(endpoint) for endpoint in {ep for eps in skill_endpoints.values() for ep in eps}))
+        for skill_id, endpoints in skill_endpoints.items():
+            results = [outcomes[endpoint] for endpoint in endpoints]
+            self.record_probe(skill_id, any(healthy for healthy, _ in results), min(latency for _, latency in results))
+    
+    async def run_health_monitor(self, interval: float = None):
+        """Bucle del monitor de salud con jitter"""
+        interval = interval or HEALTH_CHECK_INTERVAL
+        async with httpx.AsyncClient(timeout=HEALTH_CHECK_TIMEOUT) as client:
+            while True:
+                await self.probe_all(client, spread=interval * HEALTH_CHECK_JITTER)
+                await asyncio.sleep(interval * random.uniform(1 - HEALTH_CHECK_JITTER, 1 + HEALTH_CHECK_JITTER))
+    
+    def start_health_monitor(self, interval: float = None):
+        """Arrancar el monitor en el event loop actual"""
+        if self._monitor_task is None or self._monitor_task.done():
+            self._monitor_task = asyncio.get_running_loop().create_task(self.run_health_monitor(interval))
+    
+    async def stop_health_monitor(self):
+        """Detener el monitor"""
+        if self._monitor_task is not None:
+            self._monitor_task.cancel()
+            try:
+                await self._monitor_task
+            except asyncio.CancelledError:
+                pass
+            self._monitor_task = None
+    
     def get_available_skills(self) -> List[Dict]:
-        """Obtener skills disponibles (con health check)"""
+        """Obtener skills con su disponibilidad cacheada"""
         available = []
-        for skill_id, skill in self.skills.items():
+        for skill_id, skill in self.snapshot.skills.items():
             skill_copy = skill.copy()
             skill_copy['available'] = self.skill_health_check(skill_id)
             available.append(skill_copy)
         return available
 
 
+def percentile(values, fraction: float) -> float:
+    """Percentil de una ventana de muestras (0 si está vacía)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class EndpointStats:
+    """Latencia y errores recientes de un endpoint, y peticiones en vuelo"""
+    
+    __slots__ = ('latencies', 'outcomes', 'in_flight')
+    
+    def __init__(self, window: int = SELLER_STATS_WINDOW):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.in_flight = 0
+    
+    def record(self, latency_ms: float, ok: bool):
+        self.latencies.append(latency_ms)
+        self.outcomes.append(ok)
+    
+    def p95(self) -> float:
+        """Percentil 95 de latencia en ms (0 sin muestras)"""
+        return percentile(self.latencies, 0.95)
+    
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+
+class SellerSelector:
+    """Elegir vendedor de un skill por CRI, p95 y carga (power of two choices)"""
+    
+    def __init__(self, client: httpx.AsyncClient, cri_url: str = None, weights: Dict[str, float] = None,
+                 is_healthy=None):
+        self.client = client
+        self.cri_url = cri_url or CRI_API_URL
+        self.weights = {**SELLER_WEIGHTS, **(weights or {})}
+        self.is_healthy = is_healthy
+        self.stats: Dict[str, EndpointStats] = {}
+        self.cri: Dict[str, tuple] = {}
+        self._refreshing: set = set()
+        self._refresh_tasks: set = set()
+    
+    def sellers(self, skill_id: str, skill: Dict) -> List[Dict]:
+        """Vendedores declarados, o el endpoint único del registro"""
+        return skill.get('sellers') or [{
+            "node_id": skill.get('node_id'),
+            "endpoint": skill.get('endpoint', f'http://skill-{skill_id}:8000')
+        }]
+    
+    def endpoint_stats(self, endpoint: str) -> EndpointStats:
+        stats = self.stats.get(endpoint)
+        if stats is None:
+            stats = self.stats[endpoint] = EndpointStats()
+        return stats
+    
+    def cri_score(self, node_id: Optional[str]) -> float:
+        """CRI cacheado; neutro si aún no se conoce"""
+        cached = self.cri.get(node_id)
+        return cached[0] if cached else SELLER_NEUTRAL_CRI
+    
+    def cost(self, seller: Dict) -> float:
+        """Coste de enviar la siguiente petición a este vendedor"""
+        stats = self.endpoint_stats(seller['endpoint'])
+        return (
+            self.weights["p95"] * stats.p95() / 1000
+            + self.weights["errors"] * stats.error_rate()
+            + self.weights["in_flight"] * stats.in_flight
+            - self.weights["cri"] * self.cri_score(seller.get('node_id')) / SELLER_MAX_CRI
+        )
+    
+    def choose(self, skill_id: str, skill: Dict) -> Dict:
+        """Power of two choices entre los vendedores sanos: dos al azar, gana el de menor coste"""
+        sellers = self.sellers(skill_id, skill)
+        if self.is_healthy is not None:
+            # Si el monitor los marca todos caídos se elige entre todos antes que no elegir
+            sellers = [seller for seller in sellers if self.is_healthy(seller['endpoint'])] or sellers
+        candidates = sellers if len(sellers) <= 2 else random.sample(sellers, 2)
+        self.schedule_cri_refresh([seller.get('node_id') for seller in candidates])
+        return min(candidates, key=self.cost)
+    
+    def schedule_cri_refresh(self, node_ids: List[Optional[str]]):
+        """Refrescar en segundo plano los CRI caducados; nunca bloquea la selección"""
+        now = time.monotonic()
+        stale = [
+            node_id for node_id in node_ids
+            if node_id and node_id not in self._refreshing
+            and now - self.cri.get(node_id, (0.0, -SELLER_CRI_TTL))[1] >= SELLER_CRI_TTL
+        ]
+        if stale:
+            self._refreshing.update(stale)
+            # Se guarda la referencia para que la tarea no sea recolectada antes de terminar
+            task = asyncio.get_running_loop().create_task(self.refresh_cri(stale))
+            self._refresh_tasks.add(task)
+            task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def refresh_cri(self, node_ids: List[str]):
+        """Consultar el servicio CRI en una sola petición"""
+        try:
+            response = await self.client.post(
+                f"{self.cri_url}/v1/cri/lookup",
+                json={"node_ids": node_ids, "fields": ["cri_score"]},
+                timeout=HEALTH_CHECK_TIMEOUT
+            )
+            if response.status_code == 200:
+                fetched_at = time.monotonic()
+                for node_id, record in response.json().get('records', {}).items():
+                    self.cri[node_id] = (float(record[0]), fetched_at)
+        except Exception:
+            pass
+        finally:
+            self._refreshing.difference_update(node_ids)
+    
+    def describe(self, skill_id: str, skill: Dict) -> List[Dict]:
+        """Estado de cada vendedor del skill"""
+        described = []
+        for seller in self.sellers(skill_id, skill):
+            stats = self.endpoint_stats(seller['endpoint'])
+            described.append({
+                **seller,
+                "cri_score": self.cri_score(seller.get('node_id')),
+                "p95_ms": round(stats.p95(), 1),
+                "error_rate": round(stats.error_rate(), 4),
+                "in_flight": stats.in_flight,
+                "samples": len(stats.latencies),
+                "cost": round(self.cost(seller), 4)
+            })
+        return described
+
+
+class BatchMetrics:
+    """Espera en cola y tamaño de los micro-batches de un skill"""
+    
+    __slots__ = ('delays', 'sizes', 'batches', 'items', 'flushes')
+    
+    def __init__(self, window: int = MICRO_BATCH_METRICS_WINDOW):
+        self.delays = deque(maxlen=window)
+        self.sizes = deque(maxlen=window)
+        self.batches = 0
+        self.items = 0
+        self.flushes = {"size": 0, "timer": 0}
+    
+    def record(self, delays_ms: List[float], reason: str):
+        self.delays.extend(delays_ms)
+        self.sizes.append(len(delays_ms))
+        self.batches += 1
+        self.items += len(delays_ms)
+        self.flushes[reason] = self.flushes.get(reason, 0) + 1
+    
+    def summary(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(sum(self.sizes) / len(self.sizes), 2) if self.sizes else 0.0,
+            "queue_delay_ms": {
+                "p50": round(percentile(self.delays, 0.5), 3),
+                "p95": round(percentile(self.delays, 0.95), 3),
+                "max": round(max(self.delays), 3) if self.delays else 0.0
+            },
+            "flushes": dict(self.flushes)
+        }
+
+
+class MicroBatcher:
+    """Agrupar peticiones pequeñas a un skill en una sola llamada a su endpoint batch"""
+    
+    def __init__(self, orchestrator: 'SkillOrchestrator', skill_id: str, config: Dict, api_key: str = None):
+        self.orchestrator = orchestrator
+        self.skill_id = skill_id
+        self.config = config
+        self.api_key = api_key
+        self.max_items = min(int(config.get('max_items', MICRO_BATCH_MAX_ITEMS)), MICRO_BATCH_ITEMS_LIMIT)
+        self.max_wait = float(config.get('max_wait_ms', MICRO_BATCH_MAX_WAIT_MS)) / 1000
+        self.path = config.get('path', MICRO_BATCH_PATH)
+        self.metrics = orchestrator.batch_metrics.setdefault(skill_id, BatchMetrics())
+        self.pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending: set = set()
+    
+    async def submit(self, input_data: Dict) -> Dict:
+        """Encolar una petición y esperar su parte del resultado"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((input_data, future, time.perf_counter()))
+        if len(self.pending) >= self.max_items:
+            self.flush("size")
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush, "timer")
+        return await future
+    
+    def flush(self, reason: str):
+        """Enviar lo acumulado (por tamaño o por tiempo)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self.send(batch, reason))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+    
+    async def send(self, batch: List[tuple], reason: str):
+        """Una llamada upstream; el resultado se reparte entre los que esperan"""
+        flushed = time.perf_counter()
+        self.metrics.record([(flushed - enqueued) * 1000 for _, _, enqueued in batch], reason)
+        
+        skill_id = self.skill_id
+        skill = self.orchestrator.registry.get_skill(skill_id) or {}
+        seller = self.orchestrator.selector.choose(skill_id, skill)
+        try:
+            response = await self.orchestrator.post_to_seller(
+                seller, self.path, {"items": [input_data for input_data, _, _ in batch]}, self.api_key,
+                internal_key=True
+            )
+            if response.status_code == 200:
+                results = response.json().get('results', [])
+                if len(results) != len(batch):
+                    raise ValueError(f"batch devolvió {len(results)} resultados para {len(batch)} items")
+                executed_at = datetime.utcnow().isoformat()
+                outcomes = [
+                    {"success": True, "skill_id": skill_id, "result": item["output"],
+                     "executed_at": executed_at, "batch_size": len(batch)}
+                    if "output" in item else
+                    {"success": False, "skill_id": skill_id, "error": item.get("error", "unknown error")}
+                    for item in results
+                ]
+            else:
+                failure = {
+                    "success": False,
+                    "skill_id": skill_id,
+                    "error": f"Skill returned status {response.status_code}",
+                    "details": response.text
+                }
+                outcomes = [dict(failure) for _ in batch]
+        except httpx.TimeoutException:
+            outcomes = [{"error": f"Skill '{skill_id}' timeout"} for _ in batch]
+        except Exception as e:
+            outcomes = [{"error": f"Error ejecutando skill: {str(e)}"} for _ in batch]
+        
+        for (_, future, _), outcome in zip(batch, outcomes):
+            if seller.get('node_id'):
+                outcome["node_id"] = seller['node_id']
+            # El llamante puede haberse cancelado (p. ej. por su plazo) mientras tanto
+            if not future.done():
+                future.set_result(outcome)
+
+
 class SkillOrchestrator:
     """Orquestador para ejecutar skills"""
     
-    def __init__(self, registry: SkillRegistry):
+    def __init__(self, registry: SkillRegistry, max_concurrency: int = None, per_skill_concurrency: int = None):
         self.registry = registry
         self.client = httpx.AsyncClient(timeout=30.0)
+        self.max_concurrency = max_concurrency or BATCH_MAX_CONCURRENCY
+        self.per_skill_concurrency = per_skill_concurrency or BATCH_PER_SKILL_CONCURRENCY
+        # Los semáforos se crean dentro del event loop, al primer uso
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._skill_limits: Dict[str, asyncio.Semaphore] = {}
+        self.selector = SellerSelector(self.client, is_healthy=registry.endpoint_health_check)
+        self._batchers: Dict[tuple, MicroBatcher] = {}
+        self.batch_metrics: Dict[str, BatchMetrics] = {}
     
     async def execute_skill(self, skill_id: str, input_data: Dict, api_key: str = None) -> Dict:
         """Ejecutar un skill con datos de entrada"""
@@ -94,76 +761,144 @@ class SkillOrchestrator:
         if not self.registry.skill_health_check(skill_id):
             return {"error": f"Skill '{skill_id}' no disponible"}
         
+        # "batching": {} activa el micro-batching con los valores por defecto
+        if skill.get('batching') is not None:
+            return await self.micro_batcher(skill_id, skill['batching'], api_key).submit(input_data)
+        
+        seller = self.selector.choose(skill_id, skill)
         try:
-            endpoint = skill.get('endpoint', f'http://skill-{skill_id}:8000')
-            execute_url = f"{endpoint}/execute"
-            
-            # Headers
-            headers = {"Content-Type": "application/json"}
-            if api_key:
-                headers["Authorization"] = f"Bearer {api_key}"
-            
             # Ejecutar skill
-            response = await self.client.post(
-                execute_url,
-                json=input_data,
-                headers=headers
+            response = await self.post_to_seller(
+                seller, "/execute", input_data, api_key,
+                internal_key=skill.get("requires_internal_key", False)
             )
             
             if response.status_code == 200:
-                return {
+                result = {
                     "success": True,
                     "skill_id": skill_id,
                     "result": response.json(),
                     "executed_at": datetime.utcnow().isoformat()
                 }
             else:
-                return {
+                result = {
                     "success": False,
                     "skill_id": skill_id,
                     "error": f"Skill returned status {response.status_code}",
                     "details": response.text
                 }
+            if seller.get('node_id'):
+                result["node_id"] = seller['node_id']
+            return result
                 
         except httpx.TimeoutException:
             return {"error": f"Skill '{skill_id}' timeout"}
         except Exception as e:
             return {"error": f"Error ejecutando skill: {str(e)}"}
     
-    async def batch_execute(self, skill_requests: List[Dict]) -> List[Dict]:
-        """Ejecutar múltiples skills en paralelo"""
-        import asyncio
-        
-        tasks = []
-        for req in skill_requests:
-            skill_id = req.get('skill_id')
-            input_data = req.get('input', {})
-            api_key = req.get('api_key')
+    async def post_to_seller(self, seller: Dict, path: str, payload: Dict, api_key: str = None,
+                             internal_key: bool = False) -> httpx.Response:
+        """POST a un vendedor registrando latencia, errores y peticiones en vuelo"""
+        stats = self.selector.endpoint_stats(seller['endpoint'])
+        stats.in_flight += 1
+        started = time.perf_counter()
+        ok = False
+        try:
+            # Headers
+            headers = {"Content-Type": "application/json"}
+            if api_key:
+                headers["Authorization"] = f"Bearer {api_key}"
+            if internal_key:
+                headers["X-INTERNAL-API-KEY"] = INTERNAL_API_KEY
             
-            task = self.execute_skill(skill_id, input_data, api_key)
-            tasks.append(task)
+            response = await self.client.post(f"{seller['endpoint']}{path}", json=payload, headers=headers)
+            ok = response.status_code < 500
+            return response
+        finally:
+            # Timeouts y cancelaciones cuentan como error del vendedor
+            stats.in_flight -= 1
+            stats.record((time.perf_counter() - started) * 1000, ok)
+    
+    def micro_batcher(self, skill_id: str, config: Dict, api_key: str = None) -> MicroBatcher:
+        """Batcher por skill y credencial; se rehace si cambia su configuración"""
+        key = (skill_id, api_key)
+        batcher = self._batchers.get(key)
+        if batcher is None or batcher.config != config:
+            batcher = self._batchers[key] = MicroBatcher(self, skill_id, config, api_key)
+        return batcher
+    
+    def skill_limit(self, skill_id: str) -> asyncio.Semaphore:
+        """Semáforo por skill (se crea al primer uso)"""
+        limit = self._skill_limits.get(skill_id)
+        if limit is None:
+            limit = self._skill_limits[skill_id] = asyncio.Semaphore(self.per_skill_concurrency)
+        return limit
+    
+    async def execute_batch_item(self, index: int, req: Dict, item_timeout: float) -> Dict:
+        """Ejecutar un item respetando los límites de concurrencia y su plazo"""
+        if self._global_limit is None:
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        skill_id = req.get('skill_id')
+        
+        try:
+            # Primero el límite del skill: un skill saturado no retiene huecos globales
+            async with self.skill_limit(skill_id), self._global_limit:
+                result = await asyncio.wait_for(
+                    self.execute_skill(skill_id, req.get('input', {}), req.get('api_key')),
+                    timeout=req.get('timeout') or item_timeout
+                )
+        except asyncio.TimeoutError:
+            result = {"success": False, "skill_id": skill_id, "error": f"Skill '{skill_id}' timeout"}
+        except Exception as e:
+            result = {"success": False, "skill_id": skill_id, "error": str(e)}
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return {"index": index, **result}
+    
+    async def stream_batch(self, skill_requests: List[Dict], item_timeout: float = None, deadline: float = None):
+        """Ejecutar un batch y entregar cada resultado en cuanto termina"""
+        item_timeout = item_timeout or BATCH_ITEM_TIMEOUT
+        loop = asyncio.get_running_loop()
+        expires = loop.time() + (deadline or BATCH_DEADLINE)
+        pending = {
+            asyncio.ensure_future(self.execute_batch_item(index, req, item_timeout)): index
+            for index, req in enumerate(skill_requests)
+        }
         
-        # Procesar resultados
-        processed = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                processed.append({
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=max(0.0, expires - loop.time()),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    pending.pop(task)
+                    yield task.result()
+            
+            # Plazo del batch vencido: se cancela el resto
+            for task, index in sorted(pending.items(), key=lambda item: item[1]):
+                task.cancel()
+                yield {
+                    "index": index,
                     "success": False,
-                    "skill_id": skill_requests[i].get('skill_id'),
-                    "error": str(result)
-                })
-            else:
-                processed.append(result)
-        
-        return processed
+                    "skill_id": skill_requests[index].get('skill_id'),
+                    "error": "Batch deadline exceeded"
+                }
+        finally:
+            # También si el cliente deja de consumir el stream
+            for task in pending:
+                task.cancel()
+    
+    async def batch_execute(self, skill_requests: List[Dict], item_timeout: float = None,
+                            deadline: float = None) -> List[Dict]:
+        """Ejecutar múltiples skills con concurrencia acotada; resultados en orden de petición"""
+        results = [result async for result in self.stream_batch(skill_requests, item_timeout, deadline)]
+        return sorted(results, key=lambda result: result["index"])
 
 
 class PricingEngine:
     """Motor de precios para skills"""
     
-    def __init__(self, base_price: float = 0.1):
+    def __init__(self, base_price: float = 0.1, registry: SkillRegistry = None):
         self.base_price = base_price
         self.multipliers = {
             "data_processing": 1.0,
@@ -173,50 +908,96 @@ class PricingEngine:
             "translation": 1.0,
             "other": 1.0
         }
+        self.registry = registry or SkillRegistry()
+        self._snapshot = self.registry.snapshot
+        self.price_table = self.build_price_table(self._snapshot.skills)
+    
+    def build_price_table(self, skills) -> Dict[str, Dict[str, float]]:
+        """Precalcular el precio de cada skill para cada nivel de complejidad"""
+        table = {}
+        for skill_id, skill in skills.items():
+            # Precio base del skill y multiplicador por categoría
+            base = skill.get('price_tck', self.base_price)
+            category_mult = self.multipliers.get(skill.get('category', 'other'), 1.0)
+            table[skill_id] = {
+                complexity: round(base * category_mult * complexity_mult, 2)
+                for complexity, complexity_mult in COMPLEXITY_MULTIPLIERS.items()
+            }
+        return table
+    
+    def refresh(self) -> Dict[str, Dict[str, float]]:
+        """Reconstruir la tabla si el registro publicó un snapshot nuevo (sin I/O)"""
+        snapshot = self.registry.snapshot
+        if snapshot is not self._snapshot:
+            # Una sola asignación: los lectores ven la tabla vieja o la nueva, nunca una mezcla
+            self.price_table = self.build_price_table(snapshot.skills)
+            self._snapshot = snapshot
+        return self.price_table
     
     def calculate_price(self, skill_id: str, input_complexity: str = "medium") -> float:
         """Calcular precio para un skill"""
-        skill = SkillRegistry().get_skill(skill_id)
-        if not skill:
+        prices = self.refresh().get(skill_id)
+        if not prices:
             return self.base_price
+        return prices.get(input_complexity, prices["medium"])
+    
+    def quote_item(self, item) -> tuple:
+        """Validar un item de cotización; lanza ValueError si no es cotizable"""
+        if not isinstance(item, dict):
+            raise ValueError("cada item debe ser un objeto")
+        complexity = item.get('complexity', 'medium')
+        quantity = item.get('quantity', 1)
+        if not isinstance(complexity, str) or complexity not in COMPLEXITY_MULTIPLIERS:
+            raise ValueError(f"complexity debe ser una de: {', '.join(COMPLEXITY_MULTIPLIERS)}")
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+            raise ValueError("quantity debe ser un entero positivo")
+        return item.get('skill_id'), complexity, quantity
+    
+    def quote_batch(self, items: List[Dict]) -> Dict:
+        """Cotizar muchos items con una sola lectura de la tabla (ValueError si alguno es inválido)"""
+        table = self.refresh()
+        quotes = []
+        total = 0.0
+        for index, item in enumerate(items):
+            try:
+                skill_id, complexity, quantity = self.quote_item(item)
+            except ValueError as e:
+                raise ValueError(f"item {index}: {e}") from None
+            prices = table.get(skill_id)
+            unit_price = prices[complexity] if prices else self.base_price
+            quotes.append({
+                "skill_id": skill_id,
+                "complexity": complexity,
+                "quantity": quantity,
+                "unit_price_tck": unit_price,
+                "price_tck": round(unit_price * quantity, 2),
+                "known_skill": prices is not None
+            })
+            total += unit_price * quantity
         
-        # Precio base del skill
-        base = skill.get('price_tck', self.base_price)
-        
-        # Multiplicador por categoría
-        category = skill.get('category', 'other')
-        category_mult = self.multipliers.get(category, 1.0)
-        
-        # Multiplicador por complejidad de entrada
-        complexity_mult = {
-            "simple": 0.7,
-            "medium": 1.0,
-            "complex": 1.5,
-            "very_complex": 2.0
-        }.get(input_complexity, 1.0)
-        
-        # Calcular precio final
-        price = base * category_mult * complexity_mult
-        
-        # Redondear a 2 decimales
-        return round(price, 2)
+        return {"quotes": quotes, "total_price_tck": round(total, 2), "count": len(quotes)}
     
     def estimate_batch_price(self, skill_requests: List[Dict]) -> float:
         """Estimar precio para un batch de ejecuciones"""
-        total = 0.0
-        for req in skill_requests:
-            skill_id = req.get('skill_id')
-            complexity = req.get('complexity', 'medium')
-            price = self.calculate_price(skill_id, complexity)
-            total += price
-        
-        return round(total, 2)
+        return self.quote_batch(skill_requests)["total_price_tck"]
 
 
 # --- FastAPI Endpoints para integrar en main.py ---
 
 def add_skill_endpoints(app, registry: SkillRegistry, orchestrator: SkillOrchestrator, pricing: PricingEngine):
     """Agregar endpoints de skills a la app FastAPI"""
+    from fastapi import HTTPException
+    from fastapi.responses import StreamingResponse
+    
+    @app.on_event("startup")
+    async def start_skill_health_monitor():
+        registry.start_health_monitor()
+        registry.start_registry_watcher()
+    
+    @app.on_event("shutdown")
+    async def stop_skill_health_monitor():
+        await registry.stop_registry_watcher()
+        await registry.stop_health_monitor()
     
     @app.get("/api/v1/skills")
     async def list_all_skills(category: str = None, available_only: bool = False):
@@ -235,6 +1016,16 @@ def add_skill_endpoints(app, registry: SkillRegistry, orchestrator: SkillOrchest
             "categories": registry.get_categories()
         }
     
+    @app.get("/api/v1/skills/search")
+    async def search_skills(q: str = "", category: str = None, min_price: float = None,
+                            max_price: float = None, available_only: bool = False,
+                            limit: int = 20, offset: int = 0):
+        """Buscar skills por texto, categoría, rango de precio y disponibilidad"""
+        started = time.perf_counter()
+        result = registry.search_skills(q, category, min_price, max_price, available_only, limit, offset)
+        result["took_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return result
+    
     @app.get("/api/v1/skills/{skill_id}")
     async def get_skill_info(skill_id: str):
         """Obtener información detallada de un skill"""
@@ -260,15 +1051,29 @@ def add_skill_endpoints(app, registry: SkillRegistry, orchestrator: SkillOrchest
         return result
     
     @app.post("/api/v1/skills/batch-execute")
-    async def batch_execute_endpoint(requests: list):
-        """Ejecutar múltiples skills en batch"""
-        if len(requests) > 10:  # Límite por seguridad
-            return {"error": "Maximum 10 skills per batch"}, 400
-        
-        results = await orchestrator.batch_execute(requests)
+    async def batch_execute_endpoint(requests: List[Dict], stream: bool = False,
+                                     item_timeout: float = None, deadline: float = None):
+        """Ejecutar múltiples skills en batch (stream=true: NDJSON a medida que terminan)"""
+        if len(requests) > MAX_BATCH_ITEMS:  # Límite por seguridad
+            return {"error": f"Maximum {MAX_BATCH_ITEMS} skills per batch"}, 400
         
         # Calcular precio total
-        total_price = pricing.estimate_batch_price(requests)
+        try:
+            total_price = pricing.estimate_batch_price(requests)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        
+        if stream:
+            async def ndjson():
+                count = 0
+                async for result in orchestrator.stream_batch(requests, item_timeout, deadline):
+                    count += 1
+                    yield json.dumps(result, default=str) + "\n"
+                yield json.dumps({"done": True, "count": count, "total_price_tck": total_price}) + "\n"
+            
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+        
+        results = await orchestrator.batch_execute(requests, item_timeout, deadline)
         
         return {
             "results": results,
@@ -276,6 +1081,41 @@ def add_skill_endpoints(app, registry: SkillRegistry, orchestrator: SkillOrchest
             "count": len(results)
         }
     
+    @app.post("/api/v1/skills/quote")
+    async def quote_skills(items: List[Dict]):
+        """Cotizar un lote de skills (hasta MAX_QUOTE_ITEMS items)"""
+        if len(items) > MAX_QUOTE_ITEMS:
+            return {"error": f"Maximum {MAX_QUOTE_ITEMS} items per quote"}, 400
+        
+        try:
+            return pricing.quote_batch(items)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    
+    @app.get("/api/v1/skills/{skill_id}/sellers")
+    async def get_skill_sellers(skill_id: str):
+        """Estadísticas y coste de selección de cada vendedor del skill"""
+        skill = registry.get_skill(skill_id)
+        if not skill:
+            return {"error": "Skill not found"}, 404
+        
+        return {"skill_id": skill_id, "sellers": orchestrator.selector.describe(skill_id, skill)}
+    
+    @app.get("/api/v1/skills/{skill_id}/batching")
+    async def get_skill_batching(skill_id: str):
+        """Configuración y métricas de espera en cola del micro-batching"""
+        skill = registry.get_skill(skill_id)
+        if not skill:
+            return {"error": "Skill not found"}, 404
+        
+        metrics = orchestrator.batch_metrics.get(skill_id)
+        return {
+            "skill_id": skill_id,
+            "enabled": skill.get('batching') is not None,
+            "config": skill.get('batching'),
+            "metrics": metrics.summary() if metrics else None
+        }
+    
     @app.get("/api/v1/skills/{skill_id}/price")
     async def get_skill_price(skill_id: str, complexity: str = "medium"):
         """Obtener precio estimado para un skill"""
@@ -306,7 +1146,8 @@ def add_skill_endpoints(app, registry: SkillRegistry, orchestrator: SkillOrchest
                 "skill_id": skill_id,
                 "available": is_healthy,
                 "endpoint": skill.get('endpoint', ''),
-                "category": skill.get('category', 'unknown')
+                "category": skill.get('category', 'unknown'),
+                "last_checked": registry.health.get(skill_id, {}).get('last_checked')
             })
         
         healthy_count = sum(1 for s in health_status if s['available'])
@@ -331,8 +1172,8 @@ def initialize_skill_system():
     # Crear orquestador
     orchestrator = SkillOrchestrator(registry)
     
-    # Crear motor de precios
-    pricing = PricingEngine()
+    # Crear motor de precios (tabla precalculada sobre el mismo registro)
+    pricing = PricingEngine(registry=registry)
     
     print(f"✅ Sistema inicializado con {len(registry.skills)} skills")
     print(f"✅ Categorías disponibles: {', '.join(registry.get_categories())}")
@@ -6,8 +6,12 @@ VERSIÓN FIXED v2 con soporte para API keys internas
 
 import os
 import json
+import time
+import asyncio
 from typing import Dict, List, Optional, Any
 from fastapi import APIRouter, HTTPException, Depends, Header
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 import httpx
 from datetime import datetime
@@ -20,10 +24,29 @@ IS_DOCKER = os.getenv("IS_DOCKER", "false").lower() == "true"
 BASE_HOST = "localhost" if not IS_DOCKER else "skill"
 INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY", "botnode-internal-key")
 
+# Salud de skills: sondeos concurrentes con plazo global, cacheados con TTL
+HEALTH_CACHE_TTL = float(os.getenv("SKILL_HEALTH_CACHE_TTL", "15"))
+HEALTH_PROBE_TIMEOUT = 2.0
+HEALTH_PROBE_DEADLINE = float(os.getenv("SKILL_HEALTH_PROBE_DEADLINE", "3"))
+
+# Cliente compartido: pool con keep-alive durante toda la vida de la app
+SKILL_EXECUTE_TIMEOUT = float(os.getenv("SKILL_EXECUTE_TIMEOUT", "30"))
+SKILL_HTTP_LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("SKILL_HTTP_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("SKILL_HTTP_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=30.0
+)
+
 # Registro dinámico de skills
 SKILL_REGISTRY: Dict[str, Dict] = {}
 SKILL_CATEGORIES: Dict[str, List[str]] = {}
 
+# Estado de salud cacheado por skill y cliente HTTP compartido
+SKILL_HEALTH: Dict[str, Dict[str, Any]] = {}
+_http_client: Optional[httpx.AsyncClient] = None
+_health_refresh: Optional[asyncio.Task] = None
+_health_loop: Optional[asyncio.Task] = None
+
 def initialize_skill_registry():
     """Inicializar registro de skills con los 38 skills disponibles"""
     print("🚀 Inicializando registro de skills...")
@@ -116,20 +139,77 @@ def initialize_skill_registry():
     for skill_id, skill in SKILL_REGISTRY.items():
         print(f"  • {skill_id}: {skill['endpoint']}")
 
+def get_http_client() -> httpx.AsyncClient:
+    """Cliente HTTP compartido con pool de conexiones (se crea al primer uso)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=SKILL_EXECUTE_TIMEOUT, limits=SKILL_HTTP_LIMITS)
+    return _http_client
+
+def record_skill_health(skill_id: str, healthy: bool):
+    """Guardar el resultado de un sondeo en la caché"""
+    SKILL_HEALTH[skill_id] = {
+        "healthy": healthy,
+        "checked_at": datetime.utcnow().isoformat(),
+        "checked": time.monotonic()
+    }
+
 async def check_skill_health(skill_id: str) -> bool:
-    """Verificar salud de un skill"""
+    """Verificar salud de un skill (sondeo real) y actualizar la caché"""
     skill = SKILL_REGISTRY.get(skill_id)
     if not skill:
         return False
     
     try:
-        # Usar httpx asíncrono
-        async with httpx.AsyncClient(timeout=2.0) as client:
-            response = await client.get(f"{skill['endpoint']}/healthz")
-            return response.status_code == 200
+        response = await get_http_client().get(f"{skill['endpoint']}/healthz", timeout=HEALTH_PROBE_TIMEOUT)
+        healthy = response.status_code == 200
     except Exception as e:
         print(f"  ⚠️  Health check failed for {skill_id}: {e}")
-        return False
+        healthy = False
+    
+    record_skill_health(skill_id, healthy)
+    return healthy
+
+async def refresh_skill_health(deadline: float = None) -> Dict[str, bool]:
+    """Sondear todos los skills en paralelo; lo que no responda antes del plazo cuenta como caído"""
+    tasks = {asyncio.ensure_future(check_skill_health(skill_id)): skill_id for skill_id in SKILL_REGISTRY}
+    if not tasks:
+        return {}
+    
+    _, pending = await asyncio.wait(tasks, timeout=deadline or HEALTH_PROBE_DEADLINE)
+    for task in pending:
+        task.cancel()
+        record_skill_health(tasks[task], False)
+    
+    return {skill_id: SKILL_HEALTH[skill_id]["healthy"] for skill_id in SKILL_REGISTRY}
+
+def shared_health_refresh() -> asyncio.Task:
+    """Refresco en curso, o uno nuevo si no hay ninguno (nunca dos a la vez)"""
+    global _health_refresh
+    if _health_refresh is None or _health_refresh.done():
+        _health_refresh = asyncio.get_running_loop().create_task(refresh_skill_health())
+    return _health_refresh
+
+def schedule_health_refresh():
+    """Lanzar un refresco en segundo plano si la caché está vencida"""
+    now = time.monotonic()
+    stale = any(
+        now - SKILL_HEALTH.get(skill_id, {}).get("checked", -HEALTH_CACHE_TTL) >= HEALTH_CACHE_TTL
+        for skill_id in SKILL_REGISTRY
+    )
+    if stale:
+        shared_health_refresh()
+
+def cached_skill_health(skill_id: str) -> Optional[bool]:
+    """Salud cacheada sin esperar a ningún sondeo (None si aún no se conoce)"""
+    schedule_health_refresh()
+    return SKILL_HEALTH.get(skill_id, {}).get("healthy")
+
+async def run_health_refresher():
+    """Mantener la caché de salud al día (comparte el refresco en curso con las lecturas)"""
+    while True:
+        await shared_health_refresh()
+        await asyncio.sleep(HEALTH_CACHE_TTL)
 
 @skills_router.get("")
 async def list_skills(category: Optional[str] = None, available_only: bool = False):
@@ -143,8 +223,9 @@ async def list_skills(category: Optional[str] = None, available_only: bool = Fal
         
         skill_copy = skill.copy()
         
-        # Verificar disponibilidad si se solicita
-        skill_copy["available"] = await check_skill_health(skill_id)
+        # Disponibilidad desde la caché; nunca se espera a un sondeo
+        skill_copy["available"] = bool(cached_skill_health(skill_id))
+        skill_copy["health_checked_at"] = SKILL_HEALTH.get(skill_id, {}).get("checked_at")
         if available_only and not skill_copy["available"]:
             continue
         
@@ -166,7 +247,8 @@ async def get_skill_info(skill_id: str):
     
     # Agregar información de disponibilidad
     skill_info = skill.copy()
-    skill_info["available"] = await check_skill_health(skill_id)
+    skill_info["available"] = bool(cached_skill_health(skill_id))
+    skill_info["health_checked_at"] = SKILL_HEALTH.get(skill_id, {}).get("checked_at")
     
     return skill_info
 
@@ -187,15 +269,27 @@ async def get_skill_health(skill_id: str):
         "checked_at": datetime.utcnow().isoformat()
     }
 
+async def passthrough_envelope(envelope: Dict, response: httpx.Response):
+    """Sobre JSON alrededor de los bytes del skill, sin decodificarlos ni re-serializarlos"""
+    # Se abre el objeto del sobre y se añade "result" como última clave (sin coma si el sobre está vacío)
+    head = json.dumps({key: value for key, value in envelope.items() if key != "result"})[:-1]
+    try:
+        yield (head + (', "result": ' if head != "{" else '"result": ')).encode()
+        async for chunk in response.aiter_bytes():
+            yield chunk
+        yield b"}"
+    finally:
+        await response.aclose()
+
 @skills_router.post("/{skill_id}/execute")
-async def execute_skill(skill_id: str, input_data: dict):
-    """Ejecutar un skill específico"""
+async def execute_skill(skill_id: str, input_data: dict, passthrough: bool = False):
+    """Ejecutar un skill específico (passthrough=true: el resultado se copia tal cual, en streaming)"""
     skill = SKILL_REGISTRY.get(skill_id)
     if not skill:
         raise HTTPException(status_code=404, detail="Skill not found")
     
-    # Verificar que el skill esté disponible
-    if not await check_skill_health(skill_id):
+    # Verificar que el skill esté disponible (solo se rechaza si la caché lo da por caído)
+    if cached_skill_health(skill_id) is False:
         raise HTTPException(status_code=503, detail="Skill not available")
     
     try:
@@ -208,31 +302,46 @@ async def execute_skill(skill_id: str, input_data: dict):
         if skill.get("requires_internal_key", False):
             headers["X-INTERNAL-API-KEY"] = INTERNAL_API_KEY
         
-        # Ejecutar skill
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{skill['endpoint']}/run",
-                json=input_data,
-                headers=headers
+        # Ejecutar skill sobre el cliente compartido; el cuerpo se lee en streaming
+        client = get_http_client()
+        request = client.build_request(
+            "POST",
+            f"{skill['endpoint']}/run",
+            json=input_data,
+            headers=headers,
+            timeout=SKILL_EXECUTE_TIMEOUT
+        )
+        response = await client.send(request, stream=True)
+        
+        envelope = {
+            "success": True,
+            "skill_id": skill_id,
+            "skill_name": skill["name"],
+            "executed_at": datetime.utcnow().isoformat(),
+            "price_tck": skill["price_tck"]
+        }
+        if passthrough and response.status_code == 200 and "json" in response.headers.get("content-type", ""):
+            return StreamingResponse(
+                passthrough_envelope(envelope, response),
+                media_type="application/json",
+                background=BackgroundTask(response.aclose)
             )
-            
-            if response.status_code == 200:
-                return {
-                    "success": True,
-                    "skill_id": skill_id,
-                    "skill_name": skill["name"],
-                    "result": response.json(),
-                    "executed_at": datetime.utcnow().isoformat(),
-                    "price_tck": skill["price_tck"]
-                }
-            else:
-                return {
-                    "success": False,
-                    "skill_id": skill_id,
-                    "error": f"Skill returned status {response.status_code}",
-                    "details": response.text,
-                    "executed_at": datetime.utcnow().isoformat()
-                }
+        
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+        
+        if response.status_code == 200:
+            return {**envelope, "result": response.json()}
+        else:
+            return {
+                "success": False,
+                "skill_id": skill_id,
+                "error": f"Skill returned status {response.status_code}",
+                "details": response.text,
+                "executed_at": envelope["executed_at"]
+            }
                 
     except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="Skill timeout")
@@ -240,16 +349,21 @@ async def execute_skill(skill_id: str, input_data: dict):
         raise HTTPException(status_code=500, detail=f"Error executing skill: {str(e)}")
 
 @skills_router.get("/health/summary")
-async def skills_health_summary():
-    """Resumen de salud de todos los skills"""
+async def skills_health_summary(refresh: bool = False):
+    """Resumen de salud de todos los skills (refresh=true espera un sondeo, con plazo global)"""
+    if refresh:
+        # Se espera el refresco en curso si lo hay; shield evita que un cliente que corta lo cancele
+        await asyncio.shield(shared_health_refresh())
+    
     health_status = []
     
     for skill_id, skill in SKILL_REGISTRY.items():
-        is_healthy = await check_skill_health(skill_id)
+        is_healthy = cached_skill_health(skill_id)
         health_status.append({
             "skill_id": skill_id,
             "skill_name": skill["name"],
-            "healthy": is_healthy,
+            "healthy": bool(is_healthy),
+            "checked_at": SKILL_HEALTH.get(skill_id, {}).get("checked_at"),
             "category": skill["category"],
             "endpoint": skill["endpoint"]
         })
@@ -274,6 +388,21 @@ def add_skill_routes_to_app(app):
     app.include_router(skills_router)
     print("✅ Rutas de skills agregadas al backend")
     
+    @app.on_event("startup")
+    async def start_skill_health_refresher():
+        global _health_loop
+        _health_loop = asyncio.get_running_loop().create_task(run_health_refresher())
+    
+    @app.on_event("shutdown")
+    async def stop_skill_health_refresher():
+        global _http_client
+        for task in (_health_loop, _health_refresh):
+            if task is not None:
+                task.cancel()
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
+    
     # También agregar endpoint de health extendido
     @app.get("/health/extended")
     async def extended_health():
@@ -290,8 +419,6 @@ def add_skill_routes_to_app(app):
 
 if __name__ == "__main__":
     # Prueba básica del módulo
-    import asyncio
-    
     async def test():
         print("🧪 Probando módulo de skills...")
         
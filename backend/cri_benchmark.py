@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the CRI API registry.
+
+    python cri_benchmark.py contention --threads 8 --nodes 4 --events 40000
+    python cri_benchmark.py scaling --max-processes 8 --events 200000
+    python cri_benchmark.py memory --nodes 1000000 --history 3
+    python cri_benchmark.py replay --events 500000 --nodes 10000
+    python cri_benchmark.py trust --edges 1000000 --nodes 100000
+    python cri_benchmark.py certificates --nodes 2000 --rounds 20
+"""
+
+import argparse
+import gc
+import multiprocessing
+import os
+import tempfile
+import random
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import CRI_API_FIXED_COMPLETE as cri
+
+
+def make_events(node_ids: List[str], count: int, prefix: str = "tx") -> List[cri.TransactionEvent]:
+    return [
+        cri.TransactionEvent(
+            node_id=node_ids[index % len(node_ids)],
+            transaction_id=f"{prefix}_{index}",
+            success=index % 9 != 0,
+            skill_id="csv_parser",
+        )
+        for index in range(count)
+    ]
+
+
+def bench_contention(args: argparse.Namespace) -> None:
+    node_ids = [f"bench_node_{index}" for index in range(args.nodes)]
+    events = make_events(node_ids, args.events)
+    expected: Dict[str, int] = {node_id: 0 for node_id in node_ids}
+    for event in events:
+        expected[event.node_id] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(cri.update_cri, events, chunksize=256))
+    elapsed = time.perf_counter() - started
+
+    lost = {
+        node_id: expected[node_id] - cri.NODE_REGISTRY[node_id].total_transactions
+        for node_id in node_ids
+        if cri.NODE_REGISTRY[node_id].total_transactions != expected[node_id]
+    }
+    print(f"threads={args.threads} nodes={args.nodes} shards={cri.NODE_REGISTRY.shard_count}")
+    print(f"events={args.events} elapsed={elapsed:.3f}s throughput={args.events / elapsed:,.0f} events/s")
+    print(f"lost updates: {sum(lost.values())}")
+    if lost:
+        raise SystemExit(f"lost updates per node: {lost}")
+
+
+def apply_shard(shard: int, shards: int, events_per_shard: int) -> float:
+    # Each worker process owns one shard, exactly as a --shards worker does.
+    cri.SHARD_INDEX, cri.SHARD_COUNT = shard, shards
+    node_ids = [f"bench_node_{shard}_{index}" for index in range(1000)]
+    events = make_events(node_ids, events_per_shard, prefix=f"tx_{shard}")
+    started = time.perf_counter()
+    for event in events:
+        cri.update_cri(event)
+    return time.perf_counter() - started
+
+
+def bench_scaling(args: argparse.Namespace) -> None:
+    print(f"cpus={os.cpu_count()} events per process={args.events}")
+    baseline = None
+    for processes in range(1, args.max_processes + 1):
+        with multiprocessing.Pool(processes) as pool:
+            started = time.perf_counter()
+            pool.starmap(apply_shard, [(shard, processes, args.events) for shard in range(processes)])
+            elapsed = time.perf_counter() - started
+        throughput = processes * args.events / elapsed
+        baseline = baseline or throughput
+        print(f"processes={processes} throughput={throughput:,.0f} events/s speedup={throughput / baseline:.2f}x")
+
+
+@dataclass
+class LegacyHistoryEntry:
+    timestamp: str
+    old_score: float
+    new_score: float
+    change: float
+    reason: str
+    transaction_id: Optional[str] = None
+
+
+@dataclass
+class LegacyNodeCRI:
+    node_id: str
+    current_score: float
+    total_transactions: int
+    successful_transactions: int
+    failed_transactions: int
+    success_rate: float
+    last_active: str
+    capabilities: List[str]
+    calibration_scores: Dict[str, float]
+    history: List[LegacyHistoryEntry]
+    created_at: str
+
+
+SKILLS = ["csv_parser", "pdf_reader", "sentiment_analyzer", "google_search", "code_reviewer"]
+
+
+def build_legacy(count: int, history: int) -> Dict[str, LegacyNodeCRI]:
+    nodes: Dict[str, LegacyNodeCRI] = {}
+    for index in range(count):
+        node_id = f"sandbox_node_{index}"
+        timestamp = cri.utc_now()
+        skills = [SKILLS[index % len(SKILLS)], SKILLS[(index + 1) % len(SKILLS)]]
+        node = LegacyNodeCRI(node_id, 1.0, 0, 0, 0, 0.0, timestamp, [], {}, [], timestamp)
+        for step in range(history):
+            skill = skills[step % 2]
+            if skill not in node.capabilities:
+                node.capabilities.append(skill)
+            node.history.append(
+                LegacyHistoryEntry(cri.utc_now(), 1.0, 1.05, 0.05, f"Successful {skill} transaction", f"tx_{index}_{step}")
+            )
+            node.total_transactions += 1
+            node.successful_transactions += 1
+            node.success_rate = 1.0
+        nodes[node_id] = node
+    return nodes
+
+
+def build_compact(count: int, history: int) -> cri.ShardedRegistry:
+    # Goes through update_cri so the figure includes everything a real update
+    # allocates: rollups, rank index entries, stats and the dedup window.
+    cri.NODE_REGISTRY = cri.ShardedRegistry()
+    cri.REGISTRY_STATS = cri.RegistryStats()
+    cri.RANK_INDEXES = cri.RankIndexes()
+    cri.TRUST_ENGINE = cri.TrustEngine(pretrusted=[])
+    for index in range(count):
+        node_id = f"sandbox_node_{index}"
+        skills = [SKILLS[index % len(SKILLS)], SKILLS[(index + 1) % len(SKILLS)]]
+        for step in range(history):
+            cri.update_cri(
+                cri.TransactionEvent(
+                    node_id=node_id,
+                    transaction_id=f"tx_{index}_{step}",
+                    success=True,
+                    skill_id=skills[step % 2],
+                )
+            )
+    return cri.NODE_REGISTRY
+
+
+def measure(build, count: int, history: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    nodes = build(count, history)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes
+    gc.collect()
+    return current / count
+
+
+def traced() -> int:
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def measure_compact(count: int, history: int) -> Dict[str, float]:
+    # Builds through update_cri, then releases the add-ons one at a time; what each release frees is its
+    # share. What is left is the node itself: slots, packed history, transaction ids and its registry slot.
+    gc.collect()
+    tracemalloc.start()
+    registry = build_compact(count, history)
+    total = remaining = traced()
+    releases = [
+        ("rollups", lambda: [setattr(node, "rollups", None) for node in registry.values()]),
+        ("dedup window", lambda: [shard.processed._deltas.clear() for shard in registry.shards]),
+        ("rank indexes", lambda: setattr(cri, "RANK_INDEXES", None)),
+        ("stats", lambda: setattr(cri, "REGISTRY_STATS", None)),
+    ]
+    costs: Dict[str, float] = {}
+    for name, release in releases:
+        release()
+        freed = traced()
+        costs[name] = (remaining - freed) / count
+        remaining = freed
+    costs["node + history"] = remaining / count
+    costs["total"] = total / count
+    tracemalloc.stop()
+    cri.NODE_REGISTRY = cri.ShardedRegistry()
+    cri.RANK_INDEXES = cri.RankIndexes()
+    cri.REGISTRY_STATS = cri.RegistryStats()
+    gc.collect()
+    return costs
+
+
+def bench_memory(args: argparse.Namespace) -> None:
+    for skill in SKILLS:
+        cri.skill_code(skill)
+    legacy = measure(build_legacy, args.nodes, args.history)
+    compact = measure_compact(args.nodes, args.history)
+    remembered = min(args.nodes * args.history, cri.DEDUP_WINDOW)
+    print(f"nodes={args.nodes:,} history entries per node={args.history}")
+    print(f"before (dataclasses, ISO strings): {legacy:,.0f} bytes/node")
+    print(f"after, node + packed history: {compact['node + history']:,.0f} bytes/node")
+    print(f"  legacy / node + history: {legacy / compact['node + history']:.2f}x")
+    print("add-ons allocated by update_cri:")
+    print(f"  rollups: {compact['rollups']:,.0f} bytes/node")
+    print(
+        f"  dedup window: {compact['dedup window']:,.0f} bytes/node "
+        f"({compact['dedup window'] * args.nodes / remembered:,.0f} bytes per remembered update, "
+        f"capped at CRI_DEDUP_WINDOW={cri.DEDUP_WINDOW:,})"
+    )
+    print(f"  rank indexes: {compact['rank indexes']:,.0f} bytes/node")
+    print(f"  stats: {compact['stats']:,.0f} bytes/node")
+    print(f"after, everything update_cri allocates: {compact['total']:,.0f} bytes/node")
+
+
+def bench_replay(args: argparse.Namespace) -> None:
+    node_ids = [f"bench_node_{index}" for index in range(args.nodes)]
+    with tempfile.TemporaryDirectory() as directory:
+        log = cri.EventLog(directory)
+        timestamp = cri.epoch_now()
+        for event in make_events(node_ids, args.events):
+            log.append(event, timestamp)
+        log.close()
+        size = sum(os.path.getsize(path) for _, path in log.segments())
+
+        started = time.perf_counter()
+        replayed = cri.replay_events(cri.EventLog(directory))
+        elapsed = time.perf_counter() - started
+
+    print(f"events={replayed:,} nodes={args.nodes:,} log size={size / 1e6:.1f} MB ({size / replayed:.0f} bytes/event)")
+    print(f"replay elapsed={elapsed:.2f}s throughput={replayed / elapsed:,.0f} events/s")
+
+
+def bench_trust(args: argparse.Namespace) -> None:
+    rng = random.Random(7)
+    node_ids = [f"bench_node_{index}" for index in range(args.nodes)]
+    engine = cri.TrustEngine(pretrusted=node_ids[:10])
+
+    started = time.perf_counter()
+    while len(engine._weights) < args.edges:
+        buyer, seller = rng.choice(node_ids), rng.choice(node_ids)
+        engine.record(buyer, seller, rng.random() > 0.1)
+    print(f"edges={len(engine._weights):,} nodes={args.nodes:,} ingest={time.perf_counter() - started:.2f}s")
+
+    cold = engine.compute(warm_start=False)
+    print(f"cold: iterations={cold['iterations']} residual={cold['residual']:.1e} elapsed={cold['seconds']:.2f}s")
+
+    for _ in range(int(args.edges * args.churn)):
+        engine.record(rng.choice(node_ids), rng.choice(node_ids), rng.random() > 0.1)
+    warm = engine.compute()
+    print(
+        f"warm after {args.churn:.1%} churn: iterations={warm['iterations']} "
+        f"residual={warm['residual']:.1e} elapsed={warm['seconds']:.2f}s"
+    )
+    restarted = engine.compute(warm_start=False)
+    print(f"cold on the same graph: iterations={restarted['iterations']} elapsed={restarted['seconds']:.2f}s")
+
+
+def bench_certificates(args: argparse.Namespace) -> None:
+    node_ids = [f"bench_node_{index}" for index in range(args.nodes)]
+    for event in make_events(node_ids, args.nodes):
+        cri.update_cri(event)
+    authority = cri.CertificateAuthority(key_path="")
+    authority.key()
+
+    started = time.perf_counter()
+    authority.certificates(node_ids)
+    cold = time.perf_counter() - started
+    print(f"cold: {args.nodes:,} certificates signed in {cold:.2f}s ({args.nodes / cold:,.0f}/s)")
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for node_id in node_ids:
+            authority.certificate(node_id)
+    warm = time.perf_counter() - started
+    served = args.nodes * args.rounds
+    print(f"cached: {served:,} certificates in {warm:.2f}s ({served / warm:,.0f}/s), signatures={authority.signed:,}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CRI API benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    contention = commands.add_parser("contention", help="threads updating a few hot nodes; checks for lost updates")
+    contention.add_argument("--threads", type=int, default=8)
+    contention.add_argument("--nodes", type=int, default=4)
+    contention.add_argument("--events", type=int, default=40000)
+    contention.set_defaults(run=bench_contention)
+
+    scaling = commands.add_parser("scaling", help="one shard per process, 1..N processes")
+    scaling.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    scaling.add_argument("--events", type=int, default=100000)
+    scaling.set_defaults(run=bench_scaling)
+
+    memory = commands.add_parser("memory", help="bytes per node, legacy dataclasses vs the update_cri path")
+    memory.add_argument("--nodes", type=int, default=1_000_000)
+    memory.add_argument("--history", type=int, default=3)
+    memory.set_defaults(run=bench_memory)
+
+    replay = commands.add_parser("replay", help="rebuild state from an event log with no snapshot")
+    replay.add_argument("--events", type=int, default=500000)
+    replay.add_argument("--nodes", type=int, default=10000)
+    replay.set_defaults(run=bench_replay)
+
+    trust = commands.add_parser("trust", help="EigenTrust power iteration, cold vs warm start")
+    trust.add_argument("--edges", type=int, default=1_000_000)
+    trust.add_argument("--nodes", type=int, default=100000)
+    trust.add_argument("--churn", type=float, default=0.01, help="fraction of edges updated before the warm run")
+    trust.set_defaults(run=bench_trust)
+
+    certificates = commands.add_parser("certificates", help="RS256 certificate signing, cold vs cached")
+    certificates.add_argument("--nodes", type=int, default=2000)
+    certificates.add_argument("--rounds", type=int, default=20)
+    certificates.set_defaults(run=bench_certificates)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+import asyncio
+import json
+import os
+
+import httpx
+import pytest
+
+import backend_extensions as ext
+
+
+@pytest.fixture
+def registry_file(tmp_path):
+    path = tmp_path / "skill-registry.json"
+    path.write_text(
+        json.dumps(
+            {
+                "skills": {
+                    "csv_parser": {
+                        "id": "csv_parser",
+                        "name": "CSV Parser",
+                        "description": "Parse CSV files into structured rows",
+                        "category": "data_processing",
+                        "price_tck": 0.5,
+                        "endpoint": "http://csv",
+                    },
+                    "web_scraper": {
+                        "id": "web_scraper",
+                        "name": "Web Scraper",
+                        "description": "Scrape web pages and extract text",
+                        "category": "web_research",
+                        "price_tck": 1.0,
+                        "endpoint": "http://scraper",
+                    },
+                },
+                "categories": {"data_processing": ["csv_parser"], "web_research": ["web_scraper"]},
+            }
+        )
+    )
+    return path
+
+
+def test_health_monitor_caches_state_with_hysteresis(registry_file) -> None:
+    registry = ext.SkillRegistry(str(registry_file))
+    outcomes = {"http://csv": [200, 500, 500, 200, 200], "http://scraper": [503] * 5}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(outcomes[f"http://{request.url.host}"].pop(0))
+
+    async def probe_rounds() -> list:
+        seen = []
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            for _ in range(5):
+                await registry.probe_all(client)
+                seen.append(registry.skill_health_check("csv_parser"))
+        return seen
+
+    assert registry.skill_health_check("csv_parser") is True
+    assert asyncio.run(probe_rounds()) == [True, True, False, False, True]
+    assert registry.skill_health_check("web_scraper") is False
+    assert registry.skill_health_check("unknown") is False
+    assert [skill["available"] for skill in registry.get_available_skills()] == [True, False]
+
+    result = asyncio.run(ext.SkillOrchestrator(registry).execute_skill("web_scraper", {}))
+    assert result == {"error": "Skill 'web_scraper' no disponible"}
+
+
+def bump_mtime(path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_price_table_is_precomputed_and_swapped_on_registry_change(registry_file) -> None:
+    pricing = ext.PricingEngine(registry=ext.SkillRegistry(str(registry_file)))
+
+    assert pricing.price_table["web_scraper"] == {"simple": 1.05, "medium": 1.5, "complex": 2.25, "very_complex": 3.0}
+    assert pricing.calculate_price("csv_parser", "complex") == 0.75
+    assert pricing.calculate_price("csv_parser", "unheard_of") == 0.5
+    assert pricing.calculate_price("missing") == 0.1
+
+    quote = pricing.quote_batch(
+        [
+            {"skill_id": "csv_parser", "quantity": 3},
+            {"skill_id": "web_scraper", "complexity": "simple"},
+            {"skill_id": "missing"},
+        ]
+    )
+    assert [item["price_tck"] for item in quote["quotes"]] == [1.5, 1.05, 0.1]
+    assert quote["total_price_tck"] == 2.65
+    assert quote["quotes"][2]["known_skill"] is False
+
+    data = json.loads(registry_file.read_text())
+    data["skills"]["csv_parser"]["price_tck"] = 2.0
+    registry_file.write_text(json.dumps(data))
+    bump_mtime(registry_file)
+
+    assert pricing.calculate_price("csv_parser") == 0.5
+    assert asyncio.run(pricing.registry.reload_if_changed()) is True
+    assert pricing.calculate_price("csv_parser") == 2.0
+    assert pricing.registry.get_skill("csv_parser")["price_tck"] == 2.0
+
+
+def test_quotes_reject_invalid_quantity_and_complexity(registry_file) -> None:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    registry = ext.SkillRegistry(str(registry_file))
+    pricing = ext.PricingEngine(registry=registry)
+    for item, message in [
+        ({"skill_id": "csv_parser", "quantity": "3"}, "quantity"),
+        ({"skill_id": "csv_parser", "quantity": -2}, "quantity"),
+        ({"skill_id": "csv_parser", "quantity": True}, "quantity"),
+        ({"skill_id": "csv_parser", "complexity": ["simple"]}, "complexity"),
+        ({"skill_id": "csv_parser", "complexity": "extreme"}, "complexity"),
+    ]:
+        with pytest.raises(ValueError, match=f"item 1: {message}"):
+            pricing.quote_batch([{"skill_id": "csv_parser"}, item])
+
+    app = FastAPI()
+    ext.add_skill_endpoints(app, registry, ext.SkillOrchestrator(registry), pricing)
+    client = TestClient(app)
+    invalid = client.post("/api/v1/skills/quote", json=[{"skill_id": "csv_parser", "quantity": -1}])
+    assert invalid.status_code == 422 and "quantity" in invalid.json()["detail"]
+    assert client.post("/api/v1/skills/batch-execute", json=[{"skill_id": "csv_parser", "complexity": {}}]).status_code == 422
+    valid = client.post("/api/v1/skills/quote", json=[{"skill_id": "csv_parser", "quantity": 2, "complexity": "complex"}])
+    assert valid.json()["total_price_tck"] == 1.5
+
+
+def test_registry_hot_reload_swaps_validated_snapshots(registry_file) -> None:
+    registry = ext.SkillRegistry(str(registry_file))
+    original = registry.snapshot
+    assert registry.list_skills("web_research") == [registry.get_skill("web_scraper")]
+    assert asyncio.run(registry.reload_if_changed()) is False
+
+    registry_file.write_text('{"skills": {"csv_parser": {"id": ')
+    bump_mtime(registry_file)
+    assert asyncio.run(registry.reload_if_changed()) is False
+    assert registry.snapshot is original
+
+    registry_file.write_text(json.dumps({"skills": {"bad": {"id": "other"}}}))
+    bump_mtime(registry_file)
+    assert asyncio.run(registry.reload_if_changed()) is False
+    assert registry.snapshot is original
+
+    registry.record_probe("csv_parser", True, 1.0)
+    registry.record_probe("web_scraper", True, 1.0)
+    registry_file.write_text(
+        json.dumps(
+            {
+                "skills": {
+                    "web_scraper": {"id": "web_scraper", "category": "web_research"},
+                    "pdf_reader": {"id": "pdf_reader", "category": "data_processing"},
+                }
+            }
+        )
+    )
+    bump_mtime(registry_file)
+    assert asyncio.run(registry.reload_if_changed()) is True
+    assert sorted(registry.skills) == ["pdf_reader", "web_scraper"]
+    assert registry.get_categories() == ["web_research", "data_processing"]
+    assert [skill["id"] for skill in registry.list_skills("data_processing")] == ["pdf_reader"]
+    assert list(registry.health) == ["web_scraper"]
+    assert original.skills["csv_parser"]["price_tck"] == 0.5
+    with pytest.raises(TypeError):
+        registry.snapshot.skills["injected"] = {}
+
+
+def test_search_ranks_filters_and_paginates(registry_file) -> None:
+    data = json.loads(registry_file.read_text())
+    data["skills"]["pdf_reader"] = {
+        "id": "pdf_reader",
+        "name": "PDF Reader",
+        "description": "Extract text and tables from PDF documents",
+        "category": "data_processing",
+        "price_tck": 0.8,
+    }
+    data["categories"]["data_processing"].append("pdf_reader")
+    registry_file.write_text(json.dumps(data))
+    registry = ext.SkillRegistry(str(registry_file))
+
+    result = registry.search_skills("extract text")
+    assert [skill["id"] for skill in result["results"]] == ["pdf_reader", "web_scraper"]
+    assert result["facets"]["category"] == {"data_processing": 1, "web_research": 1}
+
+    assert [skill["id"] for skill in registry.search_skills("pars")["results"]] == ["csv_parser"]
+    assert [skill["id"] for skill in registry.search_skills("Páges")["results"]] == ["web_scraper"]
+    assert registry.search_skills("extract", category="web_research")["total"] == 1
+    assert [s["id"] for s in registry.search_skills(min_price=0.6, max_price=1.0)["results"]] == ["pdf_reader", "web_scraper"]
+
+    registry.record_probe("web_scraper", False, 1.0)
+    assert registry.search_skills("extract", available_only=True)["total"] == 1
+
+    page = registry.search_skills(limit=2, offset=2)
+    assert (page["total"], [skill["id"] for skill in page["results"]]) == (3, ["web_scraper"])
+
+
+def test_batch_execute_bounds_concurrency_and_enforces_deadlines(registry_file) -> None:
+    in_flight = {"csv": 0, "scraper": 0, "total": 0}
+    peak = dict(in_flight)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        for key in (host, "total"):
+            in_flight[key] += 1
+            peak[key] = max(peak[key], in_flight[key])
+        try:
+            await asyncio.sleep(json.loads(request.content)["sleep"])
+        finally:
+            for key in (host, "total"):
+                in_flight[key] -= 1
+        return httpx.Response(200, json={"host": host})
+
+    async def run() -> tuple:
+        orchestrator = ext.SkillOrchestrator(ext.SkillRegistry(str(registry_file)), max_concurrency=3, per_skill_concurrency=2)
+        orchestrator.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        requests = [{"skill_id": "csv_parser", "input": {"sleep": 0.01}} for _ in range(6)]
+        requests += [{"skill_id": "web_scraper", "input": {"sleep": 0.01}} for _ in range(6)]
+        requests.append({"skill_id": "web_scraper", "input": {"sleep": 1.0}, "timeout": 0.05})
+        ordered = await orchestrator.batch_execute(requests)
+
+        slow = [{"skill_id": "csv_parser", "input": {"sleep": 0.01}}, {"skill_id": "web_scraper", "input": {"sleep": 5.0}}]
+        streamed = [result async for result in orchestrator.stream_batch(slow, deadline=0.2)]
+        await orchestrator.client.aclose()
+        return ordered, streamed
+
+    ordered, streamed = asyncio.run(run())
+    assert [result["index"] for result in ordered] == list(range(13))
+    assert all(result["success"] for result in ordered[:12])
+    assert ordered[12]["error"] == "Skill 'web_scraper' timeout"
+    assert peak == {"csv": 2, "scraper": 2, "total": 3}
+
+    assert [result["index"] for result in streamed] == [0, 1]
+    assert streamed[0]["result"] == {"host": "csv"}
+    assert streamed[1]["error"] == "Batch deadline exceeded"
+    assert in_flight["total"] == 0
+
+
+def test_seller_selection_prefers_fast_reliable_high_cri_sellers() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/v1/cri/lookup"
+        node_ids = json.loads(request.content)["node_ids"]
+        scores = {"node_a": 1.0, "node_b": 4.5, "node_c": 2.0}
+        return httpx.Response(200, json={"fields": ["cri_score"], "records": {n: [scores[n]] for n in node_ids}})
+
+    skill = {
+        "id": "sentiment_analyzer",
+        "sellers": [
+            {"node_id": "node_a", "endpoint": "http://a"},
+            {"node_id": "node_b", "endpoint": "http://b"},
+            {"node_id": "node_c", "endpoint": "http://c"},
+        ],
+    }
+
+    async def run() -> tuple:
+        selector = ext.SellerSelector(httpx.AsyncClient(transport=httpx.MockTransport(handler)), cri_url="http://cri")
+        first = selector.choose("sentiment_analyzer", skill)
+        assert len(selector._refreshing) == 2
+        assert len(selector._refresh_tasks) == 1
+        await selector.refresh_cri(["node_a", "node_b", "node_c"])
+
+        for _ in range(20):
+            selector.endpoint_stats("http://a").record(20.0, True)
+            selector.endpoint_stats("http://b").record(20.0, True)
+            selector.endpoint_stats("http://c").record(900.0, False)
+        picks = [selector.choose("sentiment_analyzer", skill)["node_id"] for _ in range(300)]
+
+        selector.endpoint_stats("http://b").in_flight = 8
+        loaded = [selector.choose("sentiment_analyzer", skill)["node_id"] for _ in range(300)]
+        await selector.client.aclose()
+        return first, selector, picks, loaded
+
+    first, selector, picks, loaded = asyncio.run(run())
+    assert not selector._refresh_tasks
+    assert first["node_id"] in {"node_a", "node_b", "node_c"}
+    assert selector.cri_score("node_b") == 4.5
+    assert "node_c" not in picks and picks.count("node_b") > picks.count("node_a")
+    assert "node_c" not in loaded and loaded.count("node_a") > loaded.count("node_b")
+    assert [seller["samples"] for seller in selector.describe("sentiment_analyzer", skill)] == [20, 20, 20]
+    assert selector.describe("sentiment_analyzer", skill)[2]["error_rate"] == 1.0
+
+
+def test_sellers_only_skill_is_probed_per_seller(registry_file) -> None:
+    data = json.loads(registry_file.read_text())
+    data["skills"]["sentiment_analyzer"] = {
+        "id": "sentiment_analyzer",
+        "sellers": [{"node_id": "node_a", "endpoint": "http://a"}, {"node_id": "node_b", "endpoint": "http://b"}],
+    }
+    registry_file.write_text(json.dumps(data))
+    registry = ext.SkillRegistry(str(registry_file))
+    probed = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        probed.append(request.url.host)
+        return httpx.Response(503 if request.url.host == "b" else 200, json={})
+
+    async def run() -> list:
+        orchestrator = ext.SkillOrchestrator(registry)
+        orchestrator.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        orchestrator.selector.client = orchestrator.client
+        await registry.probe_all(orchestrator.client)
+        picks = [orchestrator.selector.choose("sentiment_analyzer", registry.get_skill("sentiment_analyzer"))["node_id"]
+                 for _ in range(50)]
+        result = await orchestrator.execute_skill("sentiment_analyzer", {"text": "ok"})
+        await orchestrator.client.aclose()
+        return picks, result
+
+    picks, result = asyncio.run(run())
+    assert sorted(probed[:4]) == ["a", "b", "csv", "scraper"]
+    assert registry.skill_health_check("sentiment_analyzer") is True
+    assert registry.endpoint_health_check("http://b") is False
+    assert set(picks) == {"node_a"}
+    assert result["success"] is True and result["node_id"] == "node_a"
+
+
+def test_micro_batching_coalesces_requests_and_splits_results(registry_file) -> None:
+    data = json.loads(registry_file.read_text())
+    data["skills"]["csv_parser"]["batching"] = {"max_items": 4, "max_wait_ms": 20}
+    registry_file.write_text(json.dumps(data))
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("X-INTERNAL-API-KEY") != ext.INTERNAL_API_KEY:
+            return httpx.Response(401, json={"detail": "Invalid internal API key"})
+        items = json.loads(request.content)["items"]
+        calls.append((request.url.path, len(items)))
+        return httpx.Response(
+            200, json={"results": [{"error": "empty"} if not item else {"output": {"echo": item["n"]}} for item in items]}
+        )
+
+    async def run() -> list:
+        orchestrator = ext.SkillOrchestrator(ext.SkillRegistry(str(registry_file)))
+        orchestrator.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        orchestrator.selector.client = orchestrator.client
+        results = await asyncio.gather(
+            *(orchestrator.execute_skill("csv_parser", {"n": n}) for n in range(5)),
+            orchestrator.execute_skill("csv_parser", {}),
+        )
+        await orchestrator.client.aclose()
+        return results, orchestrator.batch_metrics["csv_parser"].summary()
+
+    results, metrics = asyncio.run(run())
+    assert calls == [("/run-batch", 4), ("/run-batch", 2)]
+    assert [result["result"] for result in results[:5]] == [{"echo": n} for n in range(5)]
+    assert [result["batch_size"] for result in results[:5]] == [4, 4, 4, 4, 2]
+    assert results[5] == {"success": False, "skill_id": "csv_parser", "error": "empty"}
+    assert (metrics["batches"], metrics["items"], metrics["flushes"]) == (2, 6, {"size": 1, "timer": 1})
+    assert metrics["queue_delay_ms"]["max"] >= 15
+
+    assert ext.MicroBatcher(ext.SkillOrchestrator(ext.SkillRegistry(str(registry_file))), "csv_parser", {"max_items": 500}).max_items == 64
+    data["skills"]["csv_parser"]["batching"]["max_items"] = 65
+    with pytest.raises(ValueError, match="max_items"):
+        ext.validate_registry(data)
@@ -0,0 +1,188 @@
+import asyncio
+import json
+import sys
+import time
+import types
+
+import httpx
+import pytest
+
+try:
+    import sqlalchemy  # noqa: F401
+except ImportError:
+    # The module only imports Session for a type it never uses.
+    sqlalchemy_orm = types.ModuleType("sqlalchemy.orm")
+    sqlalchemy_orm.Session = object
+    sys.modules["sqlalchemy"] = types.ModuleType("sqlalchemy")
+    sys.modules["sqlalchemy.orm"] = sqlalchemy_orm
+
+import backend_skill_extensions_fixed_v2 as skills
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = {
+        skill_id: {
+            "id": skill_id,
+            "name": skill_id,
+            "category": "analysis",
+            "price_tck": 0.5,
+            "endpoint": f"http://{skill_id}",
+        }
+        for skill_id in ("alpha", "beta", "gamma", "delta")
+    }
+    monkeypatch.setattr(skills, "SKILL_REGISTRY", registry)
+    monkeypatch.setattr(skills, "SKILL_HEALTH", {})
+    monkeypatch.setattr(skills, "_health_refresh", None)
+    monkeypatch.setattr(skills, "_http_client", None)
+    return registry
+
+
+def mock_client(monkeypatch, handler) -> httpx.AsyncClient:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(skills, "_http_client", client)
+    return client
+
+
+def test_health_probes_run_concurrently_within_the_deadline(registry, monkeypatch) -> None:
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        try:
+            await asyncio.sleep(5.0 if request.url.host == "delta" else 0.05)
+        finally:
+            in_flight["now"] -= 1
+        return httpx.Response(503 if request.url.host == "gamma" else 200)
+
+    async def run() -> tuple:
+        mock_client(monkeypatch, handler)
+        started = time.perf_counter()
+        health = await skills.refresh_skill_health(deadline=0.3)
+        return health, time.perf_counter() - started
+
+    health, elapsed = asyncio.run(run())
+    assert health == {"alpha": True, "beta": True, "gamma": False, "delta": False}
+    assert in_flight["peak"] == 4
+    assert elapsed < 1.0
+    assert skills.SKILL_HEALTH["delta"]["healthy"] is False
+
+
+def test_cached_health_refreshes_in_background_after_the_ttl(registry, monkeypatch) -> None:
+    probes = []
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(skills.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(skills, "HEALTH_CACHE_TTL", 15.0)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        probes.append(request.url.host)
+        return httpx.Response(200)
+
+    async def run() -> list:
+        mock_client(monkeypatch, handler)
+        seen = [skills.cached_skill_health("alpha")]
+        await skills._health_refresh
+        first = skills._health_refresh
+        seen.append(skills.cached_skill_health("alpha"))
+        seen.append(skills._health_refresh is first)
+
+        clock["now"] += 15.0
+        seen.append(skills.cached_skill_health("alpha"))
+        seen.append(skills._health_refresh is first)
+        await skills._health_refresh
+        return seen
+
+    assert asyncio.run(run()) == [None, True, True, True, False]
+    assert len(probes) == 8
+
+
+def test_summary_refresh_joins_the_refresh_in_flight(registry, monkeypatch) -> None:
+    probes = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        probes.append(request.url.host)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    async def run() -> list:
+        mock_client(monkeypatch, handler)
+        skills.schedule_health_refresh()
+        in_flight = skills._health_refresh
+        summaries = await asyncio.gather(*(skills.skills_health_summary(refresh=True) for _ in range(3)))
+        assert skills._health_refresh is in_flight
+        return summaries
+
+    summaries = asyncio.run(run())
+    assert sorted(probes) == sorted(registry)
+    assert all(summary["healthy_skills"] == 4 for summary in summaries)
+
+
+def test_health_refresher_loop_reuses_the_shared_refresh(registry, monkeypatch) -> None:
+    probes = []
+    monkeypatch.setattr(skills, "HEALTH_CACHE_TTL", 0.05)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        probes.append(request.url.host)
+        return httpx.Response(200)
+
+    async def run() -> None:
+        mock_client(monkeypatch, handler)
+        loop_task = asyncio.ensure_future(skills.run_health_refresher())
+        await asyncio.sleep(0.12)
+        loop_task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await loop_task
+
+    asyncio.run(run())
+    assert len(probes) >= 8
+    assert skills.SKILL_HEALTH["alpha"]["healthy"] is True
+
+
+def test_passthrough_envelope_wraps_raw_result_bytes(monkeypatch) -> None:
+    raw = b'{"score": 1.50, "label": "POSITIVE"}'
+
+    async def collect(envelope: dict) -> bytes:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=raw)))
+        response = await client.send(client.build_request("POST", "http://skill/run"), stream=True)
+        body = b"".join([chunk async for chunk in skills.passthrough_envelope(envelope, response)])
+        assert response.is_closed
+        await client.aclose()
+        return body
+
+    empty = asyncio.run(collect({}))
+    assert empty == b'{"result": ' + raw + b"}"
+    assert json.loads(empty) == {"result": {"score": 1.5, "label": "POSITIVE"}}
+
+    wrapped = asyncio.run(collect({"success": True, "skill_id": "alpha", "result": "stale"}))
+    assert json.loads(wrapped) == {"success": True, "skill_id": "alpha", "result": {"score": 1.5, "label": "POSITIVE"}}
+    assert wrapped.endswith(b'"result": ' + raw + b"}")
+
+
+def test_execute_passthrough_reuses_the_pooled_client(registry, monkeypatch) -> None:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    raw = b'{"score": 0.90, "label": "POSITIVE"}'
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append((request.url.host, request.url.path, json.loads(request.content)))
+        return httpx.Response(200, content=raw, headers={"content-type": "application/json"})
+
+    pooled = mock_client(monkeypatch, handler)
+    for skill_id in registry:
+        skills.record_skill_health(skill_id, True)
+    app = FastAPI()
+    app.include_router(skills.skills_router)
+    client = TestClient(app)
+
+    streamed = client.post("/api/v1/skills/alpha/execute?passthrough=true", json={"text": "hi"})
+    parsed = client.post("/api/v1/skills/beta/execute", json={"text": "ho"})
+
+    assert streamed.content.endswith(b'"result": ' + raw + b"}")
+    body = json.loads(streamed.content)
+    assert (body["success"], body["skill_id"], body["result"]) == (True, "alpha", {"score": 0.9, "label": "POSITIVE"})
+    assert parsed.json()["result"] == body["result"]
+    assert calls == [("alpha", "/run", {"text": "hi"}), ("beta", "/run", {"text": "ho"})]
+    assert skills.get_http_client() is pooled
@@ -0,0 +1,770 @@
+import json
+import math
+import os
+
+import pytest
+
+import CRI_API_FIXED_COMPLETE as cri
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(cri, "DECAY_RATE", 0.0)
+    monkeypatch.setattr(cri, "HISTORY_STORE", cri.HistorySegmentStore(":memory:"))
+    monkeypatch.setattr(cri, "REGISTRY_STATS", cri.RegistryStats())
+    monkeypatch.setattr(cri, "CALIBRATION_INDEX", cri.CalibrationIndex())
+    monkeypatch.setattr(cri, "RANK_INDEXES", cri.RankIndexes())
+    monkeypatch.setattr(cri, "TRUST_ENGINE", cri.TrustEngine(pretrusted=[]))
+    monkeypatch.setattr(cri, "CERTIFICATES", cri.CertificateAuthority(key_path=""))
+    monkeypatch.setattr(cri, "ROLLUP_BUDGET", cri.RollupBudget())
+    cri.NODE_REGISTRY.clear()
+    yield
+    cri.NODE_REGISTRY.clear()
+
+
+def make_event(node_id: str, index: int, success: bool = True, **kwargs) -> cri.TransactionEvent:
+    return cri.TransactionEvent(
+        node_id=node_id,
+        transaction_id=f"tx_{node_id}_{index}",
+        success=success,
+        skill_id=kwargs.pop("skill_id", "csv_parser"),
+        **kwargs,
+    )
+
+
+def test_history_ring_is_bounded_and_pages_across_spilled_entries(monkeypatch) -> None:
+    monkeypatch.setattr(cri, "HISTORY_HOT_ENTRIES", 4)
+    monkeypatch.setattr(cri, "HISTORY_COMMIT_ROWS", 4)
+    for index in range(10):
+        cri.update_cri(make_event("node_hist", index))
+
+    node = cri.NODE_REGISTRY["node_hist"]
+    assert len(node.history._transaction_ids) == 4
+    assert len(node.history) == 10
+    assert cri.HISTORY_STORE._uncommitted == 2
+    cri.HISTORY_STORE.flush()
+    assert not cri.HISTORY_STORE._conn.in_transaction
+
+    entries = iter(node.history)
+    assert next(entries).seq == 0
+    assert [entry.seq for entry in entries] == list(range(1, 10))
+
+    first = cri.get_cri_history("node_hist", limit=3)
+    assert [entry["seq"] for entry in first.history] == [9, 8, 7]
+    assert first.total_entries == 10
+
+    seen = [entry["seq"] for entry in first.history]
+    cursor = first.next_before
+    while cursor is not None:
+        page = cri.get_cri_history("node_hist", limit=3, before=cursor)
+        seen.extend(entry["seq"] for entry in page.history)
+        cursor = page.next_before
+
+    assert seen == list(range(9, -1, -1))
+    assert [entry["transaction_id"] for entry in cri.get_cri_history("node_hist", limit=2, before=5).history] == [
+        "tx_node_hist_4",
+        "tx_node_hist_3",
+    ]
+
+
+def test_default_cold_history_is_on_disk_not_in_process_memory(monkeypatch) -> None:
+    monkeypatch.setattr(cri, "HISTORY_DB_PATH", "")
+    monkeypatch.setattr(cri, "EVENT_LOG_DIR", "")
+    store = cri.HistorySegmentStore()
+    assert store._db_path == ""
+    # ":memory:" reports a memory journal; the private temporary database journals to disk.
+    assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] != "memory"
+    assert cri.HistorySegmentStore(":memory:")._conn.execute("PRAGMA journal_mode").fetchone()[0] == "memory"
+
+
+def test_full_skill_table_rejects_events_before_any_state_changes(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cri, "EVENT_LOG", cri.EventLog(str(tmp_path)))
+    cri.update_cri(make_event("node_skills", 1))
+    monkeypatch.setattr(cri, "SKILL_MAX_IDS", len(cri.SKILL_IDS) + 1)
+    cri.update_cri(make_event("node_skills", 2, skill_id="skill_cap_last"))
+    before = cri.NODE_REGISTRY["node_skills"].state()
+
+    with pytest.raises(cri.HTTPException) as exc_info:
+        cri.update_cri(make_event("node_skills", 3, skill_id="skill_cap_overflow"))
+    assert exc_info.value.status_code == 422
+    with pytest.raises(cri.HTTPException):
+        cri.update_cri_batch(
+            cri.TransactionBatch(events=[make_event("node_skills", 4), make_event("node_other", 1, skill_id="skill_cap_x")])
+        )
+
+    assert cri.NODE_REGISTRY["node_skills"].state() == before
+    assert "node_other" not in cri.NODE_REGISTRY
+    assert cri.EVENT_LOG.last_seq == 2
+    assert cri.get_cri_history("node_skills", limit=1).history[0]["skill_id"] == "skill_cap_last"
+    cri.EVENT_LOG.close()
+
+
+def recompute_stats() -> dict:
+    nodes = list(cri.NODE_REGISTRY.values())
+    today = cri.epoch_now() // 86400
+    nodes_by_score = {bucket: 0 for bucket in cri.SCORE_BUCKETS}
+    for node in nodes:
+        nodes_by_score[cri.score_bucket(node.current_score)] += 1
+    return {
+        "total_nodes": len(nodes),
+        "average_cri": round(sum(node.current_score for node in nodes) / len(nodes), 2) if nodes else 0.0,
+        "total_transactions": sum(node.total_transactions for node in nodes),
+        "active_today": sum(1 for node in nodes if node.last_active // 86400 == today),
+        "nodes_by_score": nodes_by_score,
+    }
+
+
+def test_incremental_stats_match_full_recomputation() -> None:
+    cri.initialize_test_data()
+    for index in range(300):
+        node_id = f"node_{index % 37}"
+        if index % 11 == 0:
+            event = make_event(node_id, index, calibration_test=True, test_score=(index % 10) / 10)
+        elif index % 7 == 0:
+            event = make_event(node_id, index, success=False)
+        else:
+            event = make_event(node_id, index, success=index % 5 != 0, validation_passed=index % 3 != 0)
+        cri.update_cri(event)
+
+    assert cri.stats() == recompute_stats()
+    calibration_entries = sum(
+        1
+        for node in cri.NODE_REGISTRY.values()
+        for entry in node.history or ()
+        if entry.reason.startswith("Calibration test")
+    )
+    assert cri.health()["calibration_tests"] == calibration_entries == 28
+
+
+def test_calibration_index_is_time_ordered_and_filterable() -> None:
+    cri.update_cri(make_event("node_a", 1, calibration_test=True, test_score=0.9, skill_id="csv_parser"))
+    cri.update_cri(make_event("node_b", 2, skill_id="csv_parser"))
+    cri.update_cri(make_event("node_b", 3, calibration_test=True, test_score=0.5, skill_id="pdf_reader"))
+    cri.update_cri(make_event("node_a", 4, calibration_test=True, test_score=0.7, skill_id="pdf_reader"))
+
+    latest = cri.list_calibration_tests(limit=2)
+    assert latest["total"] == 3
+    assert [(test["node_id"], test["skill_id"]) for test in latest["tests"]] == [
+        ("node_a", "pdf_reader"),
+        ("node_b", "pdf_reader"),
+    ]
+    assert latest["tests"][0]["kind"] == cri.EventKind.CALIBRATION
+
+    by_skill = cri.list_calibration_tests(skill_id="csv_parser")
+    assert by_skill["total"] == 1
+    assert by_skill["tests"][0]["transaction_id"] == "tx_node_a_1"
+
+    by_node = cri.list_calibration_tests(node_id="node_b")
+    assert [test["transaction_id"] for test in by_node["tests"]] == ["tx_node_b_3"]
+
+    both = cri.list_calibration_tests(skill_id="pdf_reader", node_id="node_a")
+    assert both["total"] == 1
+    assert both["tests"][0]["transaction_id"] == "tx_node_a_4"
+
+
+def test_calibration_index_keeps_bounded_references_into_history(monkeypatch) -> None:
+    monkeypatch.setattr(cri, "HISTORY_HOT_ENTRIES", 2)
+    monkeypatch.setattr(cri, "CALIBRATION_INDEX", cri.CalibrationIndex(max_entries=3))
+    for index in range(5):
+        cri.update_cri(make_event("node_cal", index, calibration_test=True, test_score=index / 10))
+        cri.update_cri(make_event("node_cal", 100 + index))
+
+    assert len(cri.CALIBRATION_INDEX) == 3
+    assert cri.CALIBRATION_INDEX.entries[0] == ("node_cal", 4, cri.SKILL_CODES["csv_parser"])
+    assert cri.health()["calibration_tests"] == cri.CALIBRATION_INDEX.added == 5
+    # The two older calibrations have left the hot ring and are read back from the cold segment.
+    latest = cri.list_calibration_tests(node_id="node_cal", skill_id="csv_parser")
+    assert [test["transaction_id"] for test in latest["tests"]] == ["tx_node_cal_4", "tx_node_cal_3", "tx_node_cal_2"]
+    assert [test["seq"] for test in latest["tests"]] == [8, 6, 4]
+    assert all(test["reason"].startswith("Calibration test") for test in latest["tests"])
+    assert latest["total"] == 3
+    assert cri.CALIBRATION_INDEX.state()["records"] == [
+        ["node_cal", 4, "csv_parser"],
+        ["node_cal", 6, "csv_parser"],
+        ["node_cal", 8, "csv_parser"],
+    ]
+
+
+def test_batch_update_applies_per_node_in_order_and_is_idempotent() -> None:
+    events = [
+        make_event("node_a", 1),
+        make_event("node_b", 1, success=False, validation_passed=False),
+        make_event("node_a", 2, success=False),
+        make_event("node_a", 1),
+    ]
+
+    first = cri.update_cri_batch(cri.TransactionBatch(events=events))
+    assert first["applied"] == 3
+    assert first["duplicates"] == 1
+    assert [result["node_id"] for result in first["results"]] == ["node_a", "node_b", "node_a", "node_a"]
+    assert first["results"][0]["new_score"] == 1.05
+    assert first["results"][2]["old_score"] == 1.05
+    assert first["results"][2]["new_score"] == 0.75
+    assert first["results"][3] == {**first["results"][0], "duplicate": True}
+
+    replay = cri.update_cri_batch(cri.TransactionBatch(events=events))
+    assert replay["applied"] == 0
+    assert [result["new_score"] for result in replay["results"]] == [
+        result["new_score"] for result in first["results"]
+    ]
+    assert cri.NODE_REGISTRY["node_a"].total_transactions == 2
+    assert cri.NODE_REGISTRY["node_b"].current_score == 0.8
+
+
+def test_concurrent_updates_to_one_node_are_not_lost() -> None:
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda index: cri.update_cri(make_event("node_hot", index)), range(400)))
+
+    node = cri.NODE_REGISTRY["node_hot"]
+    assert node.total_transactions == 400
+    assert len(node.history) == 400
+    assert cri.stats()["total_transactions"] == 400
+
+
+def test_rank_indexes_match_sorted_registry() -> None:
+    for index in range(200):
+        node_id = f"node_{index % 40}"
+        skill_id = "csv_parser" if index % 40 < 15 else "pdf_reader"
+        cri.update_cri(make_event(node_id, index, success=index % 6 != 0, skill_id=skill_id))
+
+    nodes = sorted(cri.NODE_REGISTRY.values(), key=lambda node: node.current_score, reverse=True)
+    top = cri.rank_top(k=5)
+    assert top["total_nodes"] == 40
+    assert [entry["cri_score"] for entry in top["nodes"]] == [node.current_score for node in nodes[:5]]
+
+    csv_nodes = [node for node in nodes if node.has_capability("csv_parser")]
+    csv_top = cri.rank_top(k=100, skill_id="csv_parser")
+    assert csv_top["total_nodes"] == len(csv_nodes) == 15
+    assert {entry["node_id"] for entry in csv_top["nodes"]} == {node.node_id for node in csv_nodes}
+
+    in_range = [node for node in nodes if 1.0 <= node.current_score <= 1.2]
+    assert cri.rank_range(min_score=1.0, max_score=1.2)["count"] == len(in_range)
+
+    target = nodes[17]
+    below = sum(1 for node in nodes if node.current_score < target.current_score)
+    equal = sum(1 for node in nodes if node.current_score == target.current_score)
+    percentile = cri.get_cri_percentile(target.node_id)
+    assert percentile["percentile"] == round((below + 0.5 * equal) / len(nodes) * 100, 2)
+    assert percentile["rank"] == len(nodes) - below - equal + 1
+
+
+def test_skill_rank_indexes_are_sparse_and_capped(monkeypatch) -> None:
+    monkeypatch.setattr(cri, "DECAY_RATE", math.log(2) / 86400)
+    monkeypatch.setattr(cri, "RANK_INDEXES", cri.RankIndexes(max_skill_indexes=1))
+    for index in range(5):
+        cri.update_cri(make_event(f"node_{index}", index, skill_id="csv_parser"))
+    cri.update_cri(make_event("node_0", 10, skill_id="rare_skill"))
+
+    csv_index = cri.RANK_INDEXES.index("csv_parser")
+    assert isinstance(csv_index._keys._tree, cri.SparseTree)
+    assert len(csv_index._keys._tree) < 100
+    assert cri.rank_top(k=10, skill_id="csv_parser")["total_nodes"] == 5
+    assert cri.rank_top(k=10)["total_nodes"] == 5
+    with pytest.raises(cri.HTTPException) as exc_info:
+        cri.rank_top(k=10, skill_id="rare_skill")
+    assert exc_info.value.status_code == 422
+    assert cri.rank_top(k=10, skill_id="never_seen")["total_nodes"] == 0
+
+    dense = cri.BucketCounts(64)
+    for bucket in range(8):
+        dense.insert(bucket, f"node_{bucket}")
+    assert not isinstance(dense._tree, cri.SparseTree)
+    assert dense.count(2, 5) == 4 and dense.prefix(63) == 8
+
+
+def test_bulk_lookup_projects_fields_without_registering_unknown_nodes() -> None:
+    cri.update_cri(make_event("node_a", 1))
+    cri.update_cri(make_event("node_b", 1, success=False))
+
+    request = cri.CRILookupRequest(node_ids=["node_a", "ghost_1", "node_b", "ghost_2"], fields=["cri_score", "capabilities"])
+    body = json.loads(cri.lookup_cri(request).body)
+
+    assert body["fields"] == ["cri_score", "capabilities"]
+    assert body["records"] == {
+        "node_a": [1.05, ["csv_parser"]],
+        "ghost_1": [cri.GENESIS_SCORE, []],
+        "node_b": [0.7, ["csv_parser"]],
+        "ghost_2": [cri.GENESIS_SCORE, []],
+    }
+    assert body["unknown"] == 2
+    assert "ghost_1" not in cri.NODE_REGISTRY
+
+    by_query = json.loads(cri.lookup_cri_by_ids("node_a,ghost_1").body)
+    assert by_query["fields"] == list(cri.DEFAULT_LOOKUP_FIELDS)
+    assert by_query["records"]["node_a"] == [1.05, 1, 1.0]
+
+    with pytest.raises(cri.HTTPException) as exc_info:
+        cri.lookup_cri_by_ids("node_a", fields="cri_score,secret")
+    assert exc_info.value.status_code == 422
+
+
+def test_event_log_snapshot_and_tail_replay_rebuild_state(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cri, "EVENT_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(cri, "HISTORY_HOT_ENTRIES", 2)
+    monkeypatch.setattr(cri, "HISTORY_STORE", cri.HistorySegmentStore())
+    monkeypatch.setattr(cri, "EVENT_LOG", cri.EventLog(str(tmp_path), segment_events=4))
+    monkeypatch.setattr(cri, "SNAPSHOTS", cri.SnapshotStore(str(tmp_path)))
+    monkeypatch.setattr(cri, "SNAPSHOT_EVERY", 5)
+
+    for index in range(12):
+        node_id = f"node_{index % 3}"
+        if index % 4 == 0:
+            cri.update_cri(make_event(node_id, index, calibration_test=True, test_score=0.5))
+        else:
+            cri.update_cri(make_event(node_id, index, success=index % 5 != 0))
+        with cri.SNAPSHOTS.writing:
+            pass
+
+    expected_nodes = sorted(node.state() for node in cri.NODE_REGISTRY.values())
+    expected_stats = cri.stats()
+    expected_calibration = cri.list_calibration_tests()
+    expected_history = [entry.transaction_id for entry in cri.NODE_REGISTRY["node_0"].history]
+    assert len(expected_history) == 4
+    assert cri.SNAPSHOTS.snapshots()[-1][0] == 10
+    assert len(cri.EVENT_LOG.segments()) == 3
+    assert os.path.exists(tmp_path / "history.sqlite")
+    cri.EVENT_LOG.close()
+    # Drop the history connection without a flush, as a crash would.
+    cri.HISTORY_STORE._conn.close()
+
+    reset_registry(monkeypatch)
+    cri.open_storage()
+    monkeypatch.setattr(cri, "EVENT_LOG", cri.EventLog(str(tmp_path), segment_events=4))
+
+    assert cri.restore_state() == {"snapshot_seq": 10, "replayed": 2}
+    assert sorted(node.state() for node in cri.NODE_REGISTRY.values()) == expected_nodes
+    assert cri.stats() == expected_stats
+    assert cri.list_calibration_tests() == expected_calibration
+    assert [entry.transaction_id for entry in cri.NODE_REGISTRY["node_0"].history] == expected_history
+    assert cri.get_cri_history("node_0", limit=10).total_entries == 4
+    assert len(cri.get_cri_history("node_0", limit=10).history) == 4
+    assert cri.EVENT_LOG.last_seq == 12
+    cri.EVENT_LOG.close()
+
+
+def test_failed_snapshot_write_is_retried_on_the_next_update(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cri, "EVENT_LOG", cri.EventLog(str(tmp_path)))
+    monkeypatch.setattr(cri, "SNAPSHOTS", cri.SnapshotStore(str(tmp_path)))
+    monkeypatch.setattr(cri, "SNAPSHOT_EVERY", 2)
+    cri.update_cri(make_event("node_snap", 0, calibration_test=True, test_score=0.5))
+    calibration = cri.NODE_REGISTRY["node_snap"].calibration_scores
+    assert cri.NODE_REGISTRY["node_snap"].state()[8] is not calibration
+
+    def fail(payload) -> None:
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cri.SNAPSHOTS, "write", fail)
+    cri.update_cri(make_event("node_snap", 1))
+    with cri.SNAPSHOTS.writing:
+        pass
+    assert cri.SNAPSHOTS.last_seq == 0
+    assert cri.SNAPSHOTS.snapshots() == []
+
+    monkeypatch.delattr(cri.SNAPSHOTS, "write")
+    cri.update_cri(make_event("node_snap", 2))
+    with cri.SNAPSHOTS.writing:
+        pass
+    assert cri.SNAPSHOTS.last_seq == 3
+    assert cri.SNAPSHOTS.snapshots()[-1][0] == 3
+    cri.EVENT_LOG.close()
+
+
+def reset_registry(monkeypatch) -> None:
+    monkeypatch.setattr(cri, "NODE_REGISTRY", cri.ShardedRegistry())
+    monkeypatch.setattr(cri, "REGISTRY_STATS", cri.RegistryStats())
+    monkeypatch.setattr(cri, "CALIBRATION_INDEX", cri.CalibrationIndex())
+    monkeypatch.setattr(cri, "RANK_INDEXES", cri.RankIndexes())
+    monkeypatch.setattr(cri, "TRUST_ENGINE", cri.TrustEngine(pretrusted=[]))
+    monkeypatch.setattr(cri, "CERTIFICATES", cri.CertificateAuthority(key_path=""))
+    # open_storage() rebinds these; registering them lets monkeypatch put the originals back.
+    for name in ("HISTORY_STORE", "EVENT_LOG", "SNAPSHOTS"):
+        monkeypatch.setattr(cri, name, getattr(cri, name))
+
+
+def test_shard_workers_keep_separate_storage_and_restore_only_owned_nodes(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cri, "EVENT_LOG_DIR", str(tmp_path))
+    monkeypatch.setattr(cri, "SHARD_COUNT", 2)
+    directories = []
+    for index in range(2):
+        monkeypatch.setattr(cri, "SHARD_INDEX", index)
+        reset_registry(monkeypatch)
+        cri.open_storage()
+        directories.append(cri.EVENT_LOG.directory)
+        for event_index in range(8):
+            node_id = f"node_{event_index}"
+            if cri.owns_node(node_id):
+                cri.update_cri(make_event(node_id, event_index))
+        cri.EVENT_LOG.close()
+    assert directories == [str(tmp_path / "shard-0-of-2"), str(tmp_path / "shard-1-of-2")]
+    assert all(os.path.exists(os.path.join(directory, "history.sqlite")) for directory in directories)
+
+    # A log written before the split still restores only the nodes this shard owns.
+    monkeypatch.setattr(cri, "SHARD_INDEX", 1)
+    reset_registry(monkeypatch)
+    monkeypatch.setattr(cri, "EVENT_LOG", cri.EventLog(str(tmp_path / "unsharded")))
+    monkeypatch.setattr(cri, "SNAPSHOTS", cri.SnapshotStore(str(tmp_path / "unsharded")))
+    monkeypatch.setattr(cri, "SHARD_COUNT", 1)
+    for event_index in range(8):
+        cri.update_cri(make_event(f"node_{event_index}", event_index))
+    cri.EVENT_LOG.close()
+
+    monkeypatch.setattr(cri, "SHARD_COUNT", 2)
+    monkeypatch.setattr(cri, "NODE_REGISTRY", cri.ShardedRegistry())
+    monkeypatch.setattr(cri, "RANK_INDEXES", cri.RankIndexes())
+    monkeypatch.setattr(cri, "REGISTRY_STATS", cri.RegistryStats())
+    owned = sorted(f"node_{index}" for index in range(8) if cri.owns_node(f"node_{index}"))
+    assert 0 < len(owned) < 8
+    assert cri.restore_state()["replayed"] == len(owned)
+    assert sorted(node.node_id for node in cri.NODE_REGISTRY.values()) == owned
+
+
+def test_trust_engine_isolates_sybil_ring_and_warm_starts(monkeypatch) -> None:
+    monkeypatch.setattr(cri, "TRUST_ENGINE", cri.TrustEngine(pretrusted=["honest_0"], max_iterations=500))
+    honest = [f"honest_{index}" for index in range(5)]
+    sybils = [f"sybil_{index}" for index in range(5)]
+    count = 0
+    for ring in (honest, sybils):
+        for position, buyer in enumerate(ring):
+            seller = ring[(position + 1) % len(ring)]
+            for _ in range(3 if ring is honest else 50):
+                count += 1
+                cri.update_cri(make_event(seller, count, buyer_node_id=buyer))
+    # A sybil defrauding an honest buyer only earns negative local trust.
+    cri.update_cri(make_event("sybil_0", count + 1, success=False, validation_passed=False, buyer_node_id="honest_2"))
+
+    cold = cri.recompute_trust()
+    assert cold["nodes"] == 10 and cold["edges"] == 10
+    assert all(cri.get_cri(node_id).trust_score == 0.0 for node_id in sybils)
+    assert all(cri.get_cri(node_id).trust_score > 1.0 for node_id in honest)
+    assert cri.trust_status()["pending_updates"] == 0
+    assert cri.lookup_records(["honest_1"], ["trust_score"])["records"]["honest_1"] == [
+        cri.get_cri("honest_1").trust_score
+    ]
+
+    cri.update_cri(make_event("honest_3", count + 2, buyer_node_id="honest_0"))
+    warm = cri.recompute_trust()
+    restarted = cri.TRUST_ENGINE.compute(warm_start=False)
+    assert warm["warm_start"] and warm["iterations"] < restarted["iterations"]
+    assert cri.get_cri("honest_3").trust_score > 1.0
+
+
+def test_sharded_workers_do_not_serve_partial_trust(monkeypatch) -> None:
+    import asyncio
+
+    monkeypatch.setattr(cri, "SHARD_COUNT", 2)
+    sellers = [f"node_{index}" for index in range(8) if cri.owns_node(f"node_{index}")]
+    for index, seller in enumerate(sellers):
+        cri.update_cri(make_event(seller, index, buyer_node_id="buyer_0"))
+
+    assert cri.TRUST_ENGINE.version == 0
+    assert all(cri.get_cri(seller).trust_score is None for seller in sellers)
+    assert cri.trust_status()["enabled"] is False
+    for recompute in (cri.recompute_trust, lambda: asyncio.run(cri.router_recompute_trust())):
+        with pytest.raises(cri.HTTPException) as exc_info:
+            recompute()
+        assert exc_info.value.status_code == 409
+
+
+def test_decay_is_lazy_and_rank_indexes_follow_the_clock(monkeypatch) -> None:
+    clock = {"now": cri.epoch_now()}
+    start = clock["now"]
+    monkeypatch.setattr(cri, "epoch_now", lambda: clock["now"])
+    monkeypatch.setattr(cri, "DECAY_RATE", math.log(2) / 86400)
+    monkeypatch.setattr(cri, "REGISTRY_STATS", cri.RegistryStats())
+    monkeypatch.setattr(cri, "RANK_INDEXES", cri.RankIndexes())
+
+    for index in range(10):
+        cri.update_cri(make_event("node_old", index))
+    cri.update_cri(make_event("node_bad", 0, success=False, validation_passed=False))
+    clock["now"] = start + 2 * 86400
+    for index in range(4):
+        cri.update_cri(make_event("node_new", index))
+
+    assert cri.NODE_REGISTRY["node_old"].current_score == 1.5
+    assert cri.get_cri("node_old").cri_score == 1.125
+    assert cri.get_cri("node_bad").cri_score == 0.8
+    top = cri.rank_top(k=3)
+    assert [(entry["node_id"], entry["cri_score"]) for entry in top["nodes"]] == [
+        ("node_new", 1.2),
+        ("node_old", 1.125),
+        ("node_bad", 0.8),
+    ]
+    assert cri.rank_range(min_score=1.1, max_score=1.15)["count"] == 1
+    assert cri.get_cri_percentile("node_old")["rank"] == 2
+    assert cri.stats()["average_cri"] == round((1.2 + 1.125 + 0.8) / 3, 2)
+
+    clock["now"] = start + 40 * 86400
+    index = cri.RANK_INDEXES.global_index
+    assert index.counts(1.0) == (1, 2)
+    assert cri.stats()["nodes_by_score"]["poor_1-2"] == 2
+    assert cri.stats()["average_cri"] == round(2.8 / 3, 2)
+
+    cri.update_cri(make_event("node_old", 10))
+    assert cri.get_cri("node_old").cri_score == 1.05
+    assert [entry["node_id"] for entry in cri.rank_top(k=3)["nodes"]] == ["node_old", "node_new", "node_bad"]
+    assert index.size == 3
+
+
+def test_badge_is_cached_per_score_with_conditional_requests() -> None:
+    first = cri.badge_svg("node_badge", if_none_match=None)
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and b">1.00</text>" in first.body
+    assert "max-age" in first.headers["cache-control"]
+    assert cri.badge_svg("node_other", if_none_match=None).body is first.body
+
+    not_modified = cri.badge_svg("node_badge", if_none_match=f"W/{etag}, \"other\"")
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert not_modified.headers["etag"] == etag
+
+    cri.update_cri(make_event("node_badge", 1))
+    changed = cri.badge_svg("node_badge", if_none_match=etag)
+    assert changed.status_code == 200 and b">1.05</text>" in changed.body
+    assert changed.headers["etag"] != etag
+
+
+def test_series_rollups_are_bounded_per_resolution(monkeypatch) -> None:
+    clock = {"now": cri.epoch_now() // 86400 * 86400}
+    start = clock["now"]
+    monkeypatch.setattr(cri, "epoch_now", lambda: clock["now"])
+    monkeypatch.setattr(cri, "ROLLUP_RESOLUTIONS", {**cri.ROLLUP_RESOLUTIONS, "minute": (60, 3)})
+
+    for index, (offset, success) in enumerate([(0, True), (10, False), (70, True), (130, True), (3700, True)]):
+        clock["now"] = start + offset
+        cri.update_cri(make_event("node_series", index, success=success, validation_passed=False))
+
+    hourly = cri.get_cri_series("node_series", resolution="hour")
+    assert [(point["min"], point["max"], point["last"], point["count"]) for point in hourly["points"]] == [
+        (0.85, 1.05, 0.95, 4),
+        (1.0, 1.0, 1.0, 1),
+    ]
+    minutes = cri.get_cri_series("node_series", resolution="minute")["points"]
+    assert len(minutes) == 3 and minutes[0]["timestamp"] == cri.iso_from_epoch(start + 60)
+    assert cri.get_cri_series("node_series", resolution="day", limit=5)["points"][0]["count"] == 5
+    assert cri.get_cri_series("unknown", resolution="day")["points"] == []
+
+    restored = cri.NodeCRI.from_state(cri.NODE_REGISTRY["node_series"].state())
+    assert restored.rollups["hour"].points(10) == hourly["points"]
+    with pytest.raises(cri.HTTPException):
+        cri.get_cri_series("node_series", resolution="week")
+
+
+def test_rollup_budget_evicts_least_recently_active_nodes(monkeypatch) -> None:
+    clock = {"now": 1_700_000_000}
+    monkeypatch.setattr(cri, "epoch_now", lambda: clock["now"])
+    per_node = cri.ROLLUP_NODE_OVERHEAD + 3 * cri.ROLLUP_RECORD.size
+    monkeypatch.setattr(cri, "ROLLUP_BUDGET", cri.RollupBudget(max_bytes=3 * per_node))
+
+    for index in range(4):
+        clock["now"] += 10
+        cri.update_cri(make_event(f"node_{index}", index))
+    assert cri.ROLLUP_BUDGET.evicted == 2
+    assert cri.ROLLUP_BUDGET.bytes == 2 * per_node
+    assert [cri.NODE_REGISTRY[f"node_{index}"].rollups is None for index in range(4)] == [True, True, False, False]
+    assert cri.get_cri_series("node_0", resolution="day")["points"] == []
+
+    # An evicted node starts a fresh series on its next event.
+    clock["now"] += 10
+    cri.update_cri(make_event("node_0", 10))
+    assert cri.get_cri_series("node_0", resolution="day")["points"][0]["count"] == 1
+    assert cri.ROLLUP_BUDGET.bytes == sum(node.rollup_bytes() for node in cri.NODE_REGISTRY.values())
+
+
+def test_export_streams_ndjson_with_since_cursor(monkeypatch) -> None:
+    from fastapi.testclient import TestClient
+
+    clock = {"now": 1_700_000_000}
+    monkeypatch.setattr(cri, "epoch_now", lambda: clock["now"])
+    monkeypatch.setattr(cri, "HISTORY_HOT_ENTRIES", 3)
+    monkeypatch.setattr(cri, "EXPORT_CHUNK_RECORDS", 4)
+    for index in range(12):
+        clock["now"] += 10
+        cri.update_cri(make_event(f"node_{index % 2}", index))
+    client = TestClient(cri.app)
+
+    nodes = client.get("/v1/export/nodes")
+    assert nodes.headers["content-type"] == "application/x-ndjson"
+    assert nodes.headers["x-next-since"] == str(clock["now"])
+    assert sorted(json.loads(line)["node_id"] for line in nodes.text.splitlines()) == ["node_0", "node_1"]
+
+    history = [json.loads(line) for line in client.get("/v1/export/history").text.splitlines()]
+    assert len(history) == 12
+    assert [entry["seq"] for entry in history if entry["node_id"] == "node_0"] == list(range(6))
+
+    cursor = int(nodes.headers["x-next-since"])
+    clock["now"] += 10
+    cri.update_cri(make_event("node_1", 99))
+    assert [json.loads(line)["node_id"] for line in client.get(f"/v1/export/nodes?since={cursor}").text.splitlines()] == [
+        "node_1"
+    ]
+    recent = [json.loads(line) for line in client.get(f"/v1/export/history?since={cursor - 20}").text.splitlines()]
+    assert sorted(entry["transaction_id"] for entry in recent) == [
+        "tx_node_0_10",
+        "tx_node_1_11",
+        "tx_node_1_9",
+        "tx_node_1_99",
+    ]
+
+
+def test_merged_node_keeps_sender_times_and_decays_only_gains(monkeypatch) -> None:
+    sent_at = 1_700_000_000
+    clock = {"now": sent_at + 600}
+    monkeypatch.setattr(cri, "epoch_now", lambda: clock["now"])
+    monkeypatch.setattr(cri, "DECAY_RATE", math.log(2) / 86400)
+    monkeypatch.setattr(cri, "RANK_INDEXES", cri.RankIndexes())
+    monkeypatch.setattr(cri, "REPLICATOR", cri.Replicator("east", []))
+
+    counters = cri.ReplicaCounters()
+    counters.total["west"], counters.successful["west"], counters.failed["west"] = 16, 15, 1
+    counters.add_delta("west", 0.75, sent_at)
+    counters.add_delta("west", -0.2, sent_at)
+    state = {**counters.state(), "capabilities": ["csv_parser"], "last_active": sent_at, "created_at": sent_at - 3600}
+    assert cri.REPLICATOR.receive({"replica_id": "west", "nodes": {"node_geo": state}}) == 1
+
+    node = cri.NODE_REGISTRY["node_geo"]
+    assert (node.created_at, node.last_active) == (sent_at - 3600, sent_at)
+    assert node.total_transactions == 16
+
+    # One half-life later the gains have halved but the penalty is still whole.
+    clock["now"] = sent_at + 86400
+    assert cri.get_cri("node_geo").cri_score == counters.score(clock["now"]) == 1.175
+    assert cri.lookup_records(["node_geo"], ["cri_score"])["records"]["node_geo"] == [1.175]
+
+
+def test_replicated_scores_match_single_region_scoring(monkeypatch) -> None:
+    events = [make_event("node_same", index) for index in range(100)]
+    events += [make_event("node_same", 100 + index, success=False, validation_passed=False) for index in range(30)]
+    events += [make_event("node_same", 200), make_event("node_same", 201, success=False)]
+
+    def replay(replicator) -> list:
+        cri.NODE_REGISTRY.clear()
+        monkeypatch.setattr(cri, "REPLICATOR", replicator)
+        node = cri.get_or_register_node("node_same")
+        return [cri.apply_event(node, event, 1_700_000_000 + index) for index, event in enumerate(events)]
+
+    single = replay(None)
+    replicated = replay(cri.Replicator("east", []))
+    assert replicated == single
+    assert [delta["change"] for delta in single[99:101]] == [0.0, -0.2]
+    assert single[130]["change"] == 0.05
+    assert cri.NODE_REGISTRY["node_same"].score_at(1_700_000_200) == single[-1]["new_score"]
+
+
+def start_replica(replica_id: str, port: int, peer_port: int):
+    import os
+    import subprocess
+    import sys
+
+    env = {
+        **os.environ,
+        "CRI_REPLICA_ID": replica_id,
+        "CRI_REPLICA_PEERS": f"http://127.0.0.1:{peer_port}",
+        "CRI_REPLICATION_INTERVAL_SECONDS": "60",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "CRI_API_FIXED_COMPLETE:app", "--port", str(port), "--log-level", "warning"],
+        cwd=os.path.dirname(cri.__file__),
+        env=env,
+    )
+
+
+def test_two_replicas_converge_after_exchanging_deltas() -> None:
+    import socket
+    import time
+
+    import httpx
+
+    ports = []
+    for _ in range(2):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            ports.append(probe.getsockname()[1])
+    east_url, west_url = (f"http://127.0.0.1:{port}" for port in ports)
+    processes = [start_replica("east", ports[0], ports[1]), start_replica("west", ports[1], ports[0])]
+    try:
+        with httpx.Client(timeout=5) as client:
+            for url in (east_url, west_url):
+                for _ in range(100):
+                    try:
+                        client.get(f"{url}/health")
+                        break
+                    except httpx.TransportError:
+                        time.sleep(0.1)
+
+            for index in range(3):
+                client.post(f"{east_url}/v1/cri/update", json=make_event("node_geo", index).model_dump())
+            client.post(
+                f"{west_url}/v1/cri/update",
+                json=make_event("node_geo", 10, success=False, validation_passed=False).model_dump(),
+            )
+            client.post(
+                f"{west_url}/v1/cri/update",
+                json=make_event("node_geo", 11, calibration_test=True, test_score=0.5, skill_id="pdf_reader").model_dump(),
+            )
+            client.post(f"{east_url}/v1/cri/update", json=make_event("node_alpha_123", 1).model_dump())
+
+            assert client.post(f"{east_url}/v1/replication/sync").json()["sent"] == {west_url: 2}
+            assert client.post(f"{west_url}/v1/replication/sync").json()["sent"] == {east_url: 2}
+            client.post(f"{east_url}/v1/replication/sync")
+
+            east = client.get(f"{east_url}/v1/cri/node_geo").json()
+            west = client.get(f"{west_url}/v1/cri/node_geo").json()
+            assert east == west
+            assert east["total_transactions"] == 4
+            assert east["cri_score"] == 1.05
+            assert east["calibration_scores"] == {"pdf_reader": 0.5}
+            assert sorted(east["capabilities"]) == ["csv_parser", "pdf_reader"]
+
+            alpha = [client.get(f"{url}/v1/cri/node_alpha_123").json() for url in (east_url, west_url)]
+            assert alpha[0]["total_transactions"] == alpha[1]["total_transactions"] == 151
+            assert alpha[0]["cri_score"] == alpha[1]["cri_score"]
+            assert client.get(f"{west_url}/v1/replication/status").json()["pending"] == {east_url: 0}
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+def test_certificates_are_cached_per_score_version_and_verify(monkeypatch) -> None:
+    import base64
+
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+    def decode(part: str) -> bytes:
+        return base64.urlsafe_b64decode(part + "=" * (-len(part) % 4))
+
+    clock = {"now": 1_700_000_000}
+    monkeypatch.setattr(cri, "epoch_now", lambda: clock["now"])
+    cri.update_cri(make_event("node_cert", 1))
+
+    first = cri.get_cri_certificate("node_cert")
+    header, claims, signature = first["certificate"].split(".")
+    jwk = cri.certificate_jwks()["keys"][0]
+    public_key = rsa.RSAPublicNumbers(
+        int.from_bytes(decode(jwk["e"]), "big"), int.from_bytes(decode(jwk["n"]), "big")
+    ).public_key()
+    public_key.verify(decode(signature), f"{header}.{claims}".encode(), padding.PKCS1v15(), hashes.SHA256())
+    payload = json.loads(decode(claims))
+    assert json.loads(decode(header))["kid"] == jwk["kid"]
+    assert payload["sub"] == "node_cert" and payload["cri"]["cri_score"] == 1.05
+    assert payload["exp"] - payload["iat"] == cri.CERT_TTL_SECONDS
+
+    clock["now"] += 60
+    assert cri.get_cri_certificate("node_cert") is first
+    assert cri.CERTIFICATES.signed == 1
+
+    cri.update_cri(make_event("node_cert", 2))
+    changed = cri.get_cri_certificate("node_cert")
+    assert changed is not first and cri.CERTIFICATES.signed == 2
+
+    clock["now"] += cri.CERT_TTL_SECONDS - cri.CERT_REFRESH_SECONDS
+    bulk = cri.issue_cri_certificates(cri.CRICertificateRequest(node_ids=["node_x", "node_cert", "node_y", "node_x"]))
+    assert list(bulk["certificates"]) == ["node_x", "node_cert", "node_y"]
+    assert bulk["certificates"]["node_cert"] is not changed
+    assert cri.CERTIFICATES.signed == 5
+    assert cri.issue_cri_certificates(cri.CRICertificateRequest(node_ids=["node_y", "node_x"]))["certificates"][
+        "node_y"
+    ] is bulk["certificates"]["node_y"]
+    assert cri.CERTIFICATES.signed == 5
@@ -29,6 +29,18 @@ class KeyPointExtractorOutput(BaseModel):
     points: List[str]
 
 
+class KeyPointExtractorBatchInput(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    items: List[Dict[str, Any]] = Field(min_length=1, max_length=64)
+
+
+class KeyPointExtractorBatchOutput(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    results: List[Dict[str, Any]]
+
+
 class BotNodeTask(BaseModel):
     model_config = ConfigDict(extra="allow")
 
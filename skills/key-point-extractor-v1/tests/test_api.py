@@ -4,7 +4,7 @@ import pytest
 from fastapi import HTTPException
 
 from key_point_extractor_v1 import api as api_module
-from key_point_extractor_v1.models import KeyPointExtractorInput, KeyPointExtractorOutput
+from key_point_extractor_v1.models import KeyPointExtractorBatchInput, KeyPointExtractorInput, KeyPointExtractorOutput
 
 
 def test_internal_api_key_validation() -> None:
@@ -46,3 +46,37 @@ def test_idempotency_cache_reuses_previous_result(monkeypatch) -> None:
 
     assert calls["count"] == 1
     assert first == second
+
+
+def test_run_batch_reports_each_item(monkeypatch) -> None:
+    async def fake_run(payload):  # type: ignore[no-untyped-def]
+        return KeyPointExtractorOutput(points=[payload.text])
+
+    monkeypatch.setattr(api_module.engine, "run", fake_run)
+    monkeypatch.setattr(api_module, "RATE_LIMIT_MAX_REQUESTS", 0)
+    batch = KeyPointExtractorBatchInput(items=[{"text": "first"}, {"text": "x", "max_points": 0}, {"text": "last"}])
+
+    output = asyncio.run(api_module.run_key_point_extractor_batch(batch))
+
+    assert output.results[0] == {"output": {"points": ["first"]}}
+    assert "max_points" in output.results[1]["error"]
+    assert output.results[2] == {"output": {"points": ["last"]}}
+
+
+def test_run_batch_charges_one_rate_limit_token_per_item(monkeypatch) -> None:
+    async def fake_run(payload):  # type: ignore[no-untyped-def]
+        raise ValueError("not needed")
+
+    monkeypatch.setattr(api_module.engine, "run", fake_run)
+    monkeypatch.setattr(api_module, "RATE_LIMIT_MAX_REQUESTS", 5)
+    monkeypatch.setattr(api_module, "RATE_LIMIT_WINDOW_SECONDS", 60.0)
+    api_module._rate_limit_events.clear()
+
+    asyncio.run(api_module.run_key_point_extractor_batch(KeyPointExtractorBatchInput(items=[{"text": "a"}] * 3)))
+    assert len(api_module._rate_limit_events) == 3
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(api_module.run_key_point_extractor_batch(KeyPointExtractorBatchInput(items=[{"text": "b"}] * 3)))
+    assert exc_info.value.status_code == 429
+    assert len(api_module._rate_limit_events) == 3
+    asyncio.run(api_module._enforce_rate_limit(2))
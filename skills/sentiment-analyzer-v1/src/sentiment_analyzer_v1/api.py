@@ -12,7 +12,12 @@ from fastapi import FastAPI, Header, HTTPException, Request
 import uvicorn
 
 from .engine import SentimentAnalyzerEngine
-from .models import SentimentAnalyzerInput, SentimentAnalyzerOutput
+from .models import (
+    SentimentAnalyzerBatchInput,
+    SentimentAnalyzerBatchOutput,
+    SentimentAnalyzerInput,
+    SentimentAnalyzerOutput,
+)
 
 
 SERVICE_HOST = os.getenv("SERVICE_HOST", "0.0.0.0")
@@ -36,9 +41,11 @@ _idempotency_lock = asyncio.Lock()
 
 @app.middleware("http")
 async def _run_guard(request: Request, call_next):  # type: ignore[no-untyped-def]
-    if request.method.upper() == "POST" and request.url.path == "/run":
+    if request.method.upper() == "POST" and request.url.path in ("/run", "/run-batch"):
         _validate_internal_api_key(request.headers.get("X-INTERNAL-API-KEY"))
-        await _enforce_rate_limit()
+        # /run-batch is charged one token per item once its body has been parsed.
+        if request.url.path == "/run":
+            await _enforce_rate_limit()
     return await call_next(request)
 
 
@@ -76,6 +83,20 @@ async def run_sentiment_analyzer(
         raise HTTPException(status_code=422, detail=str(exc)) from exc
 
 
+@app.post("/run-batch", response_model=SentimentAnalyzerBatchOutput)
+async def run_sentiment_analyzer_batch(payload: SentimentAnalyzerBatchInput) -> SentimentAnalyzerBatchOutput:
+    await _enforce_rate_limit(len(payload.items))
+    # Items fail independently so one bad input does not sink the rest of the batch.
+    results: list[dict[str, Any]] = []
+    for item in payload.items:
+        try:
+            output = await engine.run(SentimentAnalyzerInput.model_validate(item))
+            results.append({"output": output.model_dump(mode="json")})
+        except ValueError as exc:
+            results.append({"error": str(exc)})
+    return SentimentAnalyzerBatchOutput(results=results)
+
+
 def _validate_internal_api_key(provided_key: Optional[str]) -> None:
     if not INTERNAL_API_KEY:
         raise HTTPException(status_code=503, detail="INTERNAL_API_KEY is not configured")
@@ -83,7 +104,7 @@ def _validate_internal_api_key(provided_key: Optional[str]) -> None:
         raise HTTPException(status_code=401, detail="invalid internal api key")
 
 
-async def _enforce_rate_limit() -> None:
+async def _enforce_rate_limit(tokens: int = 1) -> None:
     if RATE_LIMIT_MAX_REQUESTS <= 0 or RATE_LIMIT_WINDOW_SECONDS <= 0:
         return
 
@@ -94,10 +115,10 @@ async def _enforce_rate_limit() -> None:
         while _rate_limit_events and _rate_limit_events[0] <= min_allowed:
             _rate_limit_events.popleft()
 
-        if len(_rate_limit_events) >= RATE_LIMIT_MAX_REQUESTS:
+        if len(_rate_limit_events) + tokens > RATE_LIMIT_MAX_REQUESTS:
             raise HTTPException(status_code=429, detail="rate limit exceeded")
 
-        _rate_limit_events.append(now)
+        _rate_limit_events.extend([now] * tokens)
 
 
 def _normalize_idempotency_key(value: Optional[str]) -> Optional[str]:
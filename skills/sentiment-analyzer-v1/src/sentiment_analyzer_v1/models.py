@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Literal, Union
+from typing import Any, Dict, List, Literal, Union
 
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
@@ -29,6 +29,18 @@ class SentimentAnalyzerOutput(BaseModel):
     explanation: str
 
 
+class SentimentAnalyzerBatchInput(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    items: List[Dict[str, Any]] = Field(min_length=1, max_length=64)
+
+
+class SentimentAnalyzerBatchOutput(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    results: List[Dict[str, Any]]
+
+
 class BotNodeTask(BaseModel):
     model_config = ConfigDict(extra="allow")
 